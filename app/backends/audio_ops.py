@@ -0,0 +1,114 @@
+# backends/audio_ops.py
+import io
+import struct
+from typing import Iterable, Iterator
+import soundfile as sf
+import torch
+
+# audio_format -> (file suffix, soundfile container, soundfile subtype)
+AUDIO_FORMATS: dict[str, tuple[str, str, str]] = {
+    "wav": (".wav", "WAV", "PCM_16"),
+    "flac": (".flac", "FLAC", "PCM_16"),
+    "opus": (".opus", "OGG", "OPUS"),
+}
+_STREAM_SIZE = 0xFFFFFFFF
+# The only rates libsndfile's Opus encoder accepts
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def silence(num_samples: int, like: torch.Tensor | None = None) -> torch.Tensor:
+    channels = like.shape[0] if like is not None else 1
+    dtype = like.dtype if like is not None else torch.float32
+    return torch.zeros(channels, max(0, num_samples), dtype=dtype)
+
+
+def crossfade_stream(chunks: Iterable[torch.Tensor], fade_samples: int) -> Iterator[torch.Tensor]:
+    """
+    Join (channels, samples) chunks with a linear crossfade, yielding audio as soon as it is final.
+    Only the last fade_samples of the stream are held back, waiting to be blended with the next chunk.
+    """
+    held: torch.Tensor | None = None
+    for chunk in chunks:
+        if held is not None and held.shape[-1]:
+            n = min(held.shape[-1], chunk.shape[-1])
+            ramp = torch.linspace(0.0, 1.0, n, dtype=chunk.dtype)
+            chunk = torch.cat(
+                [
+                    held[..., :held.shape[-1] - n],
+                    held[..., held.shape[-1] - n:] * (1.0 - ramp) + chunk[..., :n] * ramp,
+                    chunk[..., n:],
+                ],
+                dim=-1
+            )
+        cut = max(chunk.shape[-1] - fade_samples, 0)
+        if cut:
+            yield chunk[..., :cut]
+        held = chunk[..., cut:]
+    if held is not None and held.shape[-1]:
+        yield held
+
+
+def crossfade_join(chunks: Iterable[torch.Tensor], fade_samples: int) -> torch.Tensor:
+    return torch.cat(list(crossfade_stream(chunks, fade_samples)), dim=-1)
+
+
+def to_pcm16(wav: torch.Tensor) -> bytes:
+    """
+    Interleaved little-endian 16-bit PCM bytes for a (channels, samples) float waveform.
+    """
+    pcm = (wav.detach().clamp(-1.0, 1.0) * 32767.0).round().to(torch.int16)
+    return pcm.t().contiguous().cpu().numpy().tobytes()
+
+
+def wav_header(sample_rate: int, channels: int = 1, data_bytes: int | None = None) -> bytes:
+    """
+    RIFF/WAVE header for 16-bit PCM. Without data_bytes the sizes are 0xFFFFFFFF, for streaming before
+    the total size is known; players treat them as "read until end of stream".
+    """
+    bits = 16
+    block_align = channels * bits // 8
+    riff_size = _STREAM_SIZE if data_bytes is None else 36 + data_bytes
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits)
+        + b"data" + struct.pack("<I", _STREAM_SIZE if data_bytes is None else data_bytes)
+    )
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1) -> bytes:
+    return wav_header(sample_rate, channels)
+
+
+def encode_wav(wav: torch.Tensor, sample_rate: int) -> bytearray:
+    """
+    A complete 16-bit PCM WAV file, built in one buffer of its final size: the samples are converted
+    straight into it, with no intermediate numpy array, byte string or growing file object.
+    """
+    channels, samples = wav.shape
+    header = wav_header(sample_rate, channels, channels * samples * 2)
+    buffer = bytearray(len(header) + channels * samples * 2)
+    buffer[:len(header)] = header
+    if samples:
+        pcm = torch.frombuffer(buffer, dtype=torch.int16, offset=len(header)).view(samples, channels)
+        pcm.copy_((wav.detach().clamp(-1.0, 1.0) * 32767.0).round_().t())
+    return buffer
+
+
+def encode_audio(wav: torch.Tensor, sample_rate: int, audio_format: str = "wav") -> bytes:
+    """
+    Encode a (channels, samples) float waveform as a complete file in one of AUDIO_FORMATS.
+    Opus takes at other rates (espeak-ng's 22050 Hz) are resampled to the next rate Opus supports.
+    """
+    if audio_format == "wav":
+        return encode_wav(wav, sample_rate)
+    if audio_format == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+        import torchaudio.functional as AF
+
+        target = next((rate for rate in OPUS_SAMPLE_RATES if rate >= sample_rate), OPUS_SAMPLE_RATES[-1])
+        wav, sample_rate = AF.resample(wav.detach().float(), sample_rate, target), target
+    _, container, subtype = AUDIO_FORMATS[audio_format]
+    # libsndfile wraps out-of-range floats when converting to integer PCM, so clip first
+    data = wav.detach().clamp(-1.0, 1.0).t().contiguous().cpu().numpy()
+    buffer = io.BytesIO()
+    sf.write(buffer, data, sample_rate, format=container, subtype=subtype)
+    return buffer.getvalue()
@@ -0,0 +1,628 @@
+# backends/base.py
+import abc
+import secrets
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from threading import RLock
+from typing import Iterable, Iterator, Optional
+import torch
+import torchaudio as ta
+from app.utils import ensure_folder, log_exception, Timer
+from app.models.domain import (
+    domain as d,
+    emotion_params as ep,
+    exceptions as ex,
+    speaker as s
+)
+from app.models.api import TTSOutput
+from app.config import TTSConfig
+from app.services.audio_cache import AudioCache, file_hash
+from app.services.audio_writer import AudioWriter, WriteResult
+from app.services.take_store import RenderedTake
+from app.services.version_index import VersionIndex, DialogueKey
+from app.services.text_segmenter import segment_text, TextSegment
+from app.services.text_normalizer import dedupe_key, is_silent, silence_ms
+from app.services.phrase_bank import PhraseBank
+from app.backends.audio_ops import crossfade_stream, encode_audio, silence
+from app.services.metrics import METRICS, CACHE_LOOKUPS, LINES, SHORTCUT_LINES, stage, record_inference
+
+def random_seed() -> int:
+    return secrets.randbelow(2**31)
+
+def failed_future(e: Exception) -> Future:
+    done: Future = Future()
+    done.set_exception(e)
+    return done
+
+def synthesis_error(e: Exception) -> ex.TTSSynthesisError:
+    error = ex.TTSSynthesisError(str(e))
+    error.__cause__ = e
+    return error
+
+@dataclass
+class BackendServices:
+    """
+    Output-side state shared by every engine of a runner: one writer pool, one audio cache
+    and one version index, so takes from any engine land in the same versioned folders.
+    """
+    audio_writer: AudioWriter
+    audio_cache: Optional[AudioCache]
+    version_index: VersionIndex
+
+    @classmethod
+    def create(cls, config: TTSConfig) -> "BackendServices":
+        audio_writer = AudioWriter(
+            audio_format=config.audio_format,
+            tmp_dir=config.audio_write_tmp_dir,
+            threads=config.audio_writer_threads,
+            max_queue_depth=config.audio_writer_queue_depth
+        )
+        audio_writer.start()
+        audio_cache = (
+            AudioCache(config.audio_cache_dir, config.audio_cache_max_mb * 1024 * 1024, suffix=audio_writer.suffix)
+            if config.audio_cache_enabled else None
+        )
+        return cls(audio_writer, audio_cache, VersionIndex(config.version_index_path))
+
+    def close(self):
+        """
+        Wait for queued writes to land, then release the writer threads and the version index.
+        """
+        self.audio_writer.stop()
+        self.version_index.close()
+
+class TTSBackend(abc.ABC):
+    """
+    Engine-independent part of a TTS backend: versioned output paths, the audio cache and phrase
+    bank, segmenting, streaming, batching and handing takes to the writer.
+    Engines set name/model_id and implement _load(), sample_rate and _generate_chunk();
+    warm_up() and cache_stats() are for engines that keep per-voice state.
+    """
+    name: str = ""
+    model_id: str = ""
+    # Banked takes are rendered by one model; engines that cannot use them opt out
+    uses_phrase_bank: bool = True
+
+    def __init__(self, config: TTSConfig, services: Optional[BackendServices] = None):
+        self.config = config
+        # Engines with shared model state (Chatterbox's model.conds) must not interleave generations.
+        # Reentrant so a batch can hold it across all of its lines
+        self._model_lock = RLock()
+        self._load()
+        self._owns_services = services is None
+        self.services = services or BackendServices.create(config)
+        self.audio_writer = self.services.audio_writer
+        self.audio_cache = self.services.audio_cache
+        self.version_index = self.services.version_index
+        self.phrase_bank = (
+            PhraseBank.load(config.phrase_bank_dir, self.model_id, self.sample_rate)
+            if config.phrase_bank_enabled and self.uses_phrase_bank else None
+        )
+        self._register_metrics()
+
+    def close(self):
+        """
+        Release the writer and version index, unless they belong to a runner shared by several engines.
+        """
+        if self._owns_services:
+            self.services.close()
+
+    def _load(self):
+        """
+        Load the engine's model. Called first in __init__, before any of the output services exist.
+        """
+
+    def _register_metrics(self):
+        if self.audio_cache is not None:
+            CACHE_LOOKUPS.set_function(lambda: self.audio_cache.stats()["hits"], cache="audio", result="hit")
+            CACHE_LOOKUPS.set_function(lambda: self.audio_cache.stats()["misses"], cache="audio", result="miss")
+            METRICS.gauge("tts_audio_cache_bytes", "Bytes held by the audio cache").set_function(
+                lambda: self.audio_cache.stats()["bytes"]
+            )
+        if self.phrase_bank is not None:
+            CACHE_LOOKUPS.set_function(lambda: self.phrase_bank.stats()["hits"], cache="phrase_bank", result="hit")
+            CACHE_LOOKUPS.set_function(lambda: self.phrase_bank.stats()["misses"], cache="phrase_bank", result="miss")
+
+    @property
+    @abc.abstractmethod
+    def sample_rate(self) -> int:
+        ...
+
+    @abc.abstractmethod
+    def _generate_chunk(self, text: str, speaker: s.Speaker, emotion_params: ep.EmotionParams) -> torch.Tensor:
+        """
+        Synthesize one segment of text and return a (channels, samples) waveform at sample_rate.
+        """
+
+    def _voice_ref_path(self, speaker: s.Speaker) -> Path:
+        return Path(self.config.voice_ref_dir) / speaker.wav_file
+
+    def voice_fingerprint(self, speaker: s.Speaker) -> str | None:
+        """
+        sha256 of the speaker's voice ref, so a ref re-recorded under the same filename counts as another
+        voice. None for speakers without a ref file.
+        """
+        path = self._voice_ref_path(speaker)
+        return file_hash(path) if path.is_file() else None
+
+    def warm_up(
+        self,
+        speakers: Iterable[s.Speaker],
+        exaggerations: Iterable[float]
+    ) -> int:
+        """
+        Prepare per-voice state ahead of the first request. Returns the number of entries prepared.
+        """
+        return 0
+
+    def cache_stats(self) -> dict[str, int | float]:
+        return {}
+
+    def with_seed(self, req: d.TTSInput) -> d.TTSInput:
+        """
+        The request itself when it carries a seed, otherwise a copy with a random one, so every
+        generated take records the seed that reproduces it.
+        """
+        return req if req.seed is not None else req.model_copy(update={"seed": random_seed()})
+
+    def audio_cache_key(self, req: d.TTSInput) -> str | None:
+        """
+        Content address of the audio this request would produce, or None when the cache is disabled.
+        """
+        if self.audio_cache is None:
+            return None
+        return self.audio_cache.make_key(
+            text=req.text,
+            voice_ref=self._voice_ref_path(req.speaker),
+            params=req.emotion.params,
+            model_id=self.model_id,
+            seed=req.seed,
+            audio_format=self.audio_writer.audio_format
+        )
+
+    def fetch_cached(
+        self,
+        key: str | None,
+        req: d.TTSInput,
+        out_path: Path
+    ) -> bool:
+        """
+        Link a previously generated take into out_path. False on a miss or when the request bypasses the cache.
+        """
+        if key is None or req.bypass_cache:
+            return False
+        return self.audio_cache.fetch(key, out_path)
+
+    def with_cached_seed(self, req: d.TTSInput, key: str | None) -> d.TTSInput:
+        """
+        The request with the seed its cached take was generated with, so a take served from the cache
+        records the seed that reproduces it like a synthesized one does.
+        """
+        if req.seed is not None or key is None:
+            return req
+        seed = self.audio_cache.seed(key)
+        return req if seed is None else req.model_copy(update={"seed": seed})
+
+    def store_cached(self, key: str | None, out_path: Path, seed: Optional[int] = None):
+        if key is not None:
+            self.audio_cache.store(key, out_path, seed)
+
+    def audio_duration(self, path: Path) -> float:
+        info = ta.info(str(path))
+        return info.num_frames / info.sample_rate
+
+    def _dialogue_key(self, req: d.TTSInput, image_dir: Path) -> DialogueKey:
+        # The image folder relative to the run folder, so chapter_1/page_000 and chapter_2/page_000 stay apart
+        run_dir = (Path(self.config.media_root) / self.config.media_namespace / req.run_id).resolve()
+        return (req.run_id, image_dir.resolve().relative_to(run_dir).as_posix(), req.dialogue_id)
+
+    def allocate_output_path(
+        self,
+        req: d.TTSInput,
+        out_dir: Path
+    ) -> Path:
+        """
+        Create the dialogue folder and atomically reserve the path of the next versioned take.
+        """
+        return self.allocate_output_paths(req, out_dir, 1)[0]
+
+    def allocate_output_paths(
+        self,
+        req: d.TTSInput,
+        out_dir: Path,
+        count: int
+    ) -> list[Path]:
+        """
+        Create the dialogue folder and atomically reserve the paths of count consecutive versioned takes.
+        """
+        dialogue_subfolder: Path = (
+            out_dir / f"dialogue__{req.dialogue_id}"
+        ).resolve()
+        dialogue_subfolder = ensure_folder(dialogue_subfolder)
+
+        first: int = self.version_index.reserve(
+            self._dialogue_key(req, dialogue_subfolder.parent),
+            dialogue_subfolder,
+            count
+        )
+        emotion_params: ep.EmotionParams = req.emotion.params
+        return [
+            dialogue_subfolder / f"v{version}__exg{emotion_params.exaggeration}__cfg{emotion_params.cfg}{self.audio_writer.suffix}"
+            for version in range(first, first + count)
+        ]
+
+    def generate_phrase(self, text: str, speaker: s.Speaker, emotion_params: ep.EmotionParams) -> torch.Tensor:
+        """
+        Run the model on one short text, bypassing the phrase bank (used to build it).
+        """
+        return self._generate_chunk(text, speaker, emotion_params)
+
+    def generate_segments(self, req: d.TTSInput, use_phrase_bank: bool = True) -> Iterator[torch.Tensor]:
+        """
+        Synthesize the request text chunk by chunk, with a pause between paragraphs.
+        Punctuation-only lines become silence and banked interjections come from memory, without inference,
+        unless use_phrase_bank is off (take variants, which must differ by seed).
+        """
+        if is_silent(req.text):
+            SHORTCUT_LINES.inc(kind="silence")
+            yield silence(int(self.sample_rate * silence_ms(req.text) / 1000))
+            return
+        # bypass_cache asks for a fresh take, which the bank (one fixed take per phrase) cannot give
+        use_phrase_bank = use_phrase_bank and self.phrase_bank is not None and not req.bypass_cache
+        banked = self.phrase_bank.get(req) if use_phrase_bank else None
+        if banked is not None:
+            SHORTCUT_LINES.inc(kind="phrase_bank")
+            yield banked.clone()
+            return
+
+        segments = segment_text(req.text, self.config.segment_max_chars) or [TextSegment(req.text)]
+        pause_samples = int(self.sample_rate * self.config.segment_paragraph_pause_ms / 1000)
+        inference_seconds, samples = 0.0, 0
+        # Held across the segments so no other generation draws from the seeded RNG in between
+        with self._model_lock:
+            if req.seed is not None:
+                torch.manual_seed(req.seed)
+            for i, segment in enumerate(segments):
+                start = time.perf_counter()
+                wav = self._generate_chunk(segment.text, req.speaker, req.emotion.params)
+                inference_seconds += time.perf_counter() - start
+                samples += wav.shape[-1]
+                yield wav
+                if segment.paragraph_end and i < len(segments) - 1:
+                    yield silence(pause_samples, like=wav)
+        record_inference(len(req.text), samples / self.sample_rate, inference_seconds)
+
+    def stream_audio(self, req: d.TTSInput, use_phrase_bank: bool = True) -> Iterator[torch.Tensor]:
+        """
+        Crossfaded audio of the request, yielded as soon as each chunk is synthesized.
+        """
+        fade_samples = int(self.sample_rate * self.config.segment_crossfade_ms / 1000)
+        return crossfade_stream(self.generate_segments(req, use_phrase_bank), fade_samples)
+
+    def generate_audio(self, req: d.TTSInput, use_phrase_bank: bool = True) -> torch.Tensor:
+        """
+        Run inference for one resolved request and return the waveform tensor.
+        """
+        return torch.cat(list(self.stream_audio(req, use_phrase_bank)), dim=-1)
+
+    def generate_batch(self, reqs: list[d.TTSInput]) -> list[torch.Tensor]:
+        """
+        Generate several requests that share speaker conditionals in one hold of the model.
+        Engines generate a single text at a time, so lines still run one after another, but
+        no other caller can interleave.
+        """
+        with self._model_lock:
+            return [self.generate_audio(req) for req in reqs]
+
+    def save_audio(self, wav: torch.Tensor, out_path: Path) -> WriteResult:
+        """
+        Encode and write a take in the calling thread (the batch pipeline's writers already run off the model).
+        """
+        return self.audio_writer.write(wav, self.sample_rate, out_path)
+
+    def record_take(
+        self,
+        req: d.TTSInput,
+        out_path: Path
+    ):
+        """
+        Record a take whose file is in place in the version index.
+        """
+        version = int(out_path.stem.split("__")[0][1:])
+        self.version_index.record_take(
+            self._dialogue_key(req, out_path.parent.parent),
+            version,
+            out_path.name,
+            meta={
+                "speaker": req.speaker.name,
+                "emotion": req.emotion.name,
+                "exaggeration": req.emotion.params.exaggeration,
+                "cfg": req.emotion.params.cfg,
+                "engine": self.name,
+                "model_id": self.model_id,
+                "seed": req.seed,
+                "text": req.text,
+            }
+        )
+
+    def take_output(
+        self,
+        req: d.TTSInput,
+        out_path: Path
+    ) -> TTSOutput:
+        return TTSOutput(
+            ttsInput=req,
+            audio_ref=d.MediaRef(
+                namespace=d.MediaNamespace.OUTPUTS,
+                path=(out_path.relative_to(Path(self.config.media_root)/self.config.media_namespace)).as_posix()
+            ),
+            seed=req.seed
+        )
+
+    def finalize_take(
+        self,
+        req: d.TTSInput,
+        out_path: Path
+    ) -> TTSOutput:
+        """
+        Record a take whose file is in place in the version index and build its output metadata.
+        """
+        self.record_take(req, out_path)
+        return self.take_output(req, out_path)
+
+    def write_take(
+        self,
+        wav: torch.Tensor,
+        req: d.TTSInput,
+        out_path: Path,
+        cache_key: str | None
+    ) -> Future:
+        """
+        Hand a generated take to the audio writer. The returned future settles with the TTSOutput once the
+        file is in place, cached and recorded; with audio_write_mode: enqueue it settles right away.
+        """
+        written = self.audio_writer.submit(wav, self.sample_rate, out_path)
+        return self._finish_write(written, req, out_path, cache_key, "synthesized")
+
+    def _finish_write(
+        self,
+        written: Future,
+        req: d.TTSInput,
+        out_path: Path,
+        cache_key: str | None,
+        outcome: str
+    ) -> Future:
+        done: Future = Future()
+        if self.config.audio_write_mode == "enqueue":
+            done.set_result(self.take_output(req, out_path))
+
+        def on_written(f: Future):
+            try:
+                result: WriteResult = f.result()
+                self.store_cached(cache_key, out_path, req.seed)
+                output = self.finalize_take(req, out_path)
+            except Exception as e:
+                LINES.inc(result="failed")
+                if done.done():
+                    # The caller was already answered; all that is left is the log
+                    log_exception(f"Background write of {out_path} failed")
+                else:
+                    done.set_exception(synthesis_error(e))
+                return
+            LINES.inc(result=outcome)
+            print(f"IN write_take(): saved {str(out_path)} ({result.bytes / 1024:.0f} KB, encode {result.encode_seconds * 1000:.0f} ms, write {result.write_seconds * 1000:.0f} ms)")
+            if not done.done():
+                done.set_result(output)
+
+        written.add_done_callback(on_written)
+        return done
+
+    def synthesize_deferred(
+        self,
+        req: d.TTSInput,
+        out_dir: Path
+    ) -> Future:
+        """
+        Generate speech and hand it to the audio writer without waiting for the file.
+        Returns a future of the TTSOutput (see write_take); failures settle it with TTSSynthesisError.
+        """
+        done: Future = Future()
+        try:
+            out_path: Path = self.allocate_output_path(req, out_dir)
+            emotion_params: ep.EmotionParams = req.emotion.params
+            cache_key = self.audio_cache_key(req)
+
+            if self.fetch_cached(cache_key, req, out_path):
+                print(f"IN synthesize(): audio cache hit, linked {str(out_path)}")
+                LINES.inc(result="cache_hit")
+                done.set_result(self.finalize_take(self.with_cached_seed(req, cache_key), out_path))
+                return done
+
+            req = self.with_seed(req)
+            with Timer(f"🔊 Synthesizing audio with voice: {req.speaker.name} emotion:{req.emotion.name}, exg:{emotion_params.exaggeration}, cfg:{emotion_params.cfg}, seed:{req.seed}", use_spinner=False):
+                wav = self.generate_audio(req)
+            return self.write_take(wav, req, out_path, cache_key)
+        except Exception as e:
+            LINES.inc(result="failed")
+            done.set_exception(synthesis_error(e))
+            return done
+
+    def render_take(
+        self,
+        req: d.TTSInput,
+        out_dir: Path
+    ) -> RenderedTake:
+        """
+        Generate speech and encode it in memory without writing a file or reserving a version, for clients
+        that only play the audio. A cached take is read from audio_cache_dir, next to media_root. keep_take() persists it.
+        """
+        try:
+            cache_key = self.audio_cache_key(req)
+            cached = self.audio_cache.read(cache_key) if cache_key is not None and not req.bypass_cache else None
+            if cached is not None:
+                LINES.inc(result="cache_hit")
+                return RenderedTake(self.with_cached_seed(req, cache_key), out_dir, cached, self.audio_writer.audio_format, cache_key)
+
+            req = self.with_seed(req)
+            emotion_params: ep.EmotionParams = req.emotion.params
+            with Timer(f"🔊 Rendering audio with voice: {req.speaker.name} emotion:{req.emotion.name}, exg:{emotion_params.exaggeration}, cfg:{emotion_params.cfg}, seed:{req.seed}", use_spinner=False):
+                wav = self.generate_audio(req)
+            with stage("encode"):
+                audio = encode_audio(wav, self.sample_rate, self.audio_writer.audio_format)
+            del wav
+        except Exception as e:
+            LINES.inc(result="failed")
+            raise synthesis_error(e)
+        LINES.inc(result="rendered")
+        return RenderedTake(req, out_dir, audio, self.audio_writer.audio_format, cache_key)
+
+    def keep_take(self, take: RenderedTake) -> Future:
+        """
+        Persist an in-memory take as the next version of its dialogue: the encoded bytes go to the audio
+        writer as they are, then the take is cached and recorded like a synthesized one. Future of the TTSOutput.
+        """
+        if take.audio_format != self.audio_writer.audio_format:
+            return failed_future(ex.TTSInputError(f"Take is {take.audio_format}, takes are stored as {self.audio_writer.audio_format}"))
+        try:
+            out_path = self.allocate_output_path(take.req, take.out_dir)
+        except Exception as e:
+            return failed_future(synthesis_error(e))
+        written = self.audio_writer.submit_encoded(take.audio, out_path)
+        return self._finish_write(written, take.req, out_path, take.cache_key, "kept")
+
+    def synthesize(
+        self,
+        req: d.TTSInput,
+        out_dir: Path
+    ) -> TTSOutput:
+        """
+        Generate speech from text with this engine.
+        Returns path to generated audio file.
+        """
+        return self.synthesize_deferred(req, out_dir).result()
+
+    def synthesize_stream(
+        self,
+        req: d.TTSInput,
+        out_dir: Path
+    ) -> Iterator[torch.Tensor]:
+        """
+        Yield audio chunks as they are synthesized, then hand the joined take to the writer like synthesize() does.
+        Nothing is saved if the consumer stops early.
+        """
+        out_path: Path = self.allocate_output_path(req, out_dir)
+        cache_key = self.audio_cache_key(req)
+        if self.fetch_cached(cache_key, req, out_path):
+            LINES.inc(result="cache_hit")
+            self.finalize_take(self.with_cached_seed(req, cache_key), out_path)
+            wav, _ = ta.load(str(out_path))
+            yield wav
+            return
+
+        req = self.with_seed(req)
+        parts: list[torch.Tensor] = []
+        for chunk in self.stream_audio(req):
+            parts.append(chunk)
+            yield chunk
+        wav = torch.cat(parts, dim=-1)
+        parts.clear()
+        # The client already has the audio, so the file is not waited for
+        self.write_take(wav, req, out_path, cache_key)
+        del wav
+
+    def synthesize_batch(
+        self,
+        items: list[tuple[d.TTSInput, Path]]
+    ) -> list[TTSOutput | Exception | Future]:
+        """
+        Synthesize many resolved requests, grouped by speaker conditionals.
+        Returns one entry per item, in input order: a TTSOutput for cache hits, an exception, or a
+        future from write_take for synthesized lines, so writing overlaps the next group's inference.
+        """
+        results: list[TTSOutput | Exception | Future | None] = [None] * len(items)
+        groups: dict[tuple, list[tuple[int, d.TTSInput, Path, str | None]]] = {}
+
+        for i, (req, out_dir) in enumerate(items):
+            try:
+                cache_key = self.audio_cache_key(req)
+                if cache_key is not None and not req.bypass_cache and cache_key in self.audio_cache:
+                    out_path = self.allocate_output_path(req, out_dir)
+                    if self.fetch_cached(cache_key, req, out_path):
+                        results[i] = self.finalize_take(self.with_cached_seed(req, cache_key), out_path)
+                        LINES.inc(result="cache_hit")
+                        continue
+            except Exception as e:
+                results[i] = synthesis_error(e)
+                continue
+            group_key = (req.speaker.wav_file, req.emotion.params.exaggeration)
+            groups.setdefault(group_key, []).append((i, req, out_dir, cache_key))
+
+        for (wav_file, exaggeration), group in groups.items():
+            # Repeated lines ("Huh?" from several bubbles) are generated once and written once per bubble
+            unique: dict[tuple, d.TTSInput] = {}
+            for _, req, _, _ in group:
+                unique.setdefault(dedupe_key(req), self.with_seed(req))
+            with Timer(f"🔊 Synthesizing batch of {len(unique)} ({len(group)} lines) with voice: {wav_file}, exg:{exaggeration}", use_spinner=False):
+                try:
+                    wavs = dict(zip(unique, self.generate_batch(list(unique.values()))))
+                except Exception as e:
+                    for i, _, _, _ in group:
+                        results[i] = synthesis_error(e)
+                    continue
+            for i, req, out_dir, cache_key in group:
+                key = dedupe_key(req)
+                wav = wavs[key]
+                req = req.model_copy(update={"seed": unique[key].seed})
+                try:
+                    # Reserved only once there is audio, so a failed line leaves no gap in the versions
+                    out_path = self.allocate_output_path(req, out_dir)
+                    results[i] = self.write_take(wav, req, out_path, cache_key)
+                except Exception as e:
+                    results[i] = synthesis_error(e)
+        LINES.inc(sum(isinstance(r, Exception) for r in results), result="failed")
+        return results
+
+    def synthesize_variants(
+        self,
+        req: d.TTSInput,
+        out_dir: Path
+    ) -> list[Future]:
+        """
+        Generate req.num_variants takes of one line with consecutive seeds from req.seed (random when unset),
+        in one hold of the model so the conditionals are computed once and shared by every take.
+        Their versions are reserved as one block. Returns a future of the TTSOutput per take, in seed order.
+        """
+        base_seed = req.seed if req.seed is not None else random_seed()
+        takes = [
+            req.model_copy(update={"seed": base_seed + i, "num_variants": 1})
+            for i in range(req.num_variants)
+        ]
+        results: list[Future] = []
+        try:
+            out_paths = self.allocate_output_paths(req, out_dir, len(takes))
+        except Exception as e:
+            LINES.inc(len(takes), result="failed")
+            return [failed_future(synthesis_error(e)) for _ in takes]
+
+        emotion_params: ep.EmotionParams = req.emotion.params
+        with Timer(f"🔊 Synthesizing {len(takes)} variants with voice: {req.speaker.name} emotion:{req.emotion.name}, exg:{emotion_params.exaggeration}, cfg:{emotion_params.cfg}, seeds:{base_seed}..{base_seed + len(takes) - 1}", use_spinner=False):
+            with self._model_lock:
+                for take, out_path in zip(takes, out_paths):
+                    try:
+                        # Takes of an unseeded request are meant to differ, so only explicit seeds are cached
+                        cache_key = self.audio_cache_key(take) if req.seed is not None else None
+                        if self.fetch_cached(cache_key, take, out_path):
+                            LINES.inc(result="cache_hit")
+                            done: Future = Future()
+                            done.set_result(self.finalize_take(take, out_path))
+                            results.append(done)
+                            continue
+                        # A banked line would give every variant the same audio under a different seed
+                        wav = self.generate_audio(take, use_phrase_bank=False)
+                        results.append(self.write_take(wav, take, out_path, cache_key))
+                    except Exception as e:
+                        LINES.inc(result="failed")
+                        results.append(failed_future(synthesis_error(e)))
+        return results
@@ -1,65 +1,179 @@
 from pathlib import Path
+from typing import Iterable
 import torch
-import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
-from app.utils import ensure_folder, Timer, get_next_version
+from chatterbox.tts import ChatterboxTTS, REPO_ID
+from app.utils import ensure_folder, STARTUP
 from app.models.domain import (
-    domain as d,
     emotion_params as ep,
-    exceptions as ex
+    speaker as s
 )
-from app.models.api import TTSOutput
-from app.config import TTSConfig
+from app.backends.base import TTSBackend
+from app.backends.conditionals_cache import ConditionalsCache, conditionals_key
+from app.backends.precision import effective_precision, generation_context, module_bytes, prepare_model
+from app.backends.voice_store import load_conditionals
+from app.services.voice_registry import VoiceRegistry
+from app.services.metrics import CACHE_LOOKUPS, METRICS, stage
 
-class ChatterboxTTSBackend:
-    def __init__(self, config: TTSConfig):
-        self.config = config
+# Files ChatterboxTTS.from_local expects in a checkpoint folder
+SNAPSHOT_FILES = ("ve.safetensors", "t3_cfg.safetensors", "s3gen.safetensors", "tokenizer.json", "conds.pt")
+
+def save_snapshot(snapshot_dir: Path):
+    """
+    Copy the hub checkpoint files into snapshot_dir for later from_local() boots.
+    """
+    from huggingface_hub import hf_hub_download
+
+    ensure_folder(snapshot_dir)
+    for filename in SNAPSHOT_FILES:
+        hf_hub_download(repo_id=REPO_ID, filename=filename, local_dir=snapshot_dir)
+    print(f"🧠 Saved Chatterbox snapshot to: {snapshot_dir}")
+
+class ChatterboxTTSBackend(TTSBackend):
+    name: str = "chatterbox"
+    model_id: str = REPO_ID
+    device: str = "cpu"
+    # fp32, bf16 or int8 as actually applied (see inference_precision in config.yaml)
+    precision: str = "fp32"
+
+    def _load(self):
         self.model = self._load_model()
+        self.conditionals_cache = ConditionalsCache(self.config.conditionals_cache_size)
+        self.voice_registry = (
+            VoiceRegistry(self.config.voice_store_dir, self.config.voice_ref_dir, self.config.speaker_map)
+            if self.config.voice_store_enabled else None
+        )
+        self.voice_store_loads = 0
+
+    def _register_metrics(self):
+        super()._register_metrics()
+        CACHE_LOOKUPS.set_function(lambda: self.conditionals_cache.stats()["hits"], cache="conditionals", result="hit")
+        CACHE_LOOKUPS.set_function(lambda: self.conditionals_cache.stats()["misses"], cache="conditionals", result="miss")
 
     def _load_model(self):
         device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"🧠 Loading Chatterbox model on: {device}")
-        return ChatterboxTTS.from_pretrained(device=device)
+        with STARTUP.phase("weights", "🧠 Load Chatterbox weights"):
+            model = self._load_weights()
+        with STARTUP.phase("device", f"🧠 Move model to {device}"):
+            model = self._move_to_device(model, device)
+        self.device = device
+        self.precision = effective_precision(self.config.inference_precision, device)
+        if self.precision != "fp32":
+            # Reduced precision changes the audio, so its takes must not share cache or phrase bank entries with fp32
+            self.model_id = f"{REPO_ID}@{self.precision}"
+        compile_modules = self.config.torch_compile_modules if self.config.torch_compile else []
+        with STARTUP.phase("precision", f"🧠 Prepare {self.precision} inference"):
+            model = prepare_model(
+                model,
+                self.precision,
+                quantize_modules=self.config.quantize_modules,
+                compile_modules=compile_modules,
+                compile_mode=self.config.torch_compile_mode
+            )
+        footprint = self.model_bytes(model)
+        METRICS.gauge("tts_model_bytes", "Bytes of model weights and buffers, by precision", ["precision"]).set(footprint, precision=self.precision)
+        print(f"🧠 Chatterbox {self.precision} weights: {footprint / 1024 / 1024:.0f} MB")
+        return model
+
+    def model_bytes(self, model: ChatterboxTTS | None = None) -> int:
+        model = model or self.model
+        return sum(module_bytes(getattr(model, name)) for name in ("t3", "s3gen", "ve"))
+
+    def _generation_context(self):
+        return generation_context(self.precision, self.device, self.config.torch_inference_mode)
+
+    def _load_weights(self) -> ChatterboxTTS:
+        """
+        Load weights on CPU, from the local snapshot when one exists so boot needs no hub lookup.
+        """
+        snapshot_dir = self.config.model_snapshot_dir
+        if snapshot_dir and all((snapshot_dir / f).is_file() for f in SNAPSHOT_FILES):
+            print(f"🧠 Loading Chatterbox from local snapshot: {snapshot_dir}")
+            return ChatterboxTTS.from_local(snapshot_dir, "cpu")
 
-    def synthesize(
+        model = ChatterboxTTS.from_pretrained(device="cpu")
+        if snapshot_dir:
+            save_snapshot(snapshot_dir)
+        return model
+
+    def _move_to_device(self, model: ChatterboxTTS, device: str) -> ChatterboxTTS:
+        if device == "cpu":
+            return model
+        model.t3.to(device)
+        model.s3gen.to(device)
+        model.ve.to(device)
+        if model.conds is not None:
+            model.conds = model.conds.to(device)
+        model.device = device
+        return model
+
+    def _get_conditionals(self, wav_path: Path, exaggeration: float):
+        """
+        Return the prepared conditionals for a voice ref. On a cache miss they are loaded from the
+        voice store when it holds a fresh entry, otherwise the wav is embedded.
+        Must be called with the model lock held, since prepare_conditionals writes model.conds.
+        """
+        def compute():
+            stored = (
+                self.voice_registry.stored_conditionals(wav_path.name, self.model_id)
+                if self.voice_registry is not None else None
+            )
+            if stored is not None:
+                with stage("conditioning_load"):
+                    self.voice_store_loads += 1
+                    return load_conditionals(stored, exaggeration, self.device)
+            with stage("conditioning"), self._generation_context():
+                self.model.prepare_conditionals(str(wav_path), exaggeration=exaggeration)
+            return self.model.conds
+
+        return self.conditionals_cache.get_or_compute(
+            conditionals_key(wav_path, exaggeration),
+            compute
+        )
+
+    def warm_up(
         self,
-        req: d.TTSInput,
-        out_dir: Path
-    ) -> TTSOutput:
+        speakers: Iterable[s.Speaker],
+        exaggerations: Iterable[float]
+    ) -> int:
         """
-        Generate speech from text using ChatterboxTTS.
-        Returns path to generated .wav file.
+        Precompute conditionals for every (speaker, exaggeration) pair so the first line per voice is not slow.
+        Speakers are warmed in the order given and only up to the conditionals cache capacity, since entries past
+        it would evict the ones warmed first. Returns the number of entries prepared; missing voice ref files are skipped.
         """
-        
-        # For normal batch generation using run_id ie when input comes through the api endpoint
-        try:
+        exaggerations = sorted(set(exaggerations))
+        prepared = 0
+        for wav_path in dict.fromkeys(self._voice_ref_path(speaker) for speaker in speakers):
+            if not wav_path.is_file():
+                print(f"⚠️ Skipping warm-up, voice ref not found: {wav_path}")
+                continue
+            if prepared + len(exaggerations) > self.conditionals_cache.max_entries:
+                print(f"⚠️ Stopping warm-up at {prepared} conditionals, the cache holds {self.conditionals_cache.max_entries}")
+                break
+            for exaggeration in exaggerations:
+                with self._model_lock:
+                    self._get_conditionals(wav_path, exaggeration)
+                prepared += 1
+        return prepared
 
-            dialogue_subfolder: Path = (
-                out_dir / f"dialogue__{req.dialogue_id}"
-            ).resolve()
-            dialogue_subfolder = ensure_folder(dialogue_subfolder)
+    def cache_stats(self) -> dict[str, int | float]:
+        return {**self.conditionals_cache.stats(), "voice_store_loads": self.voice_store_loads}
 
-            version: int = get_next_version(dialogue_subfolder)
-            emotion_params: ep.EmotionParams = req.emotion.params
-            filename: str = f"v{version}__exg{emotion_params.exaggeration}__cfg{emotion_params.cfg}.wav"
-            out_path: Path = dialogue_subfolder / filename
+    @property
+    def sample_rate(self) -> int:
+        return self.model.sr
 
-            with Timer(f"🔊 Synthesizing audio with voice: {req.speaker.name} emotion:{req.emotion.name}, exg:{emotion_params.exaggeration}, cfg:{emotion_params.cfg}", use_spinner=False):
+    def _generate_chunk(self, text: str, speaker: s.Speaker, emotion_params: ep.EmotionParams) -> torch.Tensor:
+        with self._model_lock:
+            self.model.conds = self._get_conditionals(
+                self._voice_ref_path(speaker),
+                emotion_params.exaggeration
+            )
+            with stage("inference"), self._generation_context():
                 wav = self.model.generate(
-                    req.text,
-                    audio_prompt_path=str(Path(self.config.voice_ref_dir)/req.speaker.wav_file),
+                    text,
                     exaggeration=emotion_params.exaggeration,
                     cfg_weight=emotion_params.cfg
                 )
-                ta.save(str(out_path), wav, self.model.sr)
-                print(f"IN synthesize(): saved wav file at {str(out_path)}")
-
-            return TTSOutput(
-                ttsInput=req,
-                audio_ref=d.MediaRef(
-                    namespace=d.MediaNamespace.OUTPUTS,
-                    path=(out_path.relative_to(Path(self.config.media_root)/self.config.media_namespace)).as_posix()
-                )
-            )
-        except Exception as e:
-            raise ex.TTSSynthesisError from e
+            # Autocast may hand back bf16; everything downstream expects float32
+            return wav.float()
@@ -0,0 +1,72 @@
+# backends/conditionals_cache.py
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+# (voice ref wav file, file mtime, exaggeration)
+ConditionalsKey = tuple[str, float, float]
+
+
+def conditionals_key(wav_path: Path, exaggeration: float) -> ConditionalsKey:
+    """
+    Build the cache key for a voice ref file. The mtime is part of the key so an
+    edited reference wav is re-encoded instead of served stale.
+    """
+    return (str(wav_path), wav_path.stat().st_mtime, float(exaggeration))
+
+
+class ConditionalsCache:
+    """
+    Bounded LRU of prepared speaker conditionals, shared across lines so each
+    reference wav is embedded once per (file, mtime, exaggeration).
+    """
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "capacity": self.max_entries,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,97 @@
+# backends/precision.py
+import contextlib
+from typing import Iterable, Iterator
+import torch
+from torch import nn
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def bf16_supported(device: str) -> bool:
+    """
+    Whether bf16 autocast runs natively here. On CPU that needs AVX512-BF16/AMX; elsewhere
+    autocast still works but is emulated and slower than fp32.
+    """
+    if device == "cuda":
+        return torch.cuda.is_bf16_supported()
+    check = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    return bool(check and check())
+
+
+def effective_precision(precision: str, device: str) -> str:
+    """
+    The precision a model will actually run at: int8 dynamic quantization is CPU-only and bf16
+    needs hardware support, otherwise it falls back to fp32 with a warning.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown inference_precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+    if precision == "int8" and device != "cpu":
+        print(f"⚠️ int8 dynamic quantization is CPU-only, running fp32 on {device}")
+        return "fp32"
+    if precision == "bf16" and not bf16_supported(device):
+        print(f"⚠️ bf16 is not supported natively on this {device}, running fp32")
+        return "fp32"
+    return precision
+
+
+def quantize_int8(module: nn.Module) -> nn.Module:
+    """
+    Dynamic int8 quantization of the Linear layers: weights stored as int8, activations
+    quantized per batch at run time. Most of the transformer's time and memory is in these.
+    """
+    return torch.ao.quantization.quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def compile_module(module: nn.Module, mode: str):
+    """
+    torch.compile a submodule in place; the first calls pay for the compilation.
+    """
+    module.compile(mode=mode)
+
+
+def prepare_model(
+    model,
+    precision: str,
+    quantize_modules: Iterable[str],
+    compile_modules: Iterable[str],
+    compile_mode: str
+):
+    """
+    Apply int8 quantization and torch.compile to the named submodules of a loaded model.
+    bf16 needs no weight changes: it is applied per call by generation_context().
+    """
+    if precision == "int8":
+        for name in quantize_modules:
+            setattr(model, name, quantize_int8(getattr(model, name)))
+    for name in compile_modules:
+        compile_module(getattr(model, name), compile_mode)
+    return model
+
+
+@contextlib.contextmanager
+def generation_context(precision: str, device: str, inference_mode: bool) -> Iterator[None]:
+    """
+    Wrap a model call in torch.inference_mode (no autograd bookkeeping) and bf16 autocast.
+    """
+    with contextlib.ExitStack() as stack:
+        if inference_mode:
+            stack.enter_context(torch.inference_mode())
+        if precision == "bf16":
+            stack.enter_context(torch.autocast(device_type=device, dtype=torch.bfloat16))
+        yield
+
+
+def _tensor_bytes(value) -> int:
+    if isinstance(value, torch.Tensor):
+        return value.element_size() * value.nelement()
+    if isinstance(value, (tuple, list)):
+        # Quantized Linear layers keep (int8 weight, bias) as packed params
+        return sum(_tensor_bytes(v) for v in value)
+    return 0
+
+
+def module_bytes(module: nn.Module) -> int:
+    """
+    Bytes held by a module's weights and buffers, counting int8 packed weights at one byte each.
+    """
+    return sum(_tensor_bytes(value) for value in module.state_dict().values())
@@ -0,0 +1,80 @@
+# backends/registry.py
+import importlib
+from typing import TYPE_CHECKING, Optional
+from app.config import TTSConfig
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.utils import Timer, log_exception
+
+if TYPE_CHECKING:
+    from app.backends.base import BackendServices, TTSBackend
+
+# Engine name -> "module:Class". Imported on first use, so an engine's dependencies are only
+# needed when config.yaml enables it
+BACKENDS: dict[str, str] = {
+    "chatterbox": "app.backends.chatterbox_backend:ChatterboxTTSBackend",
+    "espeak": "app.backends.espeak_backend:EspeakTTSBackend",
+}
+
+
+def register_backend(name: str, target: str):
+    """
+    Make an engine selectable by name, e.g. register_backend("piper", "my_pkg.piper:PiperBackend").
+    """
+    BACKENDS[name] = target
+
+
+def backend_class(name: str) -> type["TTSBackend"]:
+    if name not in BACKENDS:
+        raise ex.EnvError(f"Unknown TTS engine: {name} (known: {', '.join(sorted(BACKENDS))})")
+    module_name, class_name = BACKENDS[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_backends(config: TTSConfig, services: Optional["BackendServices"] = None) -> dict[str, "TTSBackend"]:
+    """
+    Load every engine listed in config.engines, sharing one set of output services.
+    The default engine must load; the others are optional and skipped with a logged error.
+    """
+    from app.backends.base import BackendServices
+
+    services = services or BackendServices.create(config)
+    names = [config.default_engine] + [name for name in config.engines if name != config.default_engine]
+    backends: dict[str, "TTSBackend"] = {}
+    for name in names:
+        try:
+            with Timer(f"🔊 Load TTS engine: {name}"):
+                backends[name] = backend_class(name)(config, services)
+        except Exception:
+            if name == config.default_engine:
+                services.close()
+                raise
+            log_exception(f"Optional TTS engine {name} failed to load, requests for it go to {config.default_engine}")
+    return backends
+
+
+def select_engine(
+    req: d.TTSInput,
+    default_engine: str,
+    preview_engine: str,
+    available: "dict[str, object]",
+    overloaded: bool = False
+) -> tuple[str, str]:
+    """
+    Routing policy. Returns (engine, reason):
+    an explicit req.engine wins; quality "draft" goes to the preview engine; "final" always goes to
+    the default engine; "auto" goes to the default engine unless it is overloaded.
+    Without a loaded preview engine everything falls back to the default one.
+    """
+    if req.engine:
+        if req.engine not in available:
+            raise ex.TTSInputError(f"TTS engine not available: {req.engine}")
+        return req.engine, "explicit"
+    preview = preview_engine if preview_engine in available else default_engine
+    if req.quality == "draft":
+        return preview, "draft"
+    if req.quality == "auto" and overloaded:
+        return preview, "overload"
+    return default_engine, req.quality
@@ -0,0 +1,64 @@
+# backends/voice_store.py
+import dataclasses
+import hashlib
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+import torch
+from chatterbox.tts import Conditionals
+from chatterbox.models.t3.modules.cond_enc import T3Cond
+from app.services.voice_registry import VoiceRegistry
+from app.utils import ensure_folder
+
+if TYPE_CHECKING:
+    from app.backends.chatterbox_backend import ChatterboxTTSBackend
+
+# Conditionals are stored once per voice; exaggeration only sets T3Cond.emotion_adv and is applied on load
+STORE_EXAGGERATION = 0.5
+
+
+def save_conditionals(conds: Conditionals, path: Path):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    conds.save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_conditionals(path: Path, exaggeration: float, device: str) -> Conditionals:
+    """
+    Load stored conditionals memory-mapped (pages are read on first use, and shared between
+    worker processes through the page cache) and set them to the requested exaggeration.
+    """
+    data = torch.load(path, map_location="cpu", weights_only=True, mmap=True)
+    t3 = T3Cond(**data["t3"])
+    t3 = dataclasses.replace(t3, emotion_adv=exaggeration * torch.ones(1, 1, 1))
+    return Conditionals(t3, data["gen"]).to(device)
+
+
+def build_voice_store(backend: "ChatterboxTTSBackend", registry: VoiceRegistry, force: bool = False) -> tuple[int, int]:
+    """
+    Compute the conditionals of every voice under voice_ref_dir into the store and rewrite its index.
+    Voices whose stored entry is still fresh are kept unless force. Returns (computed, kept).
+    """
+    ensure_folder(registry.store_dir)
+    same_model = registry.model_id == backend.model_id
+    computed = kept = 0
+    voices = registry.scan()
+    for voice in voices:
+        previous = registry.get(voice.wav_file)
+        if (
+            not force and same_model and previous is not None and previous.conds_file
+            and previous.sha256 == voice.sha256 and (registry.store_dir / previous.conds_file).is_file()
+        ):
+            voice.conds_file = previous.conds_file
+            kept += 1
+            continue
+        with backend._model_lock:
+            backend.model.prepare_conditionals(str(registry.voice_ref_dir / voice.wav_file), exaggeration=STORE_EXAGGERATION)
+            conds = backend.model.conds
+        # Content-addressed, so a rebuilt voice never overwrites a file another process has mapped
+        voice.conds_file = f"{Path(voice.wav_file).stem}.{voice.sha256[:12]}.{hashlib.sha1(backend.model_id.encode()).hexdigest()[:8]}.pt"
+        save_conditionals(conds, registry.store_dir / voice.conds_file)
+        computed += 1
+        print(f"🎙️ Stored conditionals for {voice.gender}/{voice.name}: {voice.conds_file}")
+    registry.write_index(voices, backend.model_id)
+    return computed, kept
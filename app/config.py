@@ -17,6 +17,70 @@ class TTSConfig:
             self.default_cfg = self.config.get("default_cfg", 0.5)
             self.default_exaggeration = self.config.get("default_exaggeration", 0.5)
             self.use_timestamped_output = self.config.get("use_timestamped_output", True)
+            snapshot_dir = self.config.get("model_snapshot_dir")
+            self.model_snapshot_dir = (self.root / snapshot_dir) if snapshot_dir else None
+            self.conditionals_cache_size = int(self.config.get("conditionals_cache_size", 64))
+            self.batch_queue_depth = int(self.config.get("batch_queue_depth", 4))
+            self.batch_writer_threads = int(self.config.get("batch_writer_threads", 2))
+            self.inference_queue_depth = int(self.config.get("inference_queue_depth", 16))
+            self.inference_timeout_s = float(self.config.get("inference_timeout_s", 300))
+            self.inference_queue_full_status = int(self.config.get("inference_queue_full_status", 503))
+            self.inference_mode = self.config.get("inference_mode", "thread")
+            self.pool_workers = int(self.config.get("pool_workers", 2))
+            self.pool_threads_per_worker = int(self.config.get("pool_threads_per_worker", 0))
+            self.pool_max_inflight_per_worker = int(self.config.get("pool_max_inflight_per_worker", 1))
+            self.pool_ready_timeout_s = float(self.config.get("pool_ready_timeout_s", 600))
+            self.inference_max_batch_size = int(self.config.get("inference_max_batch_size", 8))
+            self.inference_max_batch_wait_ms = float(self.config.get("inference_max_batch_wait_ms", 20))
+            self.state_dir = self.root / self.config.get("state_dir", ".state")
+            self.version_index_path = Path(self.config.get("version_index_path") or self.state_dir / "versions.sqlite3")
+            self.job_max_inflight = int(self.config.get("job_max_inflight", 2))
+            self.scheduler_aging_s = float(self.config.get("scheduler_aging_s", 10))
+            self.scheduler_run_weights = {str(k): float(v) for k, v in (self.config.get("scheduler_run_weights") or {}).items()}
+            self.scheduler_interactive_reserve = int(self.config.get("scheduler_interactive_reserve", 2))
+            self.prefetch_enabled = bool(self.config.get("prefetch_enabled", True))
+            self.prefetch_ahead = int(self.config.get("prefetch_ahead", 24))
+            self.prefetch_max_queued = int(self.config.get("prefetch_max_queued", 1))
+            self.prefetch_max_runs = int(self.config.get("prefetch_max_runs", 4))
+            self.memory_budget_mb = int(self.config.get("memory_budget_mb", 0))
+            self.memory_chars_per_second = float(self.config.get("memory_chars_per_second", 14))
+            self.memory_request_overhead_mb = int(self.config.get("memory_request_overhead_mb", 32))
+            self.memory_trim_interval_s = float(self.config.get("memory_trim_interval_s", 30))
+            self.take_store_max_mb = int(self.config.get("take_store_max_mb", 256))
+            self.take_store_ttl_s = float(self.config.get("take_store_ttl_s", 900))
+            self.audio_cache_enabled = bool(self.config.get("audio_cache_enabled", True))
+            self.audio_cache_dir = Path(self.config.get("audio_cache_dir") or Path(self.media_root or self.root) / ".tts_cache")
+            self.audio_cache_max_mb = int(self.config.get("audio_cache_max_mb", 4096))
+            self.segment_max_chars = int(self.config.get("segment_max_chars", 280))
+            self.segment_crossfade_ms = int(self.config.get("segment_crossfade_ms", 40))
+            self.segment_paragraph_pause_ms = int(self.config.get("segment_paragraph_pause_ms", 350))
+            self.audio_format = self.config.get("audio_format", "wav")
+            self.audio_write_mode = self.config.get("audio_write_mode", "durable")
+            self.audio_writer_threads = int(self.config.get("audio_writer_threads", 2))
+            self.audio_writer_queue_depth = int(self.config.get("audio_writer_queue_depth", 16))
+            self.audio_write_tmp_dir = Path(self.config.get("audio_write_tmp_dir") or self.state_dir / "tmp")
+            self.text_normalization = bool(self.config.get("text_normalization", True))
+            self.phrase_bank_enabled = bool(self.config.get("phrase_bank_enabled", True))
+            self.phrase_bank_dir = self.root / self.config.get("phrase_bank_dir", "phrase_bank")
+            self.default_engine = self.config.get("default_engine", "chatterbox")
+            self.preview_engine = self.config.get("preview_engine", "espeak")
+            self.engines = list(self.config.get("engines") or [self.default_engine])
+            self.engine_overload_queue_depth = int(self.config.get("engine_overload_queue_depth", 0))
+            self.espeak_binary = self.config.get("espeak_binary", "espeak-ng")
+            self.espeak_voices = dict(self.config.get("espeak_voices") or {"female": "en-us+f3", "male": "en-us+m3", "unknown": "en-us"})
+            self.espeak_words_per_minute = int(self.config.get("espeak_words_per_minute", 175))
+            self.max_variants = int(self.config.get("max_variants", 8))
+            self.inference_precision = self.config.get("inference_precision", "fp32")
+            self.quantize_modules = list(self.config.get("quantize_modules") or ["t3"])
+            self.torch_inference_mode = bool(self.config.get("torch_inference_mode", True))
+            self.torch_compile = bool(self.config.get("torch_compile", False))
+            self.torch_compile_mode = self.config.get("torch_compile_mode", "default")
+            self.torch_compile_modules = list(self.config.get("torch_compile_modules") or ["t3"])
+            self.voice_store_enabled = bool(self.config.get("voice_store_enabled", True))
+            self.voice_store_dir = self.root / self.config.get("voice_store_dir", "voice_store")
+            self.chapter_line_gap_ms = int(self.config.get("chapter_line_gap_ms", 250))
+            self.chapter_page_gap_ms = int(self.config.get("chapter_page_gap_ms", 800))
+            self.chapter_assembly_after_batch = bool(self.config.get("chapter_assembly_after_batch", True))
 
             # speaker & emotion maps
             self.speaker_map = self._load_yaml(self.root / "app" / "data_maps" / "speaker_map.yaml")
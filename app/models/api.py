@@ -1,16 +1,81 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Optional, Literal
 from app.models.domain.domain import TTSInput
 from app.models.domain.emotion import Emotion
 from mn_contracts.ocr import MediaRef
 
+class TTSVariant(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    audio_ref: MediaRef
+    seed: Optional[int] = None
+
 class TTSOutput(BaseModel):
     model_config = ConfigDict(frozen=True)
 
     ttsInput: TTSInput
-    audio_ref: MediaRef
+    # None for an in-memory take (delivery audio/multipart) until it is kept
+    audio_ref: Optional[MediaRef] = None
+    # Seed the take was generated with; same input + seed reproduces it
+    seed: Optional[int] = None
+    # In-memory take: POST /tts/takes/{take_id}/keep persists it while the server still holds it
+    take_id: Optional[str] = None
+    # Every take of a num_variants request, in version order (audio_ref is the first)
+    variants: list[TTSVariant] = []
+    # Echo of the request's X-Trace-Id (or a generated one), to find its stage timings in the logs
+    trace_id: Optional[str] = None
+
+class TTSDialogueResult(BaseModel):
+    """
+    One NDJSON line of POST /tts/dialogues, sent as soon as that line finishes.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    # Position of the line in the request body
+    index: int
+    dialogue_id: int
+    status: Literal["ok", "error"]
+    output: Optional[TTSOutput] = None
+    error: Optional[str] = None
+    message: Optional[str] = None
 
 class EmotionOptionsOutput(BaseModel):
     model_config = ConfigDict(frozen=True)
 
-    emotionOptions: list[Emotion]
\ No newline at end of file
+    emotionOptions: list[Emotion]
+
+JobStatus = Literal["queued", "running", "done", "failed", "cancelled"]
+
+class TTSJobInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    job_id: str
+    batch_id: Optional[str] = None
+    status: JobStatus
+    progress: float
+    created_at: float
+    updated_at: float
+    error: Optional[str] = None
+    result: Optional[TTSOutput] = None
+
+class TTSJobSubmitted(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    job_id: str
+    status: JobStatus
+
+class TTSJobBatchSubmitted(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    batch_id: str
+    job_ids: list[str]
+
+class TTSJobBatchInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    batch_id: str
+    total: int
+    done: int
+    failed: int
+    progress: float
+    jobs: list[TTSJobInfo]
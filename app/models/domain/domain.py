@@ -22,4 +22,15 @@ class TTSInput(BaseModel):
     run_id: str = ""
     custom_filename: str = ""
     dialogue_id: int = -1
+    bypass_cache: bool = False
+    # Engine to synthesize with (see config.yaml engines); empty lets quality decide.
+    # draft: preview engine, final: default engine, auto: default engine unless it is overloaded
+    engine: str = ""
+    quality: Literal["auto", "final", "draft"] = "auto"
+    # Fixed seed for a reproducible take; variant i of a fan-out uses seed + i.
+    # Without one a random seed is drawn and recorded with the take
+    seed: Optional[int] = Field(default=None, ge=0)
+    num_variants: int = Field(default=1, ge=1)
+    # Scheduling class; auto takes the endpoint's (interactive for /tts/dialogue, batch for bulk and jobs)
+    priority: Literal["auto", "interactive", "batch", "prewarm"] = "auto"
 
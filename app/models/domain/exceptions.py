@@ -7,4 +7,10 @@ class TTSInputError(Exception):
     pass
 
 class EnvError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class TTSQueueFullError(Exception):
+    pass
+
+class TTSTimeoutError(Exception):
+    pass
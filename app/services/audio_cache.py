@@ -0,0 +1,224 @@
+# services/audio_cache.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from app.models.domain import emotion_params as ep
+from app.utils import ensure_folder
+
+_HASH_CHUNK = 1 << 20
+# How often a cache that looks under budget re-reads sizes from disk, to see what other processes stored
+_RESCAN_INTERVAL_S = 60.0
+# path -> (mtime, size, sha256), see file_hash
+_file_hashes: dict[str, tuple[float, int, str]] = {}
+
+
+def normalize_cache_text(text: str) -> str:
+    """
+    Canonical form of a line for cache keys: OCR re-runs often differ only in whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def file_hash(path: Path) -> str:
+    """
+    sha256 of a file's content, memoized per (mtime, size) so voice refs are hashed once.
+    """
+    st = path.stat()
+    memo = _file_hashes.get(str(path))
+    if memo and memo[0] == st.st_mtime and memo[1] == st.st_size:
+        return memo[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            digest.update(chunk)
+    _file_hashes[str(path)] = (st.st_mtime, st.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def link_or_copy(src: Path, dest: Path):
+    """
+    Hardlink src to dest, falling back to a copy across volumes or on filesystems without links.
+    """
+    if dest.exists():
+        dest.unlink()
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+class AudioCache:
+    """
+    Content-addressed store of generated wavs with size-bounded LRU eviction.
+    Entries are looked up by a hash of everything that determines the audio, so a
+    re-processed chapter only synthesizes the lines whose inputs actually changed.
+    The seed an entry was generated with is kept next to it (see seed()), so a take linked
+    from the cache for an unseeded request can still record the seed that reproduces it.
+
+    Several processes (pool workers) may share cache_dir, each with its own index. The disk is the
+    source of truth: when a store finds the index over max_bytes, or its last scan is older than
+    _RESCAN_INTERVAL_S, the index is rebuilt from the files and their mtimes (fetch touches entries)
+    before evicting. So the processes evict in one LRU order, and the total overshoots max_bytes by at
+    most what the others stored since the last scan. An entry another process evicted is forgotten on
+    its next lookup.
+    """
+    def __init__(self, cache_dir: Path, max_bytes: int, suffix: str = ".wav"):
+        self.cache_dir = ensure_folder(Path(cache_dir))
+        # Entries are stored in the configured audio format, so linked takes keep a matching extension
+        self.suffix = suffix
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: OrderedDict[str, int] = OrderedDict()   # key -> size in bytes, oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _load_index(self):
+        # Rebuild recency from mtimes; fetch() touches entries so this survives restarts
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._scanned_at = time.monotonic()
+        found = []
+        for path in self.cache_dir.glob(f"*/*{self.suffix}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                # Evicted by another process mid-scan
+                continue
+            found.append((st.st_mtime, path.stem, st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.suffix}"
+
+    def _seed_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.seed"
+
+    def seed(self, key: str) -> Optional[int]:
+        """
+        The seed the entry for key was generated with, None if it was stored without one.
+        """
+        try:
+            return int(self._seed_path(key).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def make_key(
+        self,
+        text: str,
+        voice_ref: Path,
+        params: ep.EmotionParams,
+        model_id: str,
+        seed: Optional[int] = None,
+        audio_format: str = "wav"
+    ) -> str:
+        payload = {
+            "text": normalize_cache_text(text),
+            "voice": file_hash(voice_ref),
+            "params": params.model_dump(mode="json"),
+            "model": model_id,
+            "seed": seed,
+            "format": audio_format,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """
+        Place the cached audio for key at dest. Returns False on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return False
+            src = self._path(key)
+            try:
+                link_or_copy(src, dest)
+                os.utime(src)
+            except FileNotFoundError:
+                # Removed behind our back; forget it and report a miss
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True
+
+    def read(self, key: str) -> Optional[bytes]:
+        """
+        The cached file for key, read into memory (in-memory takes). None on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                data = self._path(key).read_bytes()
+            except FileNotFoundError:
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def store(self, key: str, src: Path, seed: Optional[int] = None):
+        """
+        Add a generated file under key, replacing any previous take, then evict down to max_bytes.
+        """
+        dest = self._path(key)
+        ensure_folder(dest.parent)
+        with self._lock:
+            link_or_copy(src, dest)
+            if seed is not None:
+                self._seed_path(key).write_text(str(seed))
+            else:
+                self._seed_path(key).unlink(missing_ok=True)
+            size = dest.stat().st_size
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self.stores += 1
+            if self._total_bytes > self.max_bytes or time.monotonic() - self._scanned_at > _RESCAN_INTERVAL_S:
+                # Count what other processes sharing cache_dir stored too
+                self._load_index()
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            self._seed_path(key).unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
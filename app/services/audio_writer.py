@@ -0,0 +1,228 @@
+# services/audio_writer.py
+import errno
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+from app.backends.audio_ops import AUDIO_FORMATS, encode_audio
+from app.services.metrics import AUDIO_BYTES, AUDIO_FILE_BYTES, CURRENT_TRACE, Trace, TraceGroup, stage, traced
+from app.utils import ensure_folder
+
+_COPY_CHUNK = 1 << 20
+
+
+def fsync_dir(path: Path):
+    """
+    Persist a rename in path. Best effort: Windows and some network filesystems can't open a directory.
+    """
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def move_atomic(src: Path, dest: Path):
+    """
+    Move src to dest so readers never see a partial file: a rename on the same volume, otherwise
+    a copy to a hidden name next to dest, fsynced, then renamed over it.
+    """
+    try:
+        os.replace(src, dest)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    # Hidden and not "v*", so version listings never pick up a half-copied take
+    part = dest.with_name(f".{dest.name}.part")
+    try:
+        with open(src, "rb") as fsrc, open(part, "wb") as fdst:
+            shutil.copyfileobj(fsrc, fdst, _COPY_CHUNK)
+            fdst.flush()
+            os.fsync(fdst.fileno())
+        os.replace(part, dest)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    src.unlink()
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    path: Path
+    bytes: int
+    encode_seconds: float
+    write_seconds: float
+
+
+@dataclass
+class WriteJob:
+    wav: Any
+    sample_rate: int
+    out_path: Path
+    future: Future
+    trace: Optional[Trace | TraceGroup] = None
+    # Already encoded file (a kept in-memory take); wav is None then
+    data: Optional[bytes] = None
+
+
+# Tells a writer thread to exit once everything queued before it is written
+_STOP = None
+
+
+class AudioWriter:
+    """
+    Encodes waveforms and writes them into media_root on a pool of threads, so the inference
+    thread hands a take off and moves on instead of waiting for the encoder and the share.
+
+    Each file is encoded in memory, written and fsynced to a local temp dir, then moved
+    atomically into place. The queue is bounded: when the disk falls behind, submit() blocks
+    and throttles inference instead of holding every pending waveform in memory.
+    """
+    def __init__(
+        self,
+        audio_format: str = "wav",
+        tmp_dir: Path = Path(".state") / "tmp",
+        threads: int = 2,
+        max_queue_depth: int = 16
+    ):
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"Unknown audio_format {audio_format!r}, expected one of {sorted(AUDIO_FORMATS)}")
+        self.audio_format = audio_format
+        self.suffix = AUDIO_FORMATS[audio_format][0]
+        self.tmp_dir = ensure_folder(Path(tmp_dir))
+        self.max_queue_depth = max(1, max_queue_depth)
+        self._queue: queue.Queue[WriteJob | None] = queue.Queue(maxsize=self.max_queue_depth)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"tts-audio-writer-{i}", daemon=True)
+            for i in range(max(1, threads))
+        ]
+        self._stats_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.bytes_total = 0
+        self.encode_seconds_total = 0.0
+        self.write_seconds_total = 0.0
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Finish every write already queued, then stop the threads.
+        """
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, wav: Any, sample_rate: int, out_path: Path) -> Future:
+        """
+        Queue a waveform for writing to out_path and return a future of its WriteResult.
+        The stage timings land in the caller's current trace.
+        """
+        job = WriteJob(wav, sample_rate, out_path, Future(), CURRENT_TRACE.get())
+        self._queue.put(job)
+        return job.future
+
+    def submit_encoded(self, data: bytes, out_path: Path) -> Future:
+        """
+        Queue an already encoded file (in audio_format) for writing to out_path; no re-encode.
+        """
+        job = WriteJob(None, 0, out_path, Future(), CURRENT_TRACE.get(), data=data)
+        self._queue.put(job)
+        return job.future
+
+    def write(self, wav: Any, sample_rate: int, out_path: Path) -> WriteResult:
+        """
+        Encode and write in the calling thread, for callers that already run off the inference thread.
+        """
+        start = time.perf_counter()
+        data = self.encode(wav, sample_rate)
+        return self.write_encoded(data, out_path, time.perf_counter() - start)
+
+    def encode(self, wav: Any, sample_rate: int) -> bytes:
+        with stage("encode"):
+            return encode_audio(wav, sample_rate, self.audio_format)
+
+    def write_encoded(self, data: bytes, out_path: Path, encode_seconds: float) -> WriteResult:
+        encoded = time.perf_counter()
+        with stage("write"):
+            tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}{self.suffix}"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                move_atomic(tmp_path, out_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            fsync_dir(out_path.parent)
+        result = WriteResult(out_path, len(data), encode_seconds, time.perf_counter() - encoded)
+
+        AUDIO_BYTES.inc(result.bytes)
+        AUDIO_FILE_BYTES.observe(result.bytes, format=self.audio_format)
+        with self._stats_lock:
+            self.written += 1
+            self.bytes_total += result.bytes
+            self.encode_seconds_total += result.encode_seconds
+            self.write_seconds_total += result.write_seconds
+        return result
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            try:
+                with traced(job.trace):
+                    start = time.perf_counter()
+                    data = job.data if job.data is not None else self.encode(job.wav, job.sample_rate)
+                    # The waveform is no longer needed once encoded; only the (much smaller) file bytes are written
+                    job.wav = job.data = None
+                    result = self.write_encoded(data, job.out_path, time.perf_counter() - start)
+                    del data
+            except Exception as e:
+                with self._stats_lock:
+                    self.failed += 1
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+            finally:
+                # Drop the waveform before blocking on the next job
+                del job
+
+    def stats(self) -> dict[str, int | float | str]:
+        with self._stats_lock:
+            written = self.written
+            return {
+                "format": self.audio_format,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "written": written,
+                "failed": self.failed,
+                "bytes_total": self.bytes_total,
+                "bytes_avg": (self.bytes_total / written) if written else 0.0,
+                "encode_ms_avg": (self.encode_seconds_total / written * 1000) if written else 0.0,
+                "write_ms_avg": (self.write_seconds_total / written * 1000) if written else 0.0,
+            }
@@ -0,0 +1,391 @@
+# services/batch_pipeline.py
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+from app.models.domain import domain as d
+from app.services.audio_cache import link_or_copy
+from app.services.ocr_reader import iter_ocr_pages
+from app.services.renarration import PreviousRun, load_manifest, UNCHANGED
+from app.services.text_normalizer import dedupe_key
+from app.utils import ensure_folder, log_exception, Timer
+
+if TYPE_CHECKING:
+    from app.tts_runner import TTSRunner
+
+MANIFEST_FILENAME = "manifest.json"
+
+# Marks the end of a stage's output on the queue feeding the next stage
+_DONE = object()
+
+
+@dataclass
+class ResolvedLine:
+    page_index: int
+    req: d.TTSInput
+    out_dir: Path
+    # unchanged / edited / new against the previous run when re-narrating, else None
+    change: Optional[str] = None
+
+
+@dataclass
+class SynthesizedLine:
+    line: ResolvedLine
+    wav: Any
+    synth_seconds: float
+    cache_key: str | None = None
+
+
+@dataclass
+class RunStats:
+    lines: int = 0
+    failed: int = 0
+    cache_hits: int = 0
+    deduped: int = 0
+    audio_seconds: float = 0.0
+    synth_seconds: float = 0.0
+    audio_bytes: int = 0
+    changes: dict[str, int] = field(default_factory=dict)
+    carried: int = 0
+    audio_seconds_carried: float = 0.0
+    synth_seconds_avoided: float = 0.0
+    entries: list[dict] = field(default_factory=list)
+
+
+def conditionals_group_key(req: d.TTSInput) -> tuple[str, float, float]:
+    """
+    Lines sharing this key reuse the same voice conditionals back to back.
+    """
+    params = req.emotion.params
+    return (req.speaker.wav_file, params.exaggeration, params.cfg)
+
+
+class BatchPipeline:
+    """
+    Narrate a whole OCR run with resolution, synthesis and wav writing running as overlapping stages.
+
+    resolve thread --(pages)--> synthesis (caller thread, owns the model) --(wavs)--> writer threads
+    Both queues are bounded so a slow disk throttles inference instead of buffering the chapter in memory.
+
+    Given a previous_run_id (an earlier narration of the same chapter from another OCR run), the run is
+    incremental: lines that match a take of the previous run (see PreviousRun) get that take hard-linked
+    in the resolve stage, and only new or edited lines reach the model.
+    """
+    def __init__(
+        self,
+        runner: "TTSRunner",
+        queue_depth: int = 4,
+        writer_threads: int = 2
+    ):
+        self.runner = runner
+        self.backend = runner.backend
+        self.queue_depth = max(1, queue_depth)
+        self.writer_threads = max(1, writer_threads)
+        self._stop = threading.Event()
+        self._stats = RunStats()
+        self._stats_lock = threading.Lock()
+        self._previous: Optional[PreviousRun] = None
+        # Set when the resolve stage dies, so the run is reported as aborted rather than short
+        self._error: Optional[Exception] = None
+
+    def run(self, ocr_json: dict, run_id: str, previous_run_id: str | None = None) -> dict:
+        """
+        Narrate the run and return its summary (also written to the manifest). If the run stopped
+        before every page was read, the summary has "aborted": true and the "error" that stopped it.
+        """
+        if not run_id:
+            raise ValueError("run_id is required for batch narration")
+        if previous_run_id == run_id:
+            raise ValueError("previous_run_id must name another run")
+
+        outputs_root = Path(self.runner.media_root) / self.runner.media_namespace
+        if previous_run_id:
+            self._previous = PreviousRun(
+                previous_run_id,
+                load_manifest(outputs_root / previous_run_id / MANIFEST_FILENAME),
+                outputs_root,
+                self.backend.model_id,
+                self.backend.audio_writer.suffix,
+                self.backend.voice_fingerprint
+            )
+        output_folder = ensure_folder(outputs_root / run_id)
+        started_at = datetime.now(timezone.utc)
+        page_q: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        # A page worth of wavs per writer is enough to keep the model busy during slow writes
+        write_q: queue.Queue = queue.Queue(maxsize=self.queue_depth * self.writer_threads)
+
+        resolver = threading.Thread(
+            target=self._resolve_stage,
+            args=(ocr_json, run_id, page_q),
+            name="tts-batch-resolve",
+            daemon=True
+        )
+        writers = [
+            threading.Thread(
+                target=self._write_stage,
+                args=(write_q,),
+                name=f"tts-batch-write-{i}",
+                daemon=True
+            )
+            for i in range(self.writer_threads)
+        ]
+
+        with Timer(f"📚 Batch narration of run {run_id}") as timer:
+            resolver.start()
+            for writer in writers:
+                writer.start()
+            try:
+                self._synthesize_stage(page_q, write_q)
+            finally:
+                self._stop.set()
+                for _ in writers:
+                    write_q.put(_DONE)
+                for writer in writers:
+                    writer.join()
+                resolver.join()
+
+        wall_seconds = timer.duration
+        stats = self._stats
+        summary = {
+            "run_id": run_id,
+            "output_folder": str(output_folder),
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "lines": stats.lines,
+            "failed": stats.failed,
+            "cache_hits": stats.cache_hits,
+            "deduped": stats.deduped,
+            "audio_seconds": round(stats.audio_seconds, 3),
+            "synth_seconds": round(stats.synth_seconds, 3),
+            "audio_bytes": stats.audio_bytes,
+            "audio_format": self.backend.audio_writer.audio_format,
+            "wall_seconds": round(wall_seconds, 3),
+            "rtf": round(stats.audio_seconds / wall_seconds, 3) if wall_seconds else 0.0,
+        }
+        if self._error is not None:
+            summary["aborted"] = True
+            summary["error"] = f"{type(self._error).__name__}: {self._error}"
+        if self._previous is not None:
+            summary["renarration"] = {
+                "previous_run_id": previous_run_id,
+                **{change: stats.changes.get(change, 0) for change in ("unchanged", "edited", "new")},
+                "carried": stats.carried,
+                "removed": self._previous.removed(),
+                "audio_seconds_carried": round(stats.audio_seconds_carried, 3),
+                "synth_seconds_avoided": round(stats.synth_seconds_avoided, 3),
+            }
+        manifest_path = self._write_manifest(
+            output_folder,
+            {**summary, "entries": sorted(stats.entries, key=lambda e: (e["page_index"], e["dialogue_id"]))}
+        )
+        summary["manifest"] = str(manifest_path)
+        print(f"📚 Batch summary: {summary}")
+        return summary
+
+    # ---------------------------------------------------------------- stages
+
+    def _put(self, q: queue.Queue, item: Any):
+        # Keep checking for a stop so an upstream stage never blocks forever on a dead consumer
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _resolve_stage(self, ocr_json: dict, run_id: str, page_q: queue.Queue):
+        try:
+            for page in iter_ocr_pages(ocr_json, run_id):
+                resolved: list[ResolvedLine] = []
+                for req in page.lines:
+                    try:
+                        new_req, out_dir = self.runner.resolve_request(req)
+                        resolved.append(ResolvedLine(page.index, new_req, out_dir))
+                    except Exception as e:
+                        self._record_failure(page.index, req, e)
+                if self._previous is not None:
+                    resolved = self._carry_over(page.image_ref.path, resolved)
+                # Same-voice lines back to back, so the conditionals swap is a cache hit in a row
+                resolved.sort(key=lambda line: conditionals_group_key(line.req))
+                self._put(page_q, resolved)
+        except Exception as e:
+            log_exception("Batch resolve stage failed")
+            self._error = e
+        finally:
+            self._put(page_q, _DONE)
+
+    def _synthesize_stage(self, page_q: queue.Queue, write_q: queue.Queue):
+        while True:
+            page = page_q.get()
+            if page is _DONE:
+                return
+            # Repeats within a page ("Huh?" in three bubbles) are generated once
+            generated: dict[tuple, Any] = {}
+            for line in page:
+                start = time.perf_counter()
+                try:
+                    cache_key = self.backend.audio_cache_key(line.req)
+                    if self._place_cached(line, cache_key):
+                        continue
+                    take = generated.get(dedupe_key(line.req))
+                    if take is None:
+                        seeded = self.backend.with_seed(line.req)
+                        take = generated[dedupe_key(line.req)] = (self.backend.generate_audio(seeded), seeded.seed)
+                    else:
+                        with self._stats_lock:
+                            self._stats.deduped += 1
+                    wav, seed = take
+                except Exception as e:
+                    self._record_failure(line.page_index, line.req, e)
+                    continue
+                # The take records the seed it was generated with, so it can be reproduced
+                line = replace(line, req=line.req.model_copy(update={"seed": seed}))
+                self._put(write_q, SynthesizedLine(line, wav, time.perf_counter() - start, cache_key))
+
+    def _carry_over(self, image: str, resolved: list[ResolvedLine]) -> list[ResolvedLine]:
+        """
+        Link the previous run's takes for the unchanged lines of a page; returns the lines left to synthesize.
+        """
+        remaining: list[ResolvedLine] = []
+        for line, match in zip(resolved, self._previous.match_image(image, [line.req for line in resolved])):
+            line = replace(line, change=match.change)
+            with self._stats_lock:
+                self._stats.changes[match.change] = self._stats.changes.get(match.change, 0) + 1
+            if match.change != UNCHANGED or not self._place_carried(line, match.previous):
+                remaining.append(line)
+        return remaining
+
+    def _place_carried(self, line: ResolvedLine, previous: dict) -> bool:
+        # Same seed as the carried take, so the new run's record reproduces it
+        line = replace(line, req=line.req.model_copy(update={"seed": previous.get("seed")}))
+        src = self._previous.take_path(previous)
+        try:
+            out_path = self.backend.allocate_output_path(line.req, line.out_dir)
+            link_or_copy(src, out_path)
+            output = self.backend.finalize_take(line.req, out_path)
+        except OSError:
+            log_exception(f"Could not carry over {src}, synthesizing instead")
+            return False
+        self._record_success(
+            line,
+            output.audio_ref.path,
+            previous["audio_seconds"],
+            0.0,
+            audio_bytes=out_path.stat().st_size,
+            carried=previous
+        )
+        return True
+
+    def _place_cached(self, line: ResolvedLine, cache_key: str | None) -> bool:
+        # Unchanged lines of a re-processed chapter: link the earlier take, no inference
+        if cache_key is None or line.req.bypass_cache or cache_key not in self.backend.audio_cache:
+            return False
+        out_path = self.backend.allocate_output_path(line.req, line.out_dir)
+        if not self.backend.fetch_cached(cache_key, line.req, out_path):
+            return False
+        line = replace(line, req=self.backend.with_cached_seed(line.req, cache_key))
+        output = self.backend.finalize_take(line.req, out_path)
+        self._record_success(line, output.audio_ref.path, self.backend.audio_duration(out_path), 0.0, cached=True)
+        return True
+
+    def _write_stage(self, write_q: queue.Queue):
+        while True:
+            item = write_q.get()
+            if item is _DONE:
+                return
+            line, wav, synth_seconds, cache_key = item.line, item.wav, item.synth_seconds, item.cache_key
+            del item
+            try:
+                out_path = self.backend.allocate_output_path(line.req, line.out_dir)
+                written = self.backend.save_audio(wav, out_path)
+                self.backend.store_cached(cache_key, out_path, line.req.seed)
+                output = self.backend.finalize_take(line.req, out_path)
+                audio_seconds = wav.shape[-1] / self.backend.sample_rate
+            except Exception as e:
+                self._record_failure(line.page_index, line.req, e)
+                continue
+            finally:
+                # Drop the waveform before blocking on the next item
+                del wav
+            self._record_success(line, output.audio_ref.path, audio_seconds, synth_seconds, audio_bytes=written.bytes)
+
+    # ---------------------------------------------------------------- bookkeeping
+
+    def _entry(self, page_index: int, req: d.TTSInput) -> dict:
+        params = req.emotion.params
+        return {
+            "page_index": page_index,
+            "image": req.image_ref.path,
+            "dialogue_id": req.dialogue_id,
+            "text": req.text,
+            "gender": req.gender.value,
+            "speaker": req.speaker.name,
+            "speaker_wav": req.speaker.wav_file,
+            "speaker_wav_sha256": self.backend.voice_fingerprint(req.speaker),
+            "emotion": req.emotion.name,
+            "exaggeration": params.exaggeration,
+            "cfg": params.cfg,
+            "seed": req.seed,
+            "model_id": self.backend.model_id,
+        }
+
+    def _record_success(
+        self,
+        line: ResolvedLine,
+        audio_path: str,
+        audio_seconds: float,
+        synth_seconds: float,
+        cached: bool = False,
+        audio_bytes: int | None = None,
+        carried: dict | None = None
+    ):
+        entry = {
+            **self._entry(line.page_index, line.req),
+            "status": "ok",
+            "audio_path": audio_path,
+            "audio_seconds": round(audio_seconds, 3),
+            "synth_seconds": round(synth_seconds, 3),
+            "cached": cached,
+            "audio_bytes": audio_bytes,
+        }
+        if line.change is not None:
+            entry["change"] = line.change
+        if carried is not None:
+            avoided = self._previous.avoided_seconds(carried)
+            entry["carried_from"] = carried["audio_path"]
+            entry["avoided_synth_seconds"] = round(avoided, 3)
+        with self._stats_lock:
+            if carried is not None:
+                self._stats.carried += 1
+                self._stats.audio_seconds_carried += audio_seconds
+                self._stats.synth_seconds_avoided += avoided
+            self._stats.lines += 1
+            self._stats.cache_hits += int(cached)
+            self._stats.audio_seconds += audio_seconds
+            self._stats.synth_seconds += synth_seconds
+            self._stats.audio_bytes += audio_bytes or 0
+            self._stats.entries.append(entry)
+
+    def _record_failure(self, page_index: int, req: d.TTSInput, error: Exception):
+        log_exception(f"Batch line failed (page {page_index}, dialogue {req.dialogue_id})")
+        entry = {
+            **self._entry(page_index, req),
+            "status": "error",
+            "error": f"{type(error).__name__}: {error}",
+        }
+        with self._stats_lock:
+            self._stats.failed += 1
+            self._stats.entries.append(entry)
+
+    def _write_manifest(self, output_folder: Path, manifest: dict) -> Path:
+        manifest_path = output_folder / MANIFEST_FILENAME
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+        return manifest_path
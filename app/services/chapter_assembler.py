@@ -0,0 +1,289 @@
+# services/chapter_assembler.py
+import json
+import math
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Optional
+import numpy as np
+import soundfile as sf
+from app.services.version_index import VersionIndex
+from app.utils import ensure_folder
+
+if TYPE_CHECKING:
+    from app.config import TTSConfig
+
+CHAPTER_FILENAME = "chapter.wav"
+CUES_FILENAME = "chapter.cues.json"
+VTT_FILENAME = "chapter.vtt"
+# Frames read or written per block; a take is never held whole unless it has to be resampled
+_BLOCK_FRAMES = 1 << 16
+_DIGITS = re.compile(r"(\d+)")
+
+_run_locks: dict[str, threading.Lock] = {}
+_run_locks_guard = threading.Lock()
+
+
+def natural_key(name: str) -> list:
+    """
+    Sort key that orders "page_2" before "page_10".
+    """
+    return [int(part) if part.isdigit() else part.lower() for part in _DIGITS.split(name)]
+
+
+def vtt_timestamp(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    return f"{ms // 3_600_000:02d}:{ms // 60_000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+
+@dataclass
+class Segment:
+    image: str
+    dialogue_id: int
+    version: int
+    # Take path relative to media_root/media_namespace
+    path: str
+    # Offsets in frames of the chapter track
+    start: int
+    frames: int
+    pinned: bool = False
+    speaker: str = ""
+    text: str = ""
+
+    @property
+    def end(self) -> int:
+        return self.start + self.frames
+
+    def same_slot(self, other: "Segment") -> bool:
+        return (self.image, self.dialogue_id, self.start, self.frames) == (other.image, other.dialogue_id, other.start, other.frames)
+
+
+class ChapterAssembler:
+    """
+    Stitches the selected take of every dialogue in a run (pinned, else the latest of the default engine)
+    into one WAV track, ordered by image and dialogue_id, with silence between lines and a longer one
+    between pages.
+    Takes are streamed block by block, so memory stays at one block (one take when it needs resampling).
+
+    Next to the track it writes a cue index (JSON, frame and second offsets per dialogue) and a
+    WebVTT file. Incremental assembly compares against the previous cue index: takes that changed
+    without moving anything are overwritten in place, and only from the first segment whose position
+    changed onwards is the track rewritten.
+    """
+    def __init__(
+        self,
+        version_index: VersionIndex,
+        media_dir: Path,
+        line_gap_ms: int = 250,
+        page_gap_ms: int = 800,
+        engine: Optional[str] = None
+    ):
+        self.version_index = version_index
+        self.media_dir = Path(media_dir)
+        self.engine = engine
+        self.line_gap_ms = line_gap_ms
+        self.page_gap_ms = page_gap_ms
+
+    def _run_lock(self, run_id: str) -> threading.Lock:
+        with _run_locks_guard:
+            return _run_locks.setdefault(str(self.media_dir / run_id), threading.Lock())
+
+    def plan(self, run_id: str) -> tuple[list[Segment], int]:
+        """
+        Chapter layout for the run's selected takes: segments with frame offsets, and the sample rate.
+        Takes whose file is missing are left out.
+        """
+        takes = sorted(
+            self.version_index.selected_takes(run_id, self.engine),
+            key=lambda t: (natural_key(t["image"]), t["dialogue_id"])
+        )
+        infos = []
+        for take in takes:
+            path = self.media_dir / take["path"]
+            if not path.is_file():
+                print(f"⚠️ Skipping take missing on disk: {path}")
+                continue
+            infos.append((take, sf.info(str(path))))
+        if not infos:
+            raise ValueError(f"No takes recorded for run: {run_id}")
+
+        sample_rate = infos[0][1].samplerate
+        line_gap = int(sample_rate * self.line_gap_ms / 1000)
+        page_gap = int(sample_rate * self.page_gap_ms / 1000)
+        segments: list[Segment] = []
+        for take, info in infos:
+            start = 0
+            if segments:
+                start = segments[-1].end + (page_gap if take["image"] != segments[-1].image else line_gap)
+            segments.append(Segment(
+                image=take["image"],
+                dialogue_id=take["dialogue_id"],
+                version=take["version"],
+                path=take["path"],
+                start=start,
+                frames=math.ceil(info.frames * sample_rate / info.samplerate),
+                pinned=take.get("pinned", False),
+                speaker=take.get("speaker", ""),
+                text=take.get("text", ""),
+            ))
+        return segments, sample_rate
+
+    def _load_cues(self, out_dir: Path) -> Optional[dict[str, Any]]:
+        try:
+            with open(out_dir / CUES_FILENAME, "r", encoding="utf-8") as f:
+                cues = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # A cue index left "writing" means the track was being edited when the process died
+        return cues if cues.get("state") == "complete" else None
+
+    def _write_cues(self, out_dir: Path, run_id: str, segments: list[Segment], sample_rate: int, state: str):
+        cues = {
+            "run_id": run_id,
+            "state": state,
+            "audio": CHAPTER_FILENAME,
+            "sample_rate": sample_rate,
+            "frames": segments[-1].end,
+            "duration_s": segments[-1].end / sample_rate,
+            "line_gap_ms": self.line_gap_ms,
+            "page_gap_ms": self.page_gap_ms,
+            "segments": [
+                {**asdict(seg), "start_s": seg.start / sample_rate, "end_s": seg.end / sample_rate}
+                for seg in segments
+            ],
+        }
+        tmp_path = out_dir / f"{CUES_FILENAME}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cues, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, out_dir / CUES_FILENAME)
+
+    def _write_vtt(self, out_dir: Path, segments: list[Segment], sample_rate: int):
+        lines = ["WEBVTT", ""]
+        for i, seg in enumerate(segments, start=1):
+            text = seg.text or f"{seg.image} #{seg.dialogue_id}"
+            text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            lines += [
+                str(i),
+                f"{vtt_timestamp(seg.start / sample_rate)} --> {vtt_timestamp(seg.end / sample_rate)}",
+                f"<v {seg.speaker}>{text}" if seg.speaker else text,
+                "",
+            ]
+        tmp_path = out_dir / f"{VTT_FILENAME}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        os.replace(tmp_path, out_dir / VTT_FILENAME)
+
+    def _take_blocks(self, seg: Segment, sample_rate: int) -> Iterator[np.ndarray]:
+        """
+        Mono float32 blocks of a take at the chapter sample rate, padded or trimmed to seg.frames.
+        """
+        path = str(self.media_dir / seg.path)
+        if sf.info(path).samplerate == sample_rate:
+            blocks = (b.mean(axis=1) for b in sf.blocks(path, blocksize=_BLOCK_FRAMES, dtype="float32", always_2d=True))
+        else:
+            # Takes from another engine run at its own rate; only these are resampled whole.
+            # torch is imported here so the server can import this module before the model runtime loads
+            import torch
+            import torchaudio.functional as AF
+
+            data, rate = sf.read(path, dtype="float32", always_2d=True)
+            wav = AF.resample(torch.from_numpy(data.mean(axis=1)), rate, sample_rate)
+            blocks = iter(np.array_split(wav.numpy(), max(1, math.ceil(wav.shape[-1] / _BLOCK_FRAMES))))
+        remaining = seg.frames
+        for block in blocks:
+            if remaining <= 0:
+                break
+            block = block[:remaining]
+            remaining -= len(block)
+            yield block
+        if remaining > 0:
+            yield np.zeros(remaining, dtype=np.float32)
+
+    def _write_silence(self, out: sf.SoundFile, frames: int):
+        while frames > 0:
+            n = min(frames, _BLOCK_FRAMES)
+            out.write(np.zeros(n, dtype=np.float32))
+            frames -= n
+
+    def _write_segment(self, out: sf.SoundFile, seg: Segment, sample_rate: int):
+        out.seek(seg.start)
+        for block in self._take_blocks(seg, sample_rate):
+            out.write(block)
+
+    def _write_from(self, out: sf.SoundFile, segments: list[Segment], first: int, sample_rate: int):
+        position = segments[first - 1].end if first > 0 else 0
+        out.seek(position)
+        for seg in segments[first:]:
+            self._write_silence(out, seg.start - position)
+            for block in self._take_blocks(seg, sample_rate):
+                out.write(block)
+            position = seg.end
+
+    def assemble(self, run_id: str, incremental: bool = True) -> dict[str, Any]:
+        """
+        Build or update the chapter track of a run. Returns its paths and what was (re)written.
+        """
+        with self._run_lock(run_id):
+            segments, sample_rate = self.plan(run_id)
+            out_dir = ensure_folder(self.media_dir / run_id)
+            audio_path = out_dir / CHAPTER_FILENAME
+            previous = self._load_cues(out_dir) if incremental else None
+            if previous is not None and (
+                previous["sample_rate"] != sample_rate
+                or (previous["line_gap_ms"], previous["page_gap_ms"]) != (self.line_gap_ms, self.page_gap_ms)
+                or not audio_path.is_file()
+                or sf.info(str(audio_path)).frames != previous["frames"]
+            ):
+                previous = None
+
+            if previous is None:
+                mode, rewritten = "full", len(segments)
+                tmp_path = out_dir / f".{CHAPTER_FILENAME}.part"
+                with sf.SoundFile(str(tmp_path), "w", samplerate=sample_rate, channels=1, format="WAV", subtype="PCM_16") as out:
+                    self._write_from(out, segments, 0, sample_rate)
+                os.replace(tmp_path, audio_path)
+            else:
+                old = [Segment(**{k: v for k, v in seg.items() if k not in ("start_s", "end_s")}) for seg in previous["segments"]]
+                # Up to the first segment that moved, the layout is unchanged and only swapped takes are rewritten
+                first_moved = next(
+                    (i for i, (a, b) in enumerate(zip(old, segments)) if not a.same_slot(b)),
+                    min(len(old), len(segments))
+                )
+                swapped = [i for i in range(first_moved) if old[i].path != segments[i].path]
+                tail = len(segments) - first_moved if (first_moved < len(segments) or len(old) != len(segments)) else 0
+                rewritten = len(swapped) + tail
+                mode = "incremental" if rewritten else "unchanged"
+                if rewritten:
+                    self._write_cues(out_dir, run_id, segments, sample_rate, state="writing")
+                    with sf.SoundFile(str(audio_path), "r+") as out:
+                        for i in swapped:
+                            self._write_segment(out, segments[i], sample_rate)
+                        if tail or len(old) != len(segments):
+                            self._write_from(out, segments, first_moved, sample_rate)
+                            out.truncate(segments[-1].end)
+
+            self._write_cues(out_dir, run_id, segments, sample_rate, state="complete")
+            self._write_vtt(out_dir, segments, sample_rate)
+            print(f"🎞️ Assembled chapter {run_id} ({mode}): {len(segments)} lines, {rewritten} written, {segments[-1].end / sample_rate:.1f}s")
+            return {
+                "run_id": run_id,
+                "mode": mode,
+                "audio": f"{run_id}/{CHAPTER_FILENAME}",
+                "cues": f"{run_id}/{CUES_FILENAME}",
+                "vtt": f"{run_id}/{VTT_FILENAME}",
+                "segments": len(segments),
+                "rewritten": rewritten,
+                "duration_s": segments[-1].end / sample_rate,
+            }
+
+
+def create_chapter_assembler(version_index: VersionIndex, config: "TTSConfig") -> ChapterAssembler:
+    return ChapterAssembler(
+        version_index=version_index,
+        media_dir=Path(config.media_root) / config.media_namespace,
+        line_gap_ms=config.chapter_line_gap_ms,
+        page_gap_ms=config.chapter_page_gap_ms,
+        engine=config.default_engine
+    )
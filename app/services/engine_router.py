@@ -0,0 +1,116 @@
+# services/engine_router.py
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+from app.backends.registry import select_engine
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.services.inference_worker import InferenceWorker
+from app.services.metrics import ENGINE_REQUESTS
+from app.services.scheduler import request_priority
+
+
+class EngineRouter:
+    """
+    Stands in for the InferenceWorker when several engines are loaded: one worker (and queue) per
+    engine, so drafts never wait behind final renders. Each request is routed with select_engine();
+    interactive "auto" requests spill over to the preview engine once the default engine's queue
+    reaches overload_queue_depth, or when that queue is full. Batch and prewarm lines (bulk, jobs,
+    prefetch) never do: they are final narration, so they wait (or get TTSQueueFullError and back
+    off) instead of being rendered by the preview engine.
+    """
+    def __init__(
+        self,
+        workers: dict[str, InferenceWorker],
+        default_engine: str,
+        preview_engine: str,
+        overload_queue_depth: int = 0
+    ):
+        self.workers = workers
+        self.default_engine = default_engine
+        self.preview_engine = preview_engine if preview_engine in workers else default_engine
+        self.overload_queue_depth = overload_queue_depth
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(worker.queue_depth for worker in self.workers.values())
+
+    def queue_depths(self) -> dict[str, int]:
+        depths: dict[str, int] = {}
+        for worker in self.workers.values():
+            for priority, depth in worker.queue_depths().items():
+                depths[priority] = depths.get(priority, 0) + depth
+        return depths
+
+    def start(self):
+        for worker in self.workers.values():
+            worker.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        for worker in self.workers.values():
+            worker.stop(timeout)
+
+    def _overloaded(self) -> bool:
+        return 0 < self.overload_queue_depth <= self.workers[self.default_engine].queue_depth
+
+    def _route(
+        self,
+        req: d.TTSInput,
+        priority: str,
+        submit: Callable[[InferenceWorker, d.TTSInput], Future]
+    ) -> Future:
+        may_spill = request_priority(req, priority) == "interactive"
+        engine, reason = select_engine(
+            req, self.default_engine, self.preview_engine, self.workers, may_spill and self._overloaded()
+        )
+        try:
+            future = submit(self.workers[engine], req.model_copy(update={"engine": engine}))
+        except ex.TTSQueueFullError:
+            if not may_spill or reason != "auto" or self.preview_engine == engine:
+                raise
+            engine, reason = self.preview_engine, "overload"
+            future = submit(self.workers[engine], req.model_copy(update={"engine": engine}))
+        ENGINE_REQUESTS.inc(engine=engine, reason=reason)
+        return future
+
+    def submit(
+        self,
+        req: d.TTSInput,
+        timeout: Optional[float] = None,
+        handler: Optional[Callable[[d.TTSInput], Any]] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        return self._route(req, priority, lambda worker, r: worker.submit(r, timeout, handler=handler, trace_id=trace_id, priority=priority))
+
+    def submit_stream(
+        self,
+        req: d.TTSInput,
+        emit: Callable[[bytes], bool],
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        return self._route(req, priority, lambda worker, r: worker.submit_stream(r, emit, timeout, trace_id=trace_id, priority=priority))
+
+    def submit_render(
+        self,
+        req: d.TTSInput,
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        return self._route(req, priority, lambda worker, r: worker.submit_render(r, timeout, trace_id=trace_id, priority=priority))
+
+    def stats(self) -> dict[str, Any]:
+        engines = {name: worker.stats() for name, worker in self.workers.items()}
+        # Top level keeps the single-worker shape (the default engine's numbers) for existing dashboards
+        return {
+            **engines[self.default_engine],
+            "queue_depth": self.queue_depth,
+            "default_engine": self.default_engine,
+            "preview_engine": self.preview_engine,
+            "overload_queue_depth": self.overload_queue_depth,
+            "engines": engines,
+        }
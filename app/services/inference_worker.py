@@ -0,0 +1,293 @@
+# services/inference_worker.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.services.memory import MemoryGovernor
+from app.services.metrics import QUEUE_WAIT_SECONDS, Trace, TraceGroup, traced
+from app.services.scheduler import FairQueue, request_cost, request_priority
+
+# How often the idle worker wakes up to check for shutdown
+_POLL_INTERVAL_S = 0.5
+
+
+@dataclass
+class InferenceJob:
+    req: d.TTSInput
+    future: Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    deadline: Optional[float] = None
+    # Overrides the worker's handler, e.g. for streaming jobs
+    handler: Optional[Callable[[d.TTSInput], Any]] = None
+    trace: Optional[Trace] = None
+    priority: str = "interactive"
+
+
+class InferenceWorker:
+    """
+    Single thread that owns the TTS model. Requests are fed through a bounded queue and
+    answered through futures, so callers never touch the model concurrently. The queue is a
+    FairQueue: priority classes with aging, and fair shares across runs within a class.
+
+    With a batch_handler, requests arriving within max_batch_wait_ms of each other are
+    coalesced (up to max_batch_size) and handed over together, so lines sharing a voice
+    run back to back on one set of conditionals.
+
+    Handlers may return a Future for work that finishes off this thread (writing the take);
+    the request is answered when it settles. With a MemoryGovernor (which may be shared by several
+    workers), each request holds a memory reservation from submit until its future settles.
+    """
+    def __init__(
+        self,
+        handler: Callable[[d.TTSInput], Any],
+        max_queue_depth: int = 16,
+        name: str = "tts-inference",
+        batch_handler: Optional[Callable[[list[d.TTSInput]], list[Any]]] = None,
+        max_batch_size: int = 1,
+        max_batch_wait_ms: float = 0.0,
+        stream_handler: Optional[Callable[[d.TTSInput, Callable[[bytes], bool]], None]] = None,
+        render_handler: Optional[Callable[[d.TTSInput], Any]] = None,
+        aging_s: float = 10.0,
+        run_weights: Optional[dict[str, float]] = None,
+        interactive_reserve: int = 0,
+        memory: Optional[MemoryGovernor] = None
+    ):
+        self.handler = handler
+        self.memory = memory
+        self.stream_handler = stream_handler
+        self.render_handler = render_handler
+        self.batch_handler = batch_handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_wait_s = max(0.0, max_batch_wait_ms) / 1000
+        self.max_queue_depth = max(1, max_queue_depth)
+        self._queue = FairQueue(self.max_queue_depth, aging_s, run_weights, interactive_reserve)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.expired = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batch_size_counts: dict[int, int] = {}
+        self.queue_wait_total_s = 0.0
+        self.queue_wait_max_s = 0.0
+        self.started = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._thread.join(timeout)
+        # Anything still queued will never run
+        for job in self._queue.drain():
+            job.future.cancel()
+
+    def submit(
+        self,
+        req: d.TTSInput,
+        timeout: Optional[float] = None,
+        handler: Optional[Callable[[d.TTSInput], Any]] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        """
+        Queue a request and return its future. Raises TTSQueueFullError when the queue is at capacity
+        or the memory budget is exhausted. With a trace_id, the request's stage timings are logged as one trace line when it finishes.
+        priority is the class for requests that leave theirs on "auto".
+        """
+        if self._stop.is_set():
+            raise RuntimeError("Inference worker is stopped.")
+
+        job = InferenceJob(
+            req=req,
+            future=Future(),
+            handler=handler,
+            trace=Trace(trace_id) if trace_id else None,
+            priority=request_priority(req, priority)
+        )
+        if timeout is not None:
+            job.deadline = job.enqueued_at + timeout
+        reservation = self.memory.admit(req) if self.memory is not None else 0
+        try:
+            self._queue.put_nowait(job, job.priority, req.run_id, request_cost(req))
+        except queue.Full:
+            self.rejected += 1
+            if self.memory is not None:
+                self.memory.release(reservation)
+            raise ex.TTSQueueFullError(f"Inference queue is full ({self.max_queue_depth} pending)")
+        if self.memory is not None:
+            job.future.add_done_callback(lambda _: self.memory.release(reservation))
+        return job.future
+
+    def submit_stream(
+        self,
+        req: d.TTSInput,
+        emit: Callable[[bytes], bool],
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        """
+        Queue a streaming request; emit() is called from the worker thread with each audio chunk.
+        """
+        if self.stream_handler is None:
+            raise RuntimeError("Inference worker has no stream handler.")
+        return self.submit(req, timeout, handler=lambda r: self.stream_handler(r, emit), trace_id=trace_id, priority=priority)
+
+    def submit_render(
+        self,
+        req: d.TTSInput,
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        """
+        Queue a request for an in-memory take; the future settles with the RenderedTake.
+        """
+        if self.render_handler is None:
+            raise RuntimeError("Inference worker has no render handler.")
+        return self.submit(req, timeout, handler=self.render_handler, trace_id=trace_id, priority=priority)
+
+    def queue_depths(self) -> dict[str, int]:
+        return self._queue.depths()
+
+    def stats(self) -> dict[str, Any]:
+        batched_jobs = sum(size * count for size, count in self.batch_size_counts.items())
+        return {
+            "queue_depth": self.queue_depth,
+            "queue_depths": self.queue_depths(),
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "expired": self.expired,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "batch_size_avg": (batched_jobs / self.batches) if self.batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "queue_wait_avg_ms": (self.queue_wait_total_s / self.started * 1000) if self.started else 0.0,
+            "queue_wait_max_ms": self.queue_wait_max_s * 1000,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self._queue.get(timeout=_POLL_INTERVAL_S)
+            except queue.Empty:
+                continue
+            if not self._batchable(job):
+                self._execute(job)
+                continue
+            batch, deferred = self._collect_batch(job)
+            self._execute_batch(batch)
+            for other in deferred:
+                self._execute(other)
+
+    def _batchable(self, job: InferenceJob) -> bool:
+        return self.batch_handler is not None and self.max_batch_size > 1 and job.handler is None
+
+    def _collect_batch(self, first: InferenceJob) -> tuple[list[InferenceJob], list[InferenceJob]]:
+        """
+        Gather plain line jobs that arrive within the batch window.
+        Jobs with their own handler are set aside and run right after the batch.
+        """
+        batch, deferred = [first], []
+        window_end = time.monotonic() + self.max_batch_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = window_end - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            (batch if self._batchable(job) else deferred).append(job)
+        return batch, deferred
+
+    def _start(self, job: InferenceJob) -> bool:
+        """
+        Move a job to running. False if it was cancelled or timed out while queued.
+        """
+        # False when the client went away (future cancelled) while the job was queued
+        if not job.future.set_running_or_notify_cancel():
+            self.cancelled += 1
+            return False
+        now = time.monotonic()
+        if job.deadline is not None and now > job.deadline:
+            self.expired += 1
+            job.future.set_exception(ex.TTSTimeoutError("Request timed out while queued"))
+            return False
+        waited = now - job.enqueued_at
+        QUEUE_WAIT_SECONDS.observe(waited, priority=job.priority)
+        if job.trace is not None:
+            job.trace.add("queue", waited)
+        self.started += 1
+        self.queue_wait_total_s += waited
+        self.queue_wait_max_s = max(self.queue_wait_max_s, waited)
+        return True
+
+    def _execute_batch(self, batch: list[InferenceJob]):
+        live = [job for job in batch if self._start(job)]
+        if not live:
+            return
+        self.batches += 1
+        self.batch_size_counts[len(live)] = self.batch_size_counts.get(len(live), 0) + 1
+        traces = [job.trace for job in live if job.trace is not None]
+        try:
+            with traced(TraceGroup(traces) if traces else None):
+                results = self.batch_handler([job.req for job in live])
+        except Exception as e:
+            for job in live:
+                self._settle(job, e)
+            return
+        for job, result in zip(live, results):
+            self._settle(job, result, batch_size=len(live))
+
+    def _execute(self, job: InferenceJob):
+        if not self._start(job):
+            return
+        try:
+            with traced(job.trace):
+                result = (job.handler or self.handler)(job.req)
+        except Exception as e:
+            result = e
+        self._settle(job, result)
+
+    def _settle(self, job: InferenceJob, outcome: Any, batch_size: int = 1):
+        """
+        Answer a job with its result or exception. A Future outcome is a take still being written:
+        the job is answered once it settles, while this thread moves on to the next request.
+        """
+        if isinstance(outcome, Future):
+            outcome.add_done_callback(
+                lambda f: self._settle(job, f.exception() or f.result(), batch_size)
+            )
+            return
+        if isinstance(outcome, Exception):
+            self.failed += 1
+            self._log_trace(job, outcome, batch_size=batch_size)
+            job.future.set_exception(outcome)
+        else:
+            self._log_trace(job, batch_size=batch_size)
+            self.completed += 1
+            job.future.set_result(outcome)
+
+    def _log_trace(self, job: InferenceJob, error: Optional[Exception] = None, batch_size: int = 1):
+        if job.trace is None:
+            return
+        job.trace.log(
+            run_id=job.req.run_id,
+            dialogue_id=job.req.dialogue_id,
+            batch_size=batch_size,
+            error=f"{type(error).__name__}: {error}" if error else None
+        )
@@ -0,0 +1,231 @@
+# services/job_store.py
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.models.api import TTSOutput, TTSJobInfo
+from app.services.inference_worker import InferenceWorker
+from app.services.worker_pool import ProcessWorkerPool
+from app.utils import ensure_folder, log_exception
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id      TEXT NOT NULL UNIQUE,
+    batch_id    TEXT,
+    status      TEXT NOT NULL,
+    request     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, seq);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs(batch_id);
+"""
+
+_PROGRESS = {"queued": 0.0, "running": 0.5, "done": 1.0, "failed": 1.0, "cancelled": 1.0}
+
+# How long the dispatcher sleeps when nothing is queued or the inference queue is full
+_IDLE_WAIT_S = 1.0
+
+
+class JobStore:
+    """
+    SQLite-backed persistence for async TTS jobs, so queued work survives a server restart.
+    """
+    def __init__(self, db_path: Path):
+        ensure_folder(db_path.parent)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(
+        self,
+        reqs: list[d.TTSInput],
+        batch_id: Optional[str] = None
+    ) -> list[str]:
+        now = time.time()
+        job_ids = [uuid.uuid4().hex for _ in reqs]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO jobs (job_id, batch_id, status, request, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                [(job_id, batch_id, req.model_dump_json(), now, now) for job_id, req in zip(job_ids, reqs)]
+            )
+        return job_ids
+
+    def requeue_interrupted(self) -> int:
+        """
+        Jobs left 'running' by a previous process never finished; put them back in the queue.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running'",
+                (time.time(),)
+            )
+            return cur.rowcount
+
+    def next_queued(self) -> Optional[tuple[str, d.TTSInput]]:
+        """
+        Claim the oldest queued job by flipping it to 'running'.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, request FROM jobs WHERE status = 'queued' ORDER BY seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE job_id = ?",
+                (time.time(), row[0])
+            )
+        return row[0], d.TTSInput.model_validate_json(row[1])
+
+    def set_status(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[TTSOutput] = None,
+        error: Optional[str] = None
+    ):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, result.model_dump_json() if result else None, error, time.time(), job_id)
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job that has not been picked up yet.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id)
+            )
+            return cur.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[TTSJobInfo]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, batch_id, status, result, error, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._to_info(row) if row else None
+
+    def get_batch(self, batch_id: str) -> list[TTSJobInfo]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, batch_id, status, result, error, created_at, updated_at FROM jobs WHERE batch_id = ? ORDER BY seq",
+                (batch_id,)
+            ).fetchall()
+        return [self._to_info(row) for row in rows]
+
+    def _to_info(self, row: tuple) -> TTSJobInfo:
+        job_id, batch_id, status, result, error, created_at, updated_at = row
+        return TTSJobInfo(
+            job_id=job_id,
+            batch_id=batch_id,
+            status=status,
+            progress=_PROGRESS[status],
+            created_at=created_at,
+            updated_at=updated_at,
+            error=error,
+            result=TTSOutput.model_validate_json(result) if result else None
+        )
+
+
+class JobDispatcher:
+    """
+    Feeds queued jobs from the store into the inference worker, a few at a time so that
+    interactive /tts/dialogue requests still find room in the worker queue.
+    """
+    def __init__(
+        self,
+        store: JobStore,
+        worker: InferenceWorker | ProcessWorkerPool,
+        max_inflight: int = 2
+    ):
+        self.store = store
+        self.worker = worker
+        self.max_inflight = max(1, max_inflight)
+        self._inflight = threading.Semaphore(self.max_inflight)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tts-job-dispatcher", daemon=True)
+
+    def start(self):
+        resumed = self.store.requeue_interrupted()
+        if resumed:
+            print(f"♻️ Resuming {resumed} interrupted TTS job(s)")
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+
+    def notify(self):
+        """
+        Wake the dispatcher after new jobs were added.
+        """
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._inflight.acquire(timeout=_IDLE_WAIT_S):
+                continue
+            claimed = None
+            try:
+                claimed = self.store.next_queued()
+                if claimed is None:
+                    self._inflight.release()
+                    self._wakeup.wait(_IDLE_WAIT_S)
+                    self._wakeup.clear()
+                    continue
+                job_id, req = claimed
+                future = self._submit(job_id, req)
+                future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+            except Exception:
+                log_exception("Job dispatcher failed to submit a job")
+                if claimed is not None:
+                    self.store.set_status(claimed[0], "queued")
+                self._inflight.release()
+                self._stop.wait(_IDLE_WAIT_S)
+
+    def _submit(self, job_id: str, req: d.TTSInput) -> Future:
+        # Wait out a full inference queue instead of failing the job
+        while True:
+            try:
+                return self.worker.submit(req, priority="batch")
+            except ex.TTSQueueFullError:
+                if self._stop.wait(_IDLE_WAIT_S):
+                    raise
+
+    def _on_done(self, job_id: str, future: Future):
+        try:
+            if future.cancelled():
+                # Only happens on shutdown; leave it queued so the next start picks it up
+                self.store.set_status(job_id, "queued")
+            elif future.exception() is not None:
+                exc = future.exception()
+                cause = exc.__cause__ or exc
+                self.store.set_status(job_id, "failed", error=f"{type(cause).__name__}: {cause}")
+            else:
+                self.store.set_status(job_id, "done", result=future.result())
+        except Exception:
+            log_exception(f"Failed to record result of job {job_id}")
+        finally:
+            self._inflight.release()
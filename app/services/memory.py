@@ -0,0 +1,221 @@
+# services/memory.py
+import ctypes
+import ctypes.util
+import gc
+import os
+import threading
+from typing import Callable
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.services.metrics import METRICS
+
+# Bytes per float32 sample, and how many copies of a take's waveform are alive at once at worst
+# (segment chunks, the joined take, the clipped copy the encoder converts)
+_SAMPLE_BYTES = 4
+_WAVEFORM_COPIES = 3
+# Estimates assume the Chatterbox output rate; other engines run lower, so this errs high
+_ESTIMATE_SAMPLE_RATE = 24000
+
+MEMORY_REJECTIONS = METRICS.counter("tts_memory_rejections_total", "Requests turned away because the RSS budget was exhausted")
+MEMORY_TRIMS = METRICS.counter("tts_memory_trims_total", "Allocator trims (gc + malloc_trim) while idle")
+
+_libc = None
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    # PROCESS_MEMORY_COUNTERS (psapi.h)
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+    ]
+
+
+def _windows_memory(pid: int | str = "self") -> tuple[int, int]:
+    """
+    (working set, peak working set) of a process through GetProcessMemoryInfo; (0, 0) if it cannot be read.
+    """
+    kernel32, psapi = ctypes.windll.kernel32, ctypes.windll.psapi
+    kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+    kernel32.OpenProcess.restype = ctypes.c_void_p
+    kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+    psapi.GetProcessMemoryInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(_ProcessMemoryCounters), ctypes.c_ulong]
+    if pid == "self":
+        handle = kernel32.GetCurrentProcess()
+    else:
+        # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+        handle = kernel32.OpenProcess(0x1000 | 0x0010, False, int(pid))
+        if not handle:
+            return 0, 0
+    try:
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return 0, 0
+        return counters.WorkingSetSize, counters.PeakWorkingSetSize
+    finally:
+        if pid != "self":
+            kernel32.CloseHandle(handle)
+
+
+def rss_bytes(pid: int | str = "self") -> int:
+    """
+    Current resident set size of a process: /proc on Linux, the working set on Windows
+    (0 where neither is available or the process is gone).
+    """
+    if os.name == "nt":
+        return _windows_memory(pid)[0]
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def peak_rss_bytes() -> int:
+    """
+    Highest resident set size of this process so far (ru_maxrss is in KiB on Linux).
+    """
+    if os.name == "nt":
+        return _windows_memory()[1]
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def trim_memory() -> bool:
+    """
+    Collect garbage and hand freed heap pages back to the OS. glibc keeps freed memory in its arenas,
+    which is where long sessions of differently sized waveforms creep. False where malloc_trim is missing.
+    """
+    global _libc
+    gc.collect()
+    if _libc is None:
+        name = ctypes.util.find_library("c")
+        _libc = ctypes.CDLL(name) if name else False
+    trim = getattr(_libc, "malloc_trim", None) if _libc else None
+    if trim is None:
+        return False
+    trim(0)
+    MEMORY_TRIMS.inc()
+    return True
+
+
+def estimate_request_bytes(req: d.TTSInput, chars_per_second: float, overhead_bytes: int) -> int:
+    """
+    Peak memory a request may add while it runs: the waveform of its expected duration (text length
+    at chars_per_second) in every copy alive at once, per variant, plus a fixed per-request overhead
+    for activations and encode buffers.
+    """
+    audio_seconds = max(1, len(req.text)) / max(1.0, chars_per_second)
+    waveform = int(audio_seconds * _ESTIMATE_SAMPLE_RATE) * _SAMPLE_BYTES * _WAVEFORM_COPIES
+    return (overhead_bytes + waveform) * req.num_variants
+
+
+class MemoryGovernor:
+    """
+    Admission control against an RSS budget. Each admitted request reserves its estimated peak
+    (estimate_request_bytes) until it settles; a new one is turned away with TTSQueueFullError (so
+    callers back off and retry as for a full queue) when current RSS plus outstanding reservations
+    plus its own estimate would exceed the budget. With nothing in flight a request is always admitted,
+    so one oversized line still runs instead of being refused forever.
+
+    rss_fn measures what the budget covers: this process in thread mode, the pool processes in process
+    mode. With trim_interval_s, the allocator is trimmed (trim_memory) whenever nothing has been in
+    flight for that long.
+    """
+    def __init__(
+        self,
+        budget_bytes: int = 0,
+        chars_per_second: float = 14.0,
+        overhead_bytes: int = 32 << 20,
+        trim_interval_s: float = 0.0,
+        rss_fn: Callable[[], int] = rss_bytes
+    ):
+        self.budget_bytes = budget_bytes
+        self.chars_per_second = chars_per_second
+        self.overhead_bytes = overhead_bytes
+        self.trim_interval_s = trim_interval_s
+        self.rss_fn = rss_fn
+        self._lock = threading.Lock()
+        self._reserved = 0
+        self._inflight = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._trim_loop, name="tts-memory-trim", daemon=True)
+        self.admitted = 0
+        self.rejected = 0
+        self.peak_reserved = 0
+        METRICS.gauge("tts_memory_rss_bytes", "Resident memory covered by the RSS budget").set_function(lambda: self.rss_fn())
+        METRICS.gauge("tts_memory_peak_rss_bytes", "Peak resident memory of the server process").set_function(peak_rss_bytes)
+        METRICS.gauge("tts_memory_reserved_bytes", "Estimated peak memory reserved by requests in flight").set_function(lambda: self._reserved)
+        METRICS.gauge("tts_memory_budget_bytes", "RSS budget for admission (0 = unlimited)").set_function(lambda: self.budget_bytes)
+
+    def start(self):
+        if self.budget_bytes > 0 and self.rss_fn() == 0:
+            print("⚠️ memory_budget_mb is set but RSS cannot be read on this platform; admission only counts reservations")
+        if self.trim_interval_s > 0:
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def admit(self, req: d.TTSInput) -> int:
+        """
+        Reserve memory for a request; returns the reservation to release() once it settles.
+        """
+        estimate = estimate_request_bytes(req, self.chars_per_second, self.overhead_bytes)
+        with self._lock:
+            if self.budget_bytes > 0 and self._inflight > 0:
+                projected = self.rss_fn() + self._reserved + estimate
+                if projected > self.budget_bytes:
+                    self.rejected += 1
+                    MEMORY_REJECTIONS.inc()
+                    raise ex.TTSQueueFullError(
+                        f"Memory budget exhausted ({projected / 2**20:.0f} MB projected, {self.budget_bytes / 2**20:.0f} MB budget)"
+                    )
+            self._reserved += estimate
+            self._inflight += 1
+            self.admitted += 1
+            self.peak_reserved = max(self.peak_reserved, self._reserved)
+        return estimate
+
+    def release(self, reservation: int):
+        with self._lock:
+            self._reserved -= reservation
+            self._inflight -= 1
+
+    def _trim_loop(self):
+        seen = trimmed = self.admitted
+        while not self._stop.wait(self.trim_interval_s):
+            with self._lock:
+                idle = self._inflight == 0
+                admitted = self.admitted
+            # Once per busy spell, after a whole interval with no request admitted or in flight
+            if idle and admitted == seen and admitted != trimmed:
+                trim_memory()
+                trimmed = admitted
+            seen = admitted
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "rss_bytes": self.rss_fn(),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "budget_bytes": self.budget_bytes,
+                "reserved_bytes": self._reserved,
+                "peak_reserved_bytes": self.peak_reserved,
+                "inflight": self._inflight,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
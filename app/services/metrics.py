@@ -0,0 +1,294 @@
+# services/metrics.py
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+# Seconds; covers cache hits (ms) up to long CPU generations (minutes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RTF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)
+# Bytes; a short opus line is a few KB, a long 16-bit wav a few MB
+BYTE_BUCKETS = (4e3, 16e3, 64e3, 256e3, 1e6, 4e6, 16e6)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict[str, Any]) -> LabelKey:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple((name, str(labels[name])) for name in labelnames)
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._functions: dict[LabelKey, Callable[[], float]] = {}
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """
+        Read the value from fn at scrape time, for numbers another component already tracks.
+        """
+        self._functions[_label_key(self.labelnames, labels)] = fn
+
+    def _function_samples(self) -> list[tuple[str, LabelKey, float]]:
+        samples = []
+        for key, fn in list(self._functions.items()):
+            try:
+                samples.append(("", key, float(fn())))
+            except Exception:
+                continue
+        return samples
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        with self._lock:
+            values = [("", key, value) for key, value in self._values.items()]
+        return values + self._function_samples()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(self.labelnames, labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        with self._lock:
+            values = [("", key, value) for key, value in self._values.items()]
+        return values + self._function_samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        samples = []
+        with self._lock:
+            for key, counts in self._counts.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append(("_bucket", key + (("le", _format_value(bound)),), cumulative))
+                samples.append(("_count", key, cumulative))
+                samples.append(("_sum", key, self._sums[key]))
+        return samples
+
+
+class Registry:
+    """
+    Process-wide set of metrics rendered in the Prometheus text format.
+    """
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def snapshot(self) -> list[dict]:
+        """
+        Plain-data copy of every metric, picklable so pool workers can ship theirs to the server.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [
+            {"name": m.name, "kind": m.kind, "help": m.help, "samples": m.samples()}
+            for m in metrics
+        ]
+
+    def render(self, extra_snapshots: Optional[dict[str, list[dict]]] = None) -> str:
+        """
+        Prometheus exposition text. extra_snapshots maps a worker id to that worker's snapshot,
+        rendered with an extra worker label under the same metric families.
+        """
+        families: dict[str, dict] = {}
+        sources = [("", self.snapshot())] + list((extra_snapshots or {}).items())
+        for worker_id, snapshot in sources:
+            for metric in snapshot:
+                family = families.setdefault(metric["name"], {**metric, "samples": []})
+                extra = (("worker", str(worker_id)),) if worker_id != "" else ()
+                family["samples"].extend(
+                    (suffix, extra + tuple(labels), value) for suffix, labels, value in metric["samples"]
+                )
+
+        lines = []
+        for name, family in families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for suffix, labels, value in family["samples"]:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+STAGE_SECONDS = METRICS.histogram(
+    "tts_stage_seconds",
+    "Wall time per synthesis stage (resolve, conditioning, inference, encode, write)",
+    ["stage"]
+)
+LINE_RTF = METRICS.histogram(
+    "tts_realtime_factor",
+    "Audio seconds produced per wall second of inference, per line",
+    buckets=RTF_BUCKETS
+)
+AUDIO_SECONDS = METRICS.counter("tts_audio_seconds_total", "Seconds of audio synthesized")
+INFERENCE_SECONDS = METRICS.counter("tts_inference_seconds_total", "Wall seconds spent in model inference")
+CHARS = METRICS.counter("tts_chars_total", "Characters of text synthesized")
+LINES = METRICS.counter("tts_lines_total", "Lines synthesized, by outcome", ["result"])
+SHORTCUT_LINES = METRICS.counter("tts_shortcut_lines_total", "Lines answered without inference, by kind (silence, phrase_bank)", ["kind"])
+CACHE_LOOKUPS = METRICS.counter("tts_cache_lookups_total", "Cache lookups, by cache and result", ["cache", "result"])
+QUEUE_WAIT_SECONDS = METRICS.histogram("tts_queue_wait_seconds", "Time requests spent queued before inference, by priority class", ["priority"])
+AUDIO_BYTES = METRICS.counter("tts_audio_bytes_written_total", "Bytes of encoded audio written to media_root")
+AUDIO_FILE_BYTES = METRICS.histogram("tts_audio_file_bytes", "Size of each written take", ["format"], buckets=BYTE_BUCKETS)
+PREFETCH_RENDERS = METRICS.counter("tts_prefetch_renders_total", "Speculative renders, by outcome (submitted, used, promoted, wasted, cancelled, failed)", ["outcome"])
+ENGINE_REQUESTS = METRICS.counter("tts_engine_requests_total", "Requests routed to each engine, by reason (explicit, draft, final, auto, overload)", ["engine", "reason"])
+
+
+# ---------------------------------------------------------------- tracing
+
+@dataclass
+class Trace:
+    trace_id: str
+    started_at: float = field(default_factory=time.time)
+    spans: list[tuple[str, float]] = field(default_factory=list)
+
+    def add(self, stage: str, seconds: float):
+        self.spans.append((stage, seconds))
+
+    def log(self, **fields):
+        print(json.dumps({
+            "event": "trace",
+            "trace_id": self.trace_id,
+            "spans": [{"stage": name, "seconds": round(seconds, 4)} for name, seconds in self.spans],
+            **fields,
+        }), flush=True)
+
+
+class TraceGroup:
+    """
+    Fans spans out to every request in a micro-batch, since they share the same stages.
+    """
+    def __init__(self, traces: list[Trace]):
+        self.traces = traces
+
+    def add(self, stage: str, seconds: float):
+        for trace in self.traces:
+            trace.add(stage, seconds)
+
+
+CURRENT_TRACE: ContextVar[Optional[Trace | TraceGroup]] = ContextVar("tts_current_trace", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a hot-path stage into tts_stage_seconds and the current request's trace.
+    Also usable as a function decorator.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=name)
+        trace = CURRENT_TRACE.get()
+        if trace is not None:
+            trace.add(name, seconds)
+
+
+@contextmanager
+def traced(trace: Optional[Trace | TraceGroup]):
+    token = CURRENT_TRACE.set(trace)
+    try:
+        yield
+    finally:
+        CURRENT_TRACE.reset(token)
+
+
+def record_inference(chars: int, audio_seconds: float, wall_seconds: float):
+    CHARS.inc(chars)
+    AUDIO_SECONDS.inc(audio_seconds)
+    INFERENCE_SECONDS.inc(wall_seconds)
+    if wall_seconds > 0:
+        LINE_RTF.observe(audio_seconds / wall_seconds)
@@ -0,0 +1,83 @@
+# services/ocr_reader.py
+from dataclasses import dataclass
+from typing import Any, Iterator
+from mn_contracts import ocr as o
+from app.models.domain import (
+    domain as d,
+    speaker as s,
+    exceptions as ex
+)
+from app.services.tts_resolver import (
+    resolve_emotion,
+    resolve_gender,
+    resolve_speaker
+)
+
+# Keys tried in order, so older OCR dumps and the current mn_contracts export both load
+_IMAGE_LIST_KEYS = ("images", "pages", "results")
+_DIALOGUE_LIST_KEYS = ("dialogues", "parsed_dialogue")
+_DIALOGUE_ID_KEYS = ("dialogue_id", "id")
+
+
+@dataclass(frozen=True)
+class OCRPage:
+    index: int
+    image_ref: o.MediaRef
+    lines: list[d.TTSInput]
+
+
+def _first(data: dict, keys: tuple[str, ...], default: Any = None) -> Any:
+    for key in keys:
+        if key in data and data[key] is not None:
+            return data[key]
+    return default
+
+
+def dialogue_to_tts_input(
+    dialogue: dict,
+    image_ref: o.MediaRef,
+    run_id: str,
+    fallback_id: int
+) -> d.TTSInput:
+    """
+    Build a TTSInput from one OCR dialogue entry.
+    """
+    gender = resolve_gender(dialogue.get("gender"))
+    speaker_name = dialogue.get("speaker") or s.DEFAULT_SPEAKER
+    speaker = resolve_speaker(
+        gender,
+        s.Speaker(name=speaker_name, wav_file="", gender=gender)
+    )
+    return d.TTSInput(
+        text=(dialogue.get("text") or "").strip(),
+        gender=gender,
+        emotion=resolve_emotion(dialogue.get("emotion")),
+        speaker=speaker,
+        image_ref=image_ref,
+        run_id=run_id,
+        dialogue_id=int(_first(dialogue, _DIALOGUE_ID_KEYS, fallback_id))
+    )
+
+
+def iter_ocr_pages(ocr_json: dict, run_id: str) -> Iterator[OCRPage]:
+    """
+    Walk an OCR run (mn_contracts schema) page by page, yielding the TTS inputs of each image.
+    """
+    images = _first(ocr_json, _IMAGE_LIST_KEYS)
+    if not isinstance(images, list):
+        raise ex.TTSInputError("OCR result has no image list")
+
+    for page_index, image in enumerate(images):
+        if "image_ref" not in image:
+            raise ex.TTSInputError(f"OCR image #{page_index} has no image_ref")
+        image_ref = o.MediaRef.model_validate(image["image_ref"])
+        dialogues = _first(image, _DIALOGUE_LIST_KEYS, [])
+        yield OCRPage(
+            index=page_index,
+            image_ref=image_ref,
+            lines=[
+                dialogue_to_tts_input(dialogue, image_ref, run_id, fallback_id=i)
+                for i, dialogue in enumerate(dialogues)
+                if (dialogue.get("text") or "").strip()
+            ]
+        )
@@ -0,0 +1,149 @@
+# services/phrase_bank.py
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+import soundfile as sf
+import torch
+from app.models.domain import (
+    domain as d,
+    emotion as e,
+    speaker as s
+)
+from app.services.ocr_reader import iter_ocr_pages
+from app.services.text_normalizer import is_silent, normalize_line, phrase_key
+from app.utils import ensure_folder
+
+if TYPE_CHECKING:
+    from app.backends.base import TTSBackend
+
+INDEX_FILENAME = "index.json"
+
+# Interjections that turn up on almost every page of a chapter
+DEFAULT_PHRASES = (
+    "Huh?", "Hm?", "Eh?", "Ah!", "Ah...", "Oh!", "Oh...", "Ugh!", "Hah!", "Hah hah",
+    "Tch", "Hmph", "Whoa!", "What?!", "Hey!", "Wait!", "No!", "Yes.", "Okay.", "Eek!",
+    "Ow!", "Sigh", "Hehe", "Ahaha", "Gasp", "Mm.", "Hmm...", "Uh...", "Uhh...", "Right.",
+)
+
+# (voice ref wav file, exaggeration, cfg, phrase_key)
+PhraseBankKey = tuple[str, float, float, str]
+
+
+def bank_key(voice: str, exaggeration: float, cfg: float, text: str) -> PhraseBankKey:
+    return (voice, float(exaggeration), float(cfg), phrase_key(text))
+
+
+def mine_phrases(ocr_runs: Iterable[dict], top: int = 40, max_chars: int = 16) -> list[str]:
+    """
+    The most frequent short spoken lines across OCR runs, in their most common spelling.
+    """
+    counts: Counter[str] = Counter()
+    spellings: dict[str, Counter[str]] = {}
+    for ocr_json in ocr_runs:
+        for page in iter_ocr_pages(ocr_json, run_id="phrase_bank"):
+            for line in page.lines:
+                text = normalize_line(line.text)
+                if len(text) > max_chars or is_silent(text):
+                    continue
+                key = phrase_key(text)
+                counts[key] += 1
+                spellings.setdefault(key, Counter())[text] += 1
+    return [spellings[key].most_common(1)[0][0] for key, _ in counts.most_common(top)]
+
+
+class PhraseBank:
+    """
+    Pre-rendered takes of frequent short interjections per voice and emotion, held in memory.
+    A line whose phrase_key, voice and emotion params match an entry skips the model entirely.
+    Built offline by scripts/build_phrase_bank.py; a bank for another model or sample rate is ignored.
+    """
+    def __init__(self, entries: Optional[dict[PhraseBankKey, torch.Tensor]] = None):
+        self._entries = entries or {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def load(cls, bank_dir: Path, model_id: str, sample_rate: int) -> "PhraseBank":
+        index_path = Path(bank_dir) / INDEX_FILENAME
+        if not index_path.is_file():
+            return cls()
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("model_id") != model_id or index.get("sample_rate") != sample_rate:
+            print(f"⚠️ Ignoring phrase bank built for {index.get('model_id')} @ {index.get('sample_rate')} Hz: {bank_dir}")
+            return cls()
+        entries: dict[PhraseBankKey, torch.Tensor] = {}
+        for entry in index["entries"]:
+            data, _ = sf.read(str(Path(bank_dir) / entry["file"]), dtype="float32", always_2d=True)
+            key = (entry["voice"], float(entry["exaggeration"]), float(entry["cfg"]), entry["phrase"])
+            entries[key] = torch.from_numpy(data.T.copy())
+        print(f"🗣️ Loaded {len(entries)} phrase bank takes from {bank_dir}")
+        return cls(entries)
+
+    def get(self, req: d.TTSInput) -> Optional[torch.Tensor]:
+        params = req.emotion.params
+        wav = self._entries.get(bank_key(req.speaker.wav_file, params.exaggeration, params.cfg, req.text))
+        with self._lock:
+            if wav is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return wav
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+def build_phrase_bank(
+    backend: "TTSBackend",
+    phrases: Iterable[str],
+    bank_dir: Path
+) -> int:
+    """
+    Render every phrase for every configured voice and emotion into bank_dir and write its index.
+    Returns the number of takes rendered.
+    """
+    ensure_folder(bank_dir)
+    speakers = {speaker.wav_file: speaker for group in s.SPEAKER_GROUPS.values() for speaker in group.values()}
+    phrases = list(dict.fromkeys(normalize_line(p) for p in phrases if not is_silent(normalize_line(p))))
+    entries = []
+    for wav_file, speaker in sorted(speakers.items()):
+        if not (Path(backend.config.voice_ref_dir) / wav_file).is_file():
+            print(f"⚠️ Skipping phrase bank voice, voice ref not found: {wav_file}")
+            continue
+        for emotion in e.EMOTIONS.values():
+            params = emotion.params
+            for text in phrases:
+                key = bank_key(wav_file, params.exaggeration, params.cfg, text)
+                filename = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()[:20] + ".flac"
+                wav = backend.generate_phrase(text, speaker, params)
+                sf.write(str(bank_dir / filename), wav.detach().clamp(-1.0, 1.0).t().cpu().numpy(), backend.sample_rate, format="FLAC")
+                entries.append({
+                    "voice": wav_file,
+                    "exaggeration": params.exaggeration,
+                    "cfg": params.cfg,
+                    "phrase": key[3],
+                    "text": text,
+                    "file": filename,
+                })
+    index = {"model_id": backend.model_id, "sample_rate": backend.sample_rate, "entries": entries}
+    tmp_path = bank_dir / f"{INDEX_FILENAME}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, bank_dir / INDEX_FILENAME)
+    return len(entries)
@@ -0,0 +1,271 @@
+# services/prefetcher.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.services.inference_worker import InferenceWorker
+from app.services.worker_pool import ProcessWorkerPool
+from app.services.metrics import PREFETCH_RENDERS
+from app.utils import log_exception
+
+# How often the idle prefetcher re-checks for spare capacity
+_IDLE_WAIT_S = 0.5
+
+SlotKey = tuple[str, int]
+
+
+def line_fingerprint(req: d.TTSInput) -> str:
+    """
+    Everything that changes the audio of a line; a request whose fingerprint differs from the
+    registered one was edited (text, emotion, speaker, settings) and cannot use its speculative take.
+    """
+    return req.model_dump_json(exclude={"priority"})
+
+
+@dataclass
+class _Line:
+    index: int
+    req: d.TTSInput
+    fingerprint: str
+    future: Optional[Future] = None
+    # pending: not submitted yet, submitted: rendering or rendered, claimed: answered a user request
+    state: str = "pending"
+
+
+@dataclass
+class _Run:
+    run_id: str
+    lines: list[_Line]
+    slots: dict[SlotKey, _Line]
+    # Index after the furthest line the user has requested; the window starts here
+    cursor: int = 0
+    registered_at: float = field(default_factory=time.time)
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+class Prefetcher:
+    """
+    Speculatively renders the upcoming lines of registered runs while the model is idle, so the
+    next page is ready by the time the user asks for it.
+
+    A client registers a run's ordered dialogue list; the prefetcher keeps the next `ahead` lines
+    after the furthest one requested rendered, submitting them at "prewarm" priority only while no
+    interactive or batch request is waiting, and at most max_queued at a time, so a user request
+    waits behind at most one speculative line. Renders are ordinary versioned takes (v1 of an
+    untouched dialogue) and go through the audio cache.
+
+    When the user then requests a line, claim() hands over its render (used), or pulls it out of the
+    queue if it has not started so the request runs at its own priority (promoted). A line whose
+    text, emotion or speaker changed since registration drops its speculative work (cancelled if
+    still queued, wasted if already rendered), as do lines of runs that are re-registered, removed
+    or evicted before being requested.
+    """
+    def __init__(
+        self,
+        worker: InferenceWorker | ProcessWorkerPool,
+        ahead: int = 24,
+        max_queued: int = 1,
+        max_runs: int = 4
+    ):
+        self.worker = worker
+        self.ahead = max(1, ahead)
+        self.max_queued = max(1, max_queued)
+        self.max_runs = max(1, max_runs)
+        self._runs: OrderedDict[str, _Run] = OrderedDict()
+        self._totals: dict[str, int] = {}
+        # Reentrant: cancelling a render under the lock runs its done callback (_on_done) right away.
+        # Never held while calling into the worker: the pool settles futures under its own lock
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="tts-prefetch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout)
+        with self._lock:
+            for run in self._runs.values():
+                for line in run.lines:
+                    if line.state == "submitted" and line.future is not None:
+                        line.future.cancel()
+
+    def notify(self):
+        self._wakeup.set()
+
+    # ---------------------------------------------------------------- accounting
+
+    def _count(self, run: _Run, outcome: str):
+        run.counts[outcome] = run.counts.get(outcome, 0) + 1
+        self._totals[outcome] = self._totals.get(outcome, 0) + 1
+        PREFETCH_RENDERS.inc(outcome=outcome)
+
+    def _discard(self, run: _Run, line: _Line):
+        """
+        Drop a line's speculative work: cancelled if it never started, wasted if it was rendered for nothing.
+        """
+        if line.state == "submitted" and line.future is not None:
+            if line.future.cancel():
+                self._count(run, "cancelled")
+            elif not line.future.done() or line.future.exception() is None:
+                self._count(run, "wasted")
+        line.future = None
+
+    # ---------------------------------------------------------------- runs
+
+    def register(self, run_id: str, reqs: list[d.TTSInput]) -> dict[str, Any]:
+        """
+        Set a run's ordered dialogue list. Lines that are unchanged from a previous registration keep
+        their renders; changed or removed ones drop them.
+        """
+        reqs = [req.model_copy(update={"run_id": run_id}) for req in reqs]
+        lines = [_Line(index=i, req=req, fingerprint=line_fingerprint(req)) for i, req in enumerate(reqs)]
+        with self._lock:
+            previous = self._runs.pop(run_id, None)
+            run = _Run(run_id=run_id, lines=lines, slots={(l.req.image_ref.path, l.req.dialogue_id): l for l in lines})
+            if previous is not None:
+                run.cursor = min(previous.cursor, len(lines))
+                run.counts = previous.counts
+                for old in previous.lines:
+                    new = run.slots.get((old.req.image_ref.path, old.req.dialogue_id))
+                    if new is not None and new.fingerprint == old.fingerprint:
+                        new.future, new.state = old.future, old.state
+                    else:
+                        self._discard(run, old)
+            self._runs[run_id] = run
+            while len(self._runs) > self.max_runs:
+                _, evicted = self._runs.popitem(last=False)
+                for line in evicted.lines:
+                    self._discard(evicted, line)
+            stats = self._run_stats(run)
+        self.notify()
+        return stats
+
+    def unregister(self, run_id: str) -> bool:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return False
+            for line in run.lines:
+                self._discard(run, line)
+            return True
+
+    def claim(self, req: d.TTSInput) -> Optional[Future]:
+        """
+        The speculative render for a user request, or None when the request has to be synthesized
+        (not prefetched, edited since registration, not started yet, or failed).
+        """
+        with self._lock:
+            run = self._runs.get(req.run_id)
+            line = run.slots.get((req.image_ref.path, req.dialogue_id)) if run is not None else None
+            if line is None:
+                return None
+            self._runs.move_to_end(req.run_id)
+            run.cursor = max(run.cursor, line.index + 1)
+            future = None
+            fingerprint = line_fingerprint(req)
+            if line.fingerprint != fingerprint or req.bypass_cache:
+                # Edited line (or an explicit request for a fresh take): the speculative one does not apply
+                self._discard(run, line)
+                line.req, line.fingerprint = req, fingerprint
+            elif line.state == "submitted" and line.future is not None:
+                if line.future.cancel():
+                    self._count(run, "promoted")
+                elif not line.future.done() or line.future.exception() is None:
+                    self._count(run, "used")
+                    future = line.future
+            line.state = "claimed"
+        # The window moved on
+        self.notify()
+        return future
+
+    # ---------------------------------------------------------------- scheduling
+
+    def _idle(self) -> bool:
+        depths = self.worker.queue_depths()
+        return depths.get("interactive", 0) == 0 and depths.get("batch", 0) == 0 and depths.get("prewarm", 0) < self.max_queued
+
+    def _next_line(self) -> Optional[tuple[_Run, _Line]]:
+        # Most recently active run first
+        for run in reversed(self._runs.values()):
+            for line in run.lines[run.cursor:run.cursor + self.ahead]:
+                if line.state == "pending":
+                    return run, line
+        return None
+
+    def _on_done(self, run: _Run, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            with self._lock:
+                self._count(run, "failed")
+        self.notify()
+
+    def _submit(self, run: _Run, line: _Line, req: d.TTSInput):
+        future = self.worker.submit(req.model_copy(update={"priority": "prewarm"}), priority="prewarm")
+        with self._lock:
+            # The line may have been claimed, edited or dropped while the lock was released
+            current = self._runs.get(run.run_id) is run and line.state == "pending" and line.req is req
+            if current:
+                line.future, line.state = future, "submitted"
+                self._count(run, "submitted")
+        if not current:
+            if not future.cancel():
+                with self._lock:
+                    self._count(run, "wasted")
+            return
+        future.add_done_callback(lambda f, run=run: self._on_done(run, f))
+
+    def _run(self):
+        while not self._stop.is_set():
+            candidate = None
+            try:
+                if self._idle():
+                    with self._lock:
+                        candidate = self._next_line()
+                        req = candidate[1].req if candidate is not None else None
+                if candidate is not None:
+                    self._submit(*candidate, req)
+            except ex.TTSQueueFullError:
+                candidate = None
+            except Exception:
+                log_exception("Prefetcher failed to submit a line")
+                candidate = None
+            if candidate is None:
+                self._wakeup.wait(_IDLE_WAIT_S)
+                self._wakeup.clear()
+
+    # ---------------------------------------------------------------- stats
+
+    def _run_stats(self, run: _Run) -> dict[str, Any]:
+        states: dict[str, int] = {}
+        for line in run.lines:
+            states[line.state] = states.get(line.state, 0) + 1
+        return {
+            "run_id": run.run_id,
+            "lines": len(run.lines),
+            "cursor": run.cursor,
+            "registered_at": run.registered_at,
+            "states": states,
+            "renders": dict(run.counts),
+        }
+
+    def run_stats(self, run_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            run = self._runs.get(run_id)
+            return self._run_stats(run) if run is not None else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": len(self._runs),
+                "ahead": self.ahead,
+                "renders": dict(self._totals),
+            }
@@ -0,0 +1,136 @@
+# services/renarration.py
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+from app.models.domain import (
+    domain as d,
+    exceptions as ex,
+    speaker as s
+)
+from app.services.audio_cache import normalize_cache_text
+from app.services.text_normalizer import normalize_line
+
+# Line changes between two OCR runs of a chapter
+UNCHANGED, EDITED, NEW = "unchanged", "edited", "new"
+
+
+def match_text(text: str) -> str:
+    """
+    Text as compared between runs, so OCR re-runs that differ only in spacing, quotes or noise still match.
+    """
+    return normalize_cache_text(normalize_line(text))
+
+
+def load_manifest(manifest_path: Path) -> dict[str, Any]:
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ex.TTSInputError(f"Previous run has no manifest: {manifest_path}")
+
+
+@dataclass
+class LineMatch:
+    change: str
+    # The previous run's manifest entry whose take is carried over (unchanged lines only)
+    previous: Optional[dict[str, Any]] = None
+
+
+class PreviousRun:
+    """
+    The manifest of an earlier narration of the same chapter, indexed for matching the lines of a new OCR run.
+
+    A new line is unchanged when the previous run has a take on the same image with the same text (after
+    normalization), voice (file name and content), emotion parameters and model; of several candidates the one at the same
+    dialogue id wins, then the nearest, so bubbles that only moved keep their takes and repeated lines
+    ("Huh?") pair up in order. Anything else is edited (the previous run had a line at that position) or
+    new, and is synthesized. Each previous take is carried over at most once.
+    """
+    def __init__(
+        self,
+        run_id: str,
+        manifest: dict[str, Any],
+        outputs_root: Path,
+        model_id: str,
+        suffix: str,
+        voice_fingerprint: Callable[[s.Speaker], Optional[str]]
+    ):
+        self.run_id = run_id
+        self.outputs_root = outputs_root
+        self.model_id = model_id
+        self.suffix = suffix
+        self.voice_fingerprint = voice_fingerprint
+        self._by_image: dict[str, list[dict[str, Any]]] = {}
+        for entry in manifest.get("entries", []):
+            self._by_image.setdefault(entry["image"], []).append(entry)
+        self._used: set[int] = set()
+        # Seconds of inference per second of audio in the previous run, for takes that never recorded theirs
+        synthesized = [e for e in manifest.get("entries", []) if e.get("status") == "ok" and e.get("synth_seconds")]
+        audio_seconds = sum(e["audio_seconds"] for e in synthesized)
+        self.synth_rate = sum(e["synth_seconds"] for e in synthesized) / audio_seconds if audio_seconds else 0.0
+
+    def _reusable(self, entry: dict[str, Any], req: d.TTSInput) -> bool:
+        params = req.emotion.params
+        return (
+            entry.get("status") == "ok"
+            and id(entry) not in self._used
+            and match_text(entry["text"]) == match_text(req.text)
+            and entry["speaker_wav"] == req.speaker.wav_file
+            # A ref re-recorded under the same name is another voice; entries from before fingerprints
+            # were recorded only match speakers without a ref file
+            and entry.get("speaker_wav_sha256") == self.voice_fingerprint(req.speaker)
+            and entry["exaggeration"] == params.exaggeration
+            and entry["cfg"] == params.cfg
+            # Manifests from before model ids were recorded are trusted to come from the current model
+            and entry.get("model_id", self.model_id) == self.model_id
+            and Path(entry["audio_path"]).suffix == self.suffix
+            and self.take_path(entry).is_file()
+        )
+
+    def match_image(self, image: str, reqs: list[d.TTSInput]) -> list[LineMatch]:
+        """
+        Match the resolved lines of one image against the previous run, one LineMatch per request in order.
+        """
+        entries = self._by_image.get(image, [])
+        matches: list[Optional[LineMatch]] = [None] * len(reqs)
+        # Same position first, so a moved duplicate cannot take the take of a line that stayed put
+        for i, req in enumerate(reqs):
+            for entry in entries:
+                if entry["dialogue_id"] == req.dialogue_id and self._reusable(entry, req):
+                    self._used.add(id(entry))
+                    matches[i] = LineMatch(UNCHANGED, entry)
+                    break
+        for i, req in enumerate(reqs):
+            if matches[i] is not None:
+                continue
+            candidates = [e for e in entries if self._reusable(e, req)]
+            if candidates:
+                entry = min(candidates, key=lambda e: abs(e["dialogue_id"] - req.dialogue_id))
+                self._used.add(id(entry))
+                matches[i] = LineMatch(UNCHANGED, entry)
+            else:
+                was_there = any(e["dialogue_id"] == req.dialogue_id for e in entries)
+                matches[i] = LineMatch(EDITED if was_there else NEW)
+        return matches
+
+    def take_path(self, entry: dict[str, Any]) -> Path:
+        return self.outputs_root / entry["audio_path"]
+
+    def avoided_seconds(self, entry: dict[str, Any]) -> float:
+        """
+        Inference a carried take saves: what it cost when first synthesized (carried along across re-runs),
+        or its duration at the previous run's synthesis rate for takes that came from the audio cache.
+        """
+        if entry.get("avoided_synth_seconds"):
+            return entry["avoided_synth_seconds"]
+        return entry.get("synth_seconds") or entry.get("audio_seconds", 0.0) * self.synth_rate
+
+    def removed(self) -> int:
+        """
+        Takes of the previous run that no line of the new one carried over.
+        """
+        return sum(
+            1 for entries in self._by_image.values() for e in entries
+            if e.get("status") == "ok" and id(e) not in self._used
+        )
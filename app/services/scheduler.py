@@ -0,0 +1,178 @@
+# services/scheduler.py
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from app.models.domain import domain as d
+
+# Priority classes, most urgent first
+PRIORITIES = ("interactive", "batch", "prewarm")
+_RANK = {name: rank for rank, name in enumerate(PRIORITIES)}
+
+
+def request_priority(req: d.TTSInput, default: str) -> str:
+    """
+    The class a request is scheduled in: its own priority, or the submitting endpoint's default for "auto".
+    """
+    return default if req.priority == "auto" else req.priority
+
+
+def request_cost(req: d.TTSInput) -> float:
+    """
+    Work estimate for fair queuing: characters to synthesize, so a run of long lines gets fewer turns.
+    """
+    return max(1, len(req.text)) * req.num_variants
+
+
+@dataclass(order=True)
+class _Entry:
+    finish: float
+    seq: int
+    item: Any = field(compare=False)
+    priority: str = field(compare=False)
+    flow: str = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+    taken: bool = field(compare=False, default=False)
+
+
+class FairQueue:
+    """
+    Bounded queue that decides which request the model runs next.
+
+    Priority classes are served strictly in order (interactive, then batch, then prewarm), except
+    that a class whose oldest request has waited aging_s is promoted one class per aging_s, so
+    background work is never starved. Within a class, weighted fair queuing across flows (run ids):
+    each request gets a virtual finish time of its flow's previous one plus cost / weight, and the
+    smallest goes first, so one large run cannot monopolize the model while others wait.
+
+    The last reserved slots are kept for interactive requests, so a full batch queue still
+    leaves room for an editor's regenerate. Same interface as queue.Queue where the worker needs it.
+    """
+    def __init__(
+        self,
+        maxsize: int,
+        aging_s: float = 10.0,
+        run_weights: Optional[dict[str, float]] = None,
+        reserved: int = 0
+    ):
+        self.maxsize = max(1, maxsize)
+        self.aging_s = aging_s
+        self.run_weights = run_weights or {}
+        self.reserved = min(max(0, reserved), self.maxsize - 1)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._heaps: dict[str, list[_Entry]] = {p: [] for p in PRIORITIES}
+        # Arrival order per class, for aging; entries already served are skipped lazily
+        self._arrivals: dict[str, deque[_Entry]] = {p: deque() for p in PRIORITIES}
+        self._vtime: dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self._flow_finish: dict[str, dict[str, float]] = {p: {} for p in PRIORITIES}
+        self._size = 0
+        # Set by peek() so the following get() returns that same item
+        self._peeked: Optional[_Entry] = None
+
+    def qsize(self) -> int:
+        with self._cond:
+            return self._size
+
+    def depths(self) -> dict[str, int]:
+        with self._cond:
+            return {p: len(heap) for p, heap in self._heaps.items()}
+
+    def _push(self, item: Any, priority: str, flow: str, cost: float, front: bool = False):
+        if priority not in _RANK:
+            raise ValueError(f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+        if front:
+            finish = self._vtime[priority]
+        else:
+            start = max(self._vtime[priority], self._flow_finish[priority].get(flow, 0.0))
+            finish = start + cost / self.run_weights.get(flow, 1.0)
+            self._flow_finish[priority][flow] = finish
+        entry = _Entry(finish=finish, seq=next(self._seq), item=item, priority=priority, flow=flow)
+        heapq.heappush(self._heaps[priority], entry)
+        self._arrivals[priority].append(entry)
+        self._size += 1
+        self._peeked = None
+        self._cond.notify()
+
+    def put_nowait(self, item: Any, priority: str, flow: str = "", cost: float = 1.0):
+        """
+        Queue an item. Raises queue.Full when the queue (or, below interactive, its unreserved part) is full.
+        """
+        with self._cond:
+            limit = self.maxsize if priority == "interactive" else self.maxsize - self.reserved
+            if self._size >= limit:
+                raise queue.Full
+            self._push(item, priority, flow, cost)
+
+    def requeue(self, item: Any, priority: str, flow: str = ""):
+        """
+        Put an item back at the head of its class (a retry after a worker crash), ignoring the bound.
+        """
+        with self._cond:
+            self._push(item, priority, flow, 0.0, front=True)
+
+    def _oldest(self, priority: str) -> Optional[_Entry]:
+        arrivals = self._arrivals[priority]
+        while arrivals and arrivals[0].taken:
+            arrivals.popleft()
+        return arrivals[0] if arrivals else None
+
+    def _select(self) -> Optional[str]:
+        now = time.monotonic()
+        best, best_rank = None, None
+        for priority in PRIORITIES:
+            oldest = self._oldest(priority)
+            if oldest is None:
+                continue
+            rank = _RANK[priority]
+            if self.aging_s > 0:
+                rank -= int((now - oldest.enqueued_at) / self.aging_s)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = priority, rank
+        return best
+
+    def _pop(self) -> Any:
+        priority = self._peeked.priority if self._peeked is not None else self._select()
+        self._peeked = None
+        entry = heapq.heappop(self._heaps[priority])
+        entry.taken = True
+        self._vtime[priority] = entry.finish
+        if not self._heaps[priority]:
+            # Idle class: every flow starts level again
+            self._flow_finish[priority].clear()
+        self._size -= 1
+        return entry.item
+
+    def peek(self) -> Any:
+        """
+        The item get() would return next, or None when empty.
+        """
+        with self._cond:
+            priority = self._select()
+            if priority is None:
+                return None
+            self._peeked = self._heaps[priority][0]
+            return self._peeked.item
+
+    def get_nowait(self) -> Any:
+        with self._cond:
+            if not self._size:
+                raise queue.Empty
+            return self._pop()
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size > 0, timeout):
+                raise queue.Empty
+            return self._pop()
+
+    def drain(self) -> list[Any]:
+        with self._cond:
+            items = []
+            while self._size:
+                items.append(self._pop())
+            return items
@@ -0,0 +1,107 @@
+# services/take_store.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+from app.models.domain import domain as d
+from app.services.metrics import METRICS
+
+# Content type of each audio_format (see audio_ops.AUDIO_FORMATS), for takes sent as response bodies
+MEDIA_TYPES: dict[str, str] = {
+    "wav": "audio/wav",
+    "flac": "audio/flac",
+    "opus": "audio/ogg",
+}
+
+
+@dataclass
+class RenderedTake:
+    """
+    A take encoded in memory and not written anywhere (see TTSBackend.render_take). Holds what
+    keep_take needs to turn it into a regular versioned take later.
+    """
+    # Resolved request, with the seed the take was generated with
+    req: d.TTSInput
+    out_dir: Path
+    audio: bytes
+    audio_format: str
+    cache_key: str | None = None
+
+
+class TakeStore:
+    """
+    In-memory takes that were returned to a client without being written, kept around so the client
+    can still keep one (persist it as a versioned take) without synthesizing it again.
+
+    Bounded by max_bytes of audio, least recently rendered dropped first, and by ttl_s; a take that
+    is gone can only be regenerated (with its seed, to get the same audio). A take larger than the
+    whole budget is not held at all.
+    """
+    def __init__(self, max_bytes: int, ttl_s: float):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._takes: OrderedDict[str, tuple[RenderedTake, float]] = OrderedDict()
+        self._bytes = 0
+        self.added = 0
+        self.kept = 0
+        self.expired = 0
+        self.too_large = 0
+        METRICS.gauge("tts_take_store_bytes", "Audio held for in-memory takes awaiting keep").set_function(lambda: self._bytes)
+
+    def _drop(self, take_id: str) -> RenderedTake:
+        take, _ = self._takes.pop(take_id)
+        self._bytes -= len(take.audio)
+        return take
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_s
+        while self._takes:
+            take_id, (take, added_at) = next(iter(self._takes.items()))
+            if added_at >= cutoff and self._bytes <= self.max_bytes:
+                return
+            self._drop(take_id)
+            self.expired += 1
+
+    def put(self, take: RenderedTake, take_id: Optional[str] = None) -> Optional[str]:
+        """
+        Hold a take and return its id, or None when it is larger than max_bytes and cannot be kept later.
+        Older takes are evicted to make room; the new one, fitting the budget on its own, never is.
+        """
+        take_id = take_id or uuid.uuid4().hex
+        with self._lock:
+            if take_id in self._takes:
+                self._drop(take_id)
+            if len(take.audio) > self.max_bytes:
+                self.too_large += 1
+                return None
+            self._takes[take_id] = (take, time.monotonic())
+            self._bytes += len(take.audio)
+            self.added += 1
+            self._expire()
+        return take_id
+
+    def pop(self, take_id: str) -> Optional[RenderedTake]:
+        with self._lock:
+            self._expire()
+            return self._drop(take_id) if take_id in self._takes else None
+
+    def mark_kept(self):
+        with self._lock:
+            self.kept += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                "takes": len(self._takes),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "added": self.added,
+                "kept": self.kept,
+                "expired": self.expired,
+                "too_large": self.too_large,
+            }
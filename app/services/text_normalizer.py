@@ -0,0 +1,79 @@
+# services/text_normalizer.py
+import re
+import unicodedata
+from app.models.domain import domain as d
+
+# OCR noise and decoration that has no sound: hearts, stars, notes, elongation tildes, reference marks
+_NOISE = re.compile(r"[♡♥❤❣☆★♪♫♬~〜～※*＊]+")
+_CJK_OPEN_QUOTE = re.compile(r"[「『„‟]")
+_CJK_CLOSE_QUOTE = re.compile(r"[」』]")
+_APOSTROPHE = re.compile(r"[‘’`´]")
+# Paired straight quotes become curly so the segmenter sees the dialogue boundary
+_STRAIGHT_QUOTED = re.compile(r'"([^"\n]*)"')
+_ELLIPSIS = re.compile(r"\.(?: ?\.)+|[・。]{2,}|…(?: ?…)*")
+_MIXED_MARKS = re.compile(r"[?!]*(?:\?!|!\?)[?!]*")
+_REPEATED_MARK = re.compile(r"([?!,])\1+")
+_SPACE_BEFORE_MARK = re.compile(r"[ \t]+(?=[?!.,;:…”»)])")
+_INLINE_SPACE = re.compile(r"[ \t　 ]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+# A letter or digit in any script; a line without one has nothing to say
+_SPEAKABLE = re.compile(r"[^\W_]")
+_WORD = re.compile(r"[^\W_]+(?:['-][^\W_]+)*")
+
+SILENT_LINE_MIN_MS = 300
+SILENT_ELLIPSIS_MS = 400
+SILENT_LINE_MAX_MS = 1500
+
+
+def normalize_line(text: str) -> str:
+    """
+    Canonical form of an OCR'd line: unicode width/compat forms, quotes, ellipses, repeated
+    punctuation, noise characters and whitespace. Paragraph breaks and '>' lines are kept for
+    the segmenter.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _NOISE.sub("", text)
+    text = _CJK_OPEN_QUOTE.sub("“", text)
+    text = _CJK_CLOSE_QUOTE.sub("”", text)
+    text = _APOSTROPHE.sub("'", text)
+    text = _STRAIGHT_QUOTED.sub(r"“\1”", text)
+    text = _ELLIPSIS.sub("…", text)
+    text = _MIXED_MARKS.sub("?!", text)
+    text = _REPEATED_MARK.sub(r"\1", text)
+    text = _SPACE_BEFORE_MARK.sub("", text)
+    lines = [_INLINE_SPACE.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def is_silent(text: str) -> bool:
+    """
+    True for lines with nothing to pronounce ("...", "!?", OCR noise): they get silence, not inference.
+    """
+    return _SPEAKABLE.search(text) is None
+
+
+def silence_ms(text: str) -> int:
+    """
+    Pause length for a silent line: a beat for "!?", longer for each trailing-off ellipsis.
+    """
+    return min(SILENT_LINE_MAX_MS, max(SILENT_LINE_MIN_MS, text.count("…") * SILENT_ELLIPSIS_MS))
+
+
+def phrase_key(text: str) -> str:
+    """
+    Lookup key for the phrase bank: lowercase words plus the intonation of the ending,
+    so "Huh??", "huh ?" and "HUH?" share an entry but "Huh!" does not.
+    """
+    text = normalize_line(text).lower()
+    words = " ".join(_WORD.findall(text))
+    tail = text[-3:]
+    mark = "?" if "?" in tail else "!" if "!" in tail else ""
+    return words + mark
+
+
+def dedupe_key(req: d.TTSInput) -> tuple[str, str, float, float, int | None]:
+    """
+    Resolved lines with the same key produce the same audio, so a batch generates them once.
+    """
+    params = req.emotion.params
+    return (req.text, req.speaker.wav_file, params.exaggeration, params.cfg, req.seed)
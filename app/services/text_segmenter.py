@@ -0,0 +1,96 @@
+# services/text_segmenter.py
+import re
+from dataclasses import dataclass
+
+# Sentence ends (. ! ? … and "..."), optionally followed by one closing quote/bracket
+_SENTENCE_BREAK = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"”’»)\]]))\s+")
+# Dialogue boundaries inside a line: before an opening quote, after a closing one
+_QUOTE_BREAK = re.compile(r"\s+(?=[“«])|(?<=[”»])\s+")
+_CLAUSE_BREAK = re.compile(r"(?<=[,;:—–])\s+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_BLOCKQUOTE = re.compile(r"^\s*>\s?")
+
+
+@dataclass(frozen=True)
+class TextSegment:
+    text: str
+    # True when a paragraph or blockquote boundary follows, so a longer pause fits there
+    paragraph_end: bool = False
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces: list[str] = []
+    for clause in _CLAUSE_BREAK.split(sentence):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+            continue
+        # No punctuation to break on; wrap on words
+        words, current = clause.split(), ""
+        for word in words:
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        if current:
+            pieces.append(current)
+    return pieces
+
+
+def _pack(sentences: list[str], max_chars: int) -> list[str]:
+    """
+    Greedily merge short sentences so tiny interjections don't each pay for a generate call.
+    """
+    chunks: list[str] = []
+    current = ""
+    for sentence in sentences:
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _blocks(text: str) -> list[str]:
+    """
+    Split into paragraphs, with every '>' blockquote line standing on its own.
+    """
+    blocks: list[str] = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        prose: list[str] = []
+        for line in paragraph.splitlines():
+            if _BLOCKQUOTE.match(line):
+                if prose:
+                    blocks.append(" ".join(prose))
+                    prose = []
+                blocks.append(_BLOCKQUOTE.sub("", line, count=1))
+            elif line.strip():
+                prose.append(line.strip())
+        if prose:
+            blocks.append(" ".join(prose))
+    return [block.strip() for block in blocks if block.strip()]
+
+
+def segment_text(text: str, max_chars: int = 280) -> list[TextSegment]:
+    """
+    Split narration text into synthesis-sized chunks on paragraph, blockquote, dialogue and sentence
+    boundaries. Chunks never span two paragraphs and stay under max_chars where the text allows.
+    """
+    segments: list[TextSegment] = []
+    for block in _blocks(text):
+        chunks: list[str] = []
+        # Quoted speech and narration are packed separately so a chunk never straddles a quote
+        for part in _QUOTE_BREAK.split(block):
+            sentences = [s.strip() for s in _SENTENCE_BREAK.split(part) if s.strip()]
+            chunks.extend(_pack(sentences, max_chars))
+        segments.extend(
+            TextSegment(text=chunk, paragraph_end=(i == len(chunks) - 1))
+            for i, chunk in enumerate(chunks)
+        )
+    return segments
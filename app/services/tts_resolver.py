@@ -3,8 +3,31 @@ from app.models.domain.emotion import Emotion, EMOTIONS, DEFAULT_EMOTION
 from app.models.domain.speaker import Speaker, SPEAKER_GROUPS, DEFAULT_GROUP, DEFAULT_SPEAKER
 from app.models.domain.gender import Gender, GENDERS, DEFAULT_GENDER
 from app.models.domain.emotion_params import EmotionParams
+from app.services.voice_registry import VoiceRegistry
 from typing import Optional
 
+# Set at startup when the voice store is enabled; its voices extend SPEAKER_GROUPS
+_voice_registry: Optional[VoiceRegistry] = None
+
+
+def set_voice_registry(registry: Optional[VoiceRegistry]):
+    global _voice_registry
+    _voice_registry = registry
+
+
+def speaker_groups() -> dict[str, dict[str, Speaker]]:
+    """
+    Built-in speakers plus the voices indexed in the voice store, by gender group.
+    Built-ins keep their names; indexed voices of an unknown gender join the default group.
+    """
+    if _voice_registry is None:
+        return SPEAKER_GROUPS
+    groups = {name: dict(group) for name, group in SPEAKER_GROUPS.items()}
+    for voice in _voice_registry.voices():
+        group = groups.get(voice.gender, groups[DEFAULT_GROUP])
+        group.setdefault(voice.name, voice.speaker())
+    return groups
+
 def resolve_emotion(
     emotion_name: str | None,
     customSettings: Optional[EmotionParams] = None
@@ -27,9 +50,10 @@ def resolve_speaker(
     gender: Gender,
     speaker: Optional[Speaker] = None,
 ) -> Speaker:
-    speaker_group = SPEAKER_GROUPS.get(
+    groups = speaker_groups()
+    speaker_group = groups.get(
         gender.value,
-        SPEAKER_GROUPS[DEFAULT_GROUP],
+        groups[DEFAULT_GROUP],
     )
 
     if not speaker or speaker.name not in speaker_group:
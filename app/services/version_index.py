@@ -0,0 +1,206 @@
+# services/version_index.py
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+from app.utils import ensure_folder, list_version_files
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    run_id       TEXT NOT NULL,
+    image        TEXT NOT NULL,
+    dialogue_id  INTEGER NOT NULL,
+    last_version INTEGER NOT NULL,
+    PRIMARY KEY (run_id, image, dialogue_id)
+);
+CREATE TABLE IF NOT EXISTS takes (
+    run_id       TEXT NOT NULL,
+    image        TEXT NOT NULL,
+    dialogue_id  INTEGER NOT NULL,
+    version      INTEGER NOT NULL,
+    filename     TEXT NOT NULL,
+    created_at   REAL NOT NULL,
+    meta         TEXT,
+    PRIMARY KEY (run_id, image, dialogue_id, version)
+);
+CREATE TABLE IF NOT EXISTS pins (
+    run_id       TEXT NOT NULL,
+    image        TEXT NOT NULL,
+    dialogue_id  INTEGER NOT NULL,
+    version      INTEGER NOT NULL,
+    PRIMARY KEY (run_id, image, dialogue_id)
+);
+"""
+
+_TAKE_COLUMNS = "t.run_id, t.image, t.dialogue_id, t.version, t.filename, t.created_at, t.meta"
+
+
+def _take_dict(row: tuple) -> dict[str, Any]:
+    return {
+        "run_id": row[0],
+        "image": row[1],
+        "dialogue_id": row[2],
+        "version": row[3],
+        "filename": row[4],
+        "path": f"{row[0]}/{row[1]}/dialogue__{row[2]}/{row[4]}",
+        "created_at": row[5],
+        **(json.loads(row[6]) if row[6] else {}),
+    }
+
+# (run_id, image folder relative to the run folder as a posix path, dialogue_id)
+DialogueKey = tuple[str, str, int]
+
+
+class VersionIndex:
+    """
+    Atomic take-version allocator and take listing, backed by SQLite on local disk.
+
+    reserve() is one IMMEDIATE transaction, so concurrent requests (threads or pool
+    processes sharing the file) never get the same version. The dialogue folder is
+    listed only the first time a dialogue is seen, to seed its counter from takes
+    written before the index existed.
+
+    Versions are only unique among processes sharing this file. Nodes with their own
+    index writing the same run into a shared output folder will hand out the same
+    versions; give each node its own runs (or media_namespace).
+    """
+    def __init__(self, db_path: Path):
+        ensure_folder(db_path.parent)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # Dialogues whose counter row is known to exist, with the last version we handed out
+        self._seeded: dict[DialogueKey, int] = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def reserve(self, key: DialogueKey, dialogue_folder: Path, count: int = 1) -> int:
+        """
+        Reserve the next version number for a dialogue, or a block of count consecutive
+        versions (take variants), returning the first.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if key not in self._seeded:
+                    self._seed(key, dialogue_folder)
+                self._conn.execute(
+                    "UPDATE counters SET last_version = last_version + ? WHERE run_id = ? AND image = ? AND dialogue_id = ?",
+                    (count, *key)
+                )
+                (version,) = self._conn.execute(
+                    "SELECT last_version FROM counters WHERE run_id = ? AND image = ? AND dialogue_id = ?",
+                    key
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._seeded[key] = version
+            return version - count + 1
+
+    def _seed(self, key: DialogueKey, dialogue_folder: Path):
+        exists = self._conn.execute(
+            "SELECT 1 FROM counters WHERE run_id = ? AND image = ? AND dialogue_id = ?",
+            key
+        ).fetchone()
+        if exists:
+            return
+        # Cold start for this dialogue: adopt whatever takes are already on disk
+        files = list_version_files(dialogue_folder) if dialogue_folder.is_dir() else {}
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO takes (run_id, image, dialogue_id, version, filename, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(*key, version, path.name, now) for version, path in files.items()]
+        )
+        self._conn.execute(
+            "INSERT INTO counters (run_id, image, dialogue_id, last_version) VALUES (?, ?, ?, ?)",
+            (*key, max(files, default=0))
+        )
+
+    def record_take(
+        self,
+        key: DialogueKey,
+        version: int,
+        filename: str,
+        meta: Optional[dict[str, Any]] = None
+    ):
+        """
+        Register a take once its file is in place.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO takes (run_id, image, dialogue_id, version, filename, created_at, meta) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, version, filename, time.time(), json.dumps(meta) if meta else None)
+            )
+
+    def list_takes(
+        self,
+        run_id: str,
+        image: Optional[str] = None,
+        dialogue_id: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """
+        All recorded takes of a run (optionally one image / dialogue), oldest version first.
+        """
+        query = f"SELECT {_TAKE_COLUMNS} FROM takes t WHERE t.run_id = ?"
+        params: list[Any] = [run_id]
+        if image is not None:
+            query += " AND t.image = ?"
+            params.append(image)
+        if dialogue_id is not None:
+            query += " AND t.dialogue_id = ?"
+            params.append(dialogue_id)
+        query += " ORDER BY t.image, t.dialogue_id, t.version"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_take_dict(row) for row in rows]
+
+    def pin_take(self, key: DialogueKey, version: int) -> bool:
+        """
+        Use this version of a dialogue in chapter assembly instead of the latest. False if no such take is recorded.
+        """
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM takes WHERE run_id = ? AND image = ? AND dialogue_id = ? AND version = ?",
+                (*key, version)
+            ).fetchone()
+            if exists:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pins (run_id, image, dialogue_id, version) VALUES (?, ?, ?, ?)",
+                    (*key, version)
+                )
+            return bool(exists)
+
+    def unpin_take(self, key: DialogueKey) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM pins WHERE run_id = ? AND image = ? AND dialogue_id = ?",
+                key
+            )
+            return cursor.rowcount > 0
+
+    def selected_takes(self, run_id: str, engine: Optional[str] = None) -> list[dict[str, Any]]:
+        """
+        One take per dialogue of a run: the pinned version, otherwise the latest recorded one.
+        With an engine, only takes of that engine (or with no engine recorded) count as latest, so
+        drafts and overload takes of another engine are used only when pinned.
+        """
+        query = f"""
+            SELECT {_TAKE_COLUMNS}, p.version IS NOT NULL FROM takes t
+            LEFT JOIN pins p ON p.run_id = t.run_id AND p.image = t.image AND p.dialogue_id = t.dialogue_id
+            WHERE t.run_id = ? AND t.version = COALESCE(p.version, (
+                SELECT MAX(m.version) FROM takes m
+                WHERE m.run_id = t.run_id AND m.image = t.image AND m.dialogue_id = t.dialogue_id
+                AND (? IS NULL OR COALESCE(json_extract(m.meta, '$.engine'), ?) = ?)
+            ))
+            ORDER BY t.image, t.dialogue_id
+        """
+        with self._lock:
+            rows = self._conn.execute(query, (run_id, engine, engine, engine)).fetchall()
+        return [{**_take_dict(row), "pinned": bool(row[7])} for row in rows]
@@ -0,0 +1,183 @@
+# services/voice_registry.py
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+import yaml
+from app.models.domain import speaker as s
+from app.models.domain.gender import GENDERS, DEFAULT_GENDER
+from app.services.audio_cache import file_hash
+from app.utils import ensure_folder
+
+INDEX_FILENAME = "index.json"
+# Optional sidecar in voice_ref_dir: {wav_file: {name, gender, tags}}
+VOICE_META_FILENAME = "voices.yaml"
+AUDIO_SUFFIXES = (".wav", ".flac", ".mp3", ".ogg")
+
+
+@dataclass
+class VoiceInfo:
+    name: str
+    gender: str
+    wav_file: str
+    tags: list[str] = field(default_factory=list)
+    # Source file fingerprint when the conditionals were computed
+    sha256: str = ""
+    size: int = 0
+    mtime: float = 0.0
+    # Serialized conditionals, relative to the store; empty until built
+    conds_file: str = ""
+
+    def speaker(self) -> s.Speaker:
+        return s.Speaker(
+            name=self.name,
+            wav_file=self.wav_file,
+            gender=GENDERS.get(self.gender, GENDERS[DEFAULT_GENDER])
+        )
+
+
+class VoiceRegistry:
+    """
+    Index of the voices under voice_ref_dir and of their precomputed conditionals in store_dir.
+
+    The index (store_dir/index.json) is written by scripts/build_voice_store.py and read lazily,
+    re-read whenever the file changes, so listing voices never needs the model. A stored entry
+    is only used while its source wav is unchanged (size and mtime, or content hash after a touch).
+    """
+    def __init__(
+        self,
+        store_dir: Path,
+        voice_ref_dir: Path,
+        speaker_map: Optional[dict[str, dict[str, str]]] = None
+    ):
+        self.store_dir = Path(store_dir)
+        self.voice_ref_dir = Path(voice_ref_dir)
+        self.speaker_map = speaker_map or {}
+        self._lock = threading.Lock()
+        self._index_mtime: Optional[float] = None
+        self._model_id = ""
+        self._voices: dict[str, VoiceInfo] = {}
+
+    def _reload(self):
+        index_path = self.store_dir / INDEX_FILENAME
+        try:
+            mtime = index_path.stat().st_mtime
+        except OSError:
+            self._index_mtime, self._model_id, self._voices = None, "", {}
+            return
+        if mtime == self._index_mtime:
+            return
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self._index_mtime = mtime
+        self._model_id = index.get("model_id", "")
+        self._voices = {v["wav_file"]: VoiceInfo(**v) for v in index.get("voices", [])}
+
+    @property
+    def model_id(self) -> str:
+        with self._lock:
+            self._reload()
+            return self._model_id
+
+    def voices(self) -> list[VoiceInfo]:
+        with self._lock:
+            self._reload()
+            return list(self._voices.values())
+
+    def get(self, wav_file: str) -> Optional[VoiceInfo]:
+        with self._lock:
+            self._reload()
+            return self._voices.get(wav_file)
+
+    def is_fresh(self, info: VoiceInfo) -> bool:
+        """
+        Whether the source wav still matches what the stored conditionals were computed from.
+        """
+        try:
+            st = (self.voice_ref_dir / info.wav_file).stat()
+        except OSError:
+            return False
+        if (st.st_size, st.st_mtime) == (info.size, info.mtime):
+            return True
+        return st.st_size == info.size and file_hash(self.voice_ref_dir / info.wav_file) == info.sha256
+
+    def stored_conditionals(self, wav_file: str, model_id: str) -> Optional[Path]:
+        """
+        Path of the stored conditionals for a voice ref, or None when missing, built by another model or stale.
+        """
+        info = self.get(wav_file)
+        if info is None or not info.conds_file or self.model_id != model_id:
+            return None
+        if not self.is_fresh(info):
+            print(f"⚠️ Voice ref changed since the voice store was built, recomputing: {wav_file}")
+            return None
+        return self.store_dir / info.conds_file
+
+    def _metadata(self) -> dict[str, dict[str, Any]]:
+        """
+        Per-file name/gender/tags: voices.yaml first, then speaker_map.yaml, then the filename prefix.
+        """
+        meta: dict[str, dict[str, Any]] = {}
+        for gender, voices in self.speaker_map.items():
+            for name, wav_file in (voices or {}).items():
+                meta.setdefault(wav_file, {"name": name, "gender": gender})
+        sidecar = self.voice_ref_dir / VOICE_META_FILENAME
+        if sidecar.is_file():
+            with open(sidecar, "r", encoding="utf-8") as f:
+                for wav_file, entry in (yaml.safe_load(f) or {}).items():
+                    meta[wav_file] = {**meta.get(wav_file, {}), **(entry or {})}
+        return meta
+
+    def scan(self) -> list[VoiceInfo]:
+        """
+        Every audio file under voice_ref_dir with its metadata and current fingerprint (conditionals not built).
+        """
+        meta = self._metadata()
+        voices: list[VoiceInfo] = []
+        taken: set[tuple[str, str]] = set()
+        for path in sorted(p for p in self.voice_ref_dir.iterdir() if p.suffix.lower() in AUDIO_SUFFIXES):
+            entry = meta.get(path.name, {})
+            prefix = path.stem.split("_", 1)[0].lower()
+            gender = entry.get("gender") or (prefix if prefix in ("female", "male") else DEFAULT_GENDER)
+            name = entry.get("name") or path.stem
+            if (gender, name) in taken:
+                name = path.stem
+            taken.add((gender, name))
+            st = path.stat()
+            voices.append(VoiceInfo(
+                name=name,
+                gender=gender,
+                wav_file=path.name,
+                tags=list(entry.get("tags", [])),
+                sha256=file_hash(path),
+                size=st.st_size,
+                mtime=st.st_mtime,
+            ))
+        return voices
+
+    def write_index(self, voices: list[VoiceInfo], model_id: str):
+        ensure_folder(self.store_dir)
+        index = {"model_id": model_id, "built_at": time.time(), "voices": [asdict(v) for v in voices]}
+        tmp_path = self.store_dir / f"{INDEX_FILENAME}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.store_dir / INDEX_FILENAME)
+
+    def listing(self) -> list[dict[str, Any]]:
+        """
+        Indexed voices for /tts/speakers, with whether their stored conditionals are usable.
+        """
+        return [
+            {
+                "name": v.name,
+                "gender": v.gender,
+                "wav_file": v.wav_file,
+                "tags": v.tags,
+                "stored": bool(v.conds_file),
+                "fresh": self.is_fresh(v),
+            }
+            for v in self.voices()
+        ]
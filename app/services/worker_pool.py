@@ -0,0 +1,532 @@
+# services/worker_pool.py
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from app.models.domain import (
+    domain as d,
+    exceptions as ex
+)
+from app.models.api import TTSOutput
+from app.utils import log_exception, STARTUP
+from app.services.memory import MemoryGovernor, rss_bytes, trim_memory
+from app.services.metrics import METRICS, QUEUE_WAIT_SECONDS, Trace, traced
+from app.services.scheduler import FairQueue, request_cost, request_priority
+from app.services.take_store import RenderedTake
+
+# How often the dispatcher re-checks worker health when nothing else wakes it
+_POLL_INTERVAL_S = 0.5
+# A task that was running on a crashed worker is retried this many times before failing
+_MAX_CRASH_RETRIES = 1
+# A worker that dies before its model is loaded is respawned after a backoff doubling from
+# _RESTART_BACKOFF_S up to _RESTART_BACKOFF_MAX_S, and given up on after _MAX_LOAD_FAILURES in a row
+_RESTART_BACKOFF_S = 1.0
+_RESTART_BACKOFF_MAX_S = 60.0
+_MAX_LOAD_FAILURES = 5
+
+
+def routing_key(req: d.TTSInput) -> tuple[str, str, str]:
+    """
+    Requests with the same key resolve to the same voice, so a worker that served one
+    already holds the conditionals for the next.
+    """
+    return (req.gender.value, req.speaker.name, req.emotion.name)
+
+
+def _dump_exception(e: Exception) -> bytes:
+    try:
+        return pickle.dumps(e)
+    except Exception:
+        return pickle.dumps(ex.TTSSynthesisError(f"{type(e).__name__}: {e}"))
+
+
+def _worker_main(
+    worker_id: int,
+    threads: int,
+    cpu_ids: Optional[list[int]],
+    task_q: mp.Queue,
+    result_q: mp.Queue,
+    cancel_event
+):
+    """
+    Entry point of a pool process: load the model once, then serve tasks until told to stop.
+    """
+    # Must be set before torch is imported to bound its OpenMP/MKL pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cpu_ids and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpu_ids)
+
+    from app.config import TTSConfig
+    with STARTUP.phase("imports", f"📦 Import TTS runtime (pool worker {worker_id})"):
+        import torch
+        from app.tts_runner import TTSRunner
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    config = TTSConfig()
+    runner = TTSRunner(config)
+    runner.warm_up()
+    result_q.put(("ready", worker_id, None))
+
+    def emit_for(task_id: int) -> Callable[[bytes], bool]:
+        def emit(chunk: bytes) -> bool:
+            if cancel_event.is_set():
+                return False
+            result_q.put(("chunk", worker_id, (task_id, chunk)))
+            return True
+        return emit
+
+    # Trim the allocator once per busy spell, after a whole interval without a task
+    trim_interval_s = config.memory_trim_interval_s or None
+    trimmed = True
+    while True:
+        try:
+            task = task_q.get(timeout=trim_interval_s)
+        except queue.Empty:
+            if not trimmed:
+                trim_memory()
+                trimmed = True
+            continue
+        trimmed = False
+        if task is None:
+            return
+        task_id, kind, req_json, trace_id, data = task
+        cancel_event.clear()
+        trace = Trace(trace_id) if trace_id else None
+        try:
+            req = d.TTSInput.model_validate_json(req_json)
+            with traced(trace):
+                if kind == "stream":
+                    runner.stream_line(req, emit_for(task_id))
+                    payload = None
+                elif kind == "render":
+                    # Sent back as is: the encoded audio crosses to the server once, with no file in between
+                    payload = runner.render_line(req)
+                elif kind == "keep":
+                    payload = runner.keep_take(data).result().model_dump_json()
+                else:
+                    payload = runner.generate_line(req).model_dump_json()
+            if trace is not None:
+                trace.log(run_id=req.run_id, dialogue_id=req.dialogue_id, worker=worker_id)
+            result_q.put(("done", worker_id, (task_id, payload, runner.backend.cache_stats(), METRICS.snapshot())))
+        except Exception as e:
+            if trace is not None:
+                trace.log(worker=worker_id, error=f"{type(e).__name__}: {e}")
+            result_q.put(("error", worker_id, (task_id, _dump_exception(e))))
+
+
+@dataclass
+class PoolTask:
+    task_id: int
+    kind: str
+    req: d.TTSInput
+    future: Future
+    emit: Optional[Callable[[bytes], bool]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+    deadline: Optional[float] = None
+    attempts: int = 0
+    trace_id: Optional[str] = None
+    priority: str = "interactive"
+    # Sent along with the request: the RenderedTake of a keep task
+    data: Any = None
+
+
+@dataclass
+class _WorkerHandle:
+    worker_id: int
+    cpu_ids: Optional[list[int]]
+    process: Any = None
+    task_q: Any = None
+    cancel_event: Any = None
+    ready: bool = False
+    inflight: dict[int, PoolTask] = field(default_factory=dict)
+    warm: set[tuple[str, str, str]] = field(default_factory=set)
+    restarts: int = 0
+    # Deaths before the model finished loading since the worker was last ready
+    load_failures: int = 0
+    # When a dead worker is due to be respawned; None while it is alive
+    restart_at: Optional[float] = None
+    # Failed to load _MAX_LOAD_FAILURES times in a row and is no longer restarted
+    given_up: bool = False
+    completed: int = 0
+    cache_stats: dict = field(default_factory=dict)
+    # Latest metrics snapshot of the worker process, re-exported by the server's /metrics
+    metrics: list = field(default_factory=list)
+
+
+class ProcessWorkerPool:
+    """
+    N worker processes, each holding its own model with a share of the CPU threads.
+    Drop-in for InferenceWorker: submit() returns a future and a bounded pending queue
+    gives the same backpressure. The dispatcher sends each request to the least-loaded
+    worker, preferring one that already has the request's voice warm, and restarts
+    workers that die (with backoff, and not forever, when they die while loading the model).
+
+    With a MemoryGovernor, admission is checked against the RSS of the whole pool (see rss_bytes).
+    """
+    def __init__(
+        self,
+        num_workers: int,
+        threads_per_worker: int = 0,
+        max_queue_depth: int = 16,
+        max_inflight_per_worker: int = 1,
+        pin_cpus: bool = True,
+        aging_s: float = 10.0,
+        run_weights: Optional[dict[str, float]] = None,
+        interactive_reserve: int = 0,
+        memory: Optional[MemoryGovernor] = None
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.memory = memory
+        self.num_workers = max(1, num_workers)
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.max_queue_depth = max(1, max_queue_depth)
+        self.max_inflight_per_worker = max(1, max_inflight_per_worker)
+        self._ctx = mp.get_context("spawn")
+        self._result_q = self._ctx.Queue()
+        # Scheduled like the InferenceWorker's queue (see FairQueue); only touched under _cond
+        self._pending = FairQueue(self.max_queue_depth, aging_s, run_weights, interactive_reserve)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._next_task_id = 0
+        self._workers = [
+            _WorkerHandle(
+                worker_id=i,
+                cpu_ids=(
+                    list(range(i * self.threads_per_worker, (i + 1) * self.threads_per_worker))
+                    if pin_cpus and self.num_workers * self.threads_per_worker <= cpu_count else None
+                )
+            )
+            for i in range(self.num_workers)
+        ]
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="tts-pool-dispatch", daemon=True)
+        self._collector = threading.Thread(target=self._collect_loop, name="tts-pool-collect", daemon=True)
+        self.rejected = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.expired = 0
+
+    # ---------------------------------------------------------------- lifecycle
+
+    def start(self):
+        for handle in self._workers:
+            self._spawn(handle)
+        self._collector.start()
+        self._dispatcher.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+            pending = self._pending.drain()
+        for task in pending:
+            task.future.cancel()
+        for handle in self._workers:
+            handle.task_q.put(None)
+        for handle in self._workers:
+            handle.process.join(timeout)
+            if handle.process.is_alive():
+                handle.process.terminate()
+            for task in handle.inflight.values():
+                task.future.cancel()
+        self._dispatcher.join(timeout)
+        self._collector.join(timeout)
+
+    def _spawn(self, handle: _WorkerHandle):
+        handle.task_q = self._ctx.Queue()
+        handle.cancel_event = self._ctx.Event()
+        handle.ready = False
+        handle.warm.clear()
+        handle.process = self._ctx.Process(
+            target=_worker_main,
+            args=(handle.worker_id, self.threads_per_worker, handle.cpu_ids, handle.task_q, self._result_q, handle.cancel_event),
+            name=f"tts-pool-worker-{handle.worker_id}",
+            daemon=True
+        )
+        handle.process.start()
+        print(f"🧵 Started TTS pool worker {handle.worker_id} (pid {handle.process.pid}, {self.threads_per_worker} threads)")
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every worker has loaded its model. False on timeout, or as soon as a worker
+        has been given up on after failing to load repeatedly.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not all(h.ready for h in self._workers):
+                if any(h.given_up for h in self._workers):
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(_POLL_INTERVAL_S if remaining is None else min(remaining, _POLL_INTERVAL_S))
+            return True
+
+    # ---------------------------------------------------------------- submission
+
+    @property
+    def queue_depth(self) -> int:
+        with self._cond:
+            return self._pending.qsize()
+
+    def queue_depths(self) -> dict[str, int]:
+        with self._cond:
+            return self._pending.depths()
+
+    def rss_bytes(self) -> int:
+        """
+        Resident memory of the pool: this process plus every live worker process.
+        """
+        return rss_bytes() + sum(rss_bytes(h.process.pid) for h in self._workers if h.process is not None)
+
+    def submit(
+        self,
+        req: d.TTSInput,
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        return self._enqueue("line", req, timeout, trace_id=trace_id, priority=priority)
+
+    def submit_stream(
+        self,
+        req: d.TTSInput,
+        emit: Callable[[bytes], bool],
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        return self._enqueue("stream", req, timeout, emit, trace_id, priority)
+
+    def submit_render(
+        self,
+        req: d.TTSInput,
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive"
+    ) -> Future:
+        """
+        Queue a request for an in-memory take; the future settles with the RenderedTake.
+        """
+        return self._enqueue("render", req, timeout, trace_id=trace_id, priority=priority)
+
+    def submit_keep(
+        self,
+        take: RenderedTake,
+        timeout: Optional[float] = None,
+        trace_id: Optional[str] = None
+    ) -> Future:
+        """
+        Persist an in-memory take through a worker (the pool process holds no writer or version allocator).
+        """
+        return self._enqueue("keep", take.req, timeout, trace_id=trace_id, data=take)
+
+    def _enqueue(
+        self,
+        kind: str,
+        req: d.TTSInput,
+        timeout: Optional[float],
+        emit: Optional[Callable[[bytes], bool]] = None,
+        trace_id: Optional[str] = None,
+        priority: str = "interactive",
+        data: Any = None
+    ) -> Future:
+        if self._stop.is_set():
+            raise RuntimeError("Worker pool is stopped.")
+        reservation = self.memory.admit(req) if self.memory is not None else 0
+        with self._cond:
+            task = PoolTask(
+                task_id=self._next_task_id + 1,
+                kind=kind,
+                req=req,
+                future=Future(),
+                emit=emit,
+                trace_id=trace_id,
+                priority=request_priority(req, priority),
+                data=data
+            )
+            if timeout is not None:
+                task.deadline = task.enqueued_at + timeout
+            try:
+                self._pending.put_nowait(task, task.priority, req.run_id, request_cost(req))
+            except queue.Full:
+                self.rejected += 1
+                if self.memory is not None:
+                    self.memory.release(reservation)
+                raise ex.TTSQueueFullError(f"Inference queue is full ({self.max_queue_depth} pending)")
+            self._next_task_id += 1
+            self._cond.notify_all()
+        if self.memory is not None:
+            task.future.add_done_callback(lambda _: self.memory.release(reservation))
+        return task.future
+
+    # ---------------------------------------------------------------- dispatch
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            with self._cond:
+                self._restart_crashed()
+                self._assign_pending()
+                self._cond.wait(_POLL_INTERVAL_S)
+
+    def _pick_worker(self, task: PoolTask) -> Optional[_WorkerHandle]:
+        candidates = [
+            h for h in self._workers
+            if h.ready and len(h.inflight) < self.max_inflight_per_worker
+        ]
+        if not candidates:
+            return None
+        key = routing_key(task.req)
+        return min(candidates, key=lambda h: (len(h.inflight), key not in h.warm))
+
+    def _assign_pending(self):
+        while (task := self._pending.peek()) is not None:
+            if task.future.cancelled():
+                self._pending.get_nowait()
+                self.cancelled += 1
+                continue
+            if task.deadline is not None and time.monotonic() > task.deadline:
+                self._pending.get_nowait()
+                self.expired += 1
+                if task.future.set_running_or_notify_cancel():
+                    task.future.set_exception(ex.TTSTimeoutError("Request timed out while queued"))
+                continue
+            handle = self._pick_worker(task)
+            if handle is None:
+                return
+            self._pending.get_nowait()
+            if task.attempts == 0:
+                if not task.future.set_running_or_notify_cancel():
+                    self.cancelled += 1
+                    continue
+                QUEUE_WAIT_SECONDS.observe(time.monotonic() - task.enqueued_at, priority=task.priority)
+            handle.inflight[task.task_id] = task
+            handle.task_q.put((task.task_id, task.kind, task.req.model_dump_json(), task.trace_id, task.data))
+
+    def _restart_crashed(self):
+        now = time.monotonic()
+        for handle in self._workers:
+            if self._stop.is_set() or handle.given_up or handle.process.is_alive():
+                continue
+            if handle.restart_at is None:
+                self._on_crash(handle, now)
+            if handle.restart_at is not None and now >= handle.restart_at:
+                handle.restart_at = None
+                handle.restarts += 1
+                self._spawn(handle)
+
+    def _on_crash(self, handle: _WorkerHandle, now: float):
+        exitcode = handle.process.exitcode
+        if handle.ready:
+            print(f"💀 TTS pool worker {handle.worker_id} died (exit code {exitcode}), restarting")
+            handle.restart_at = now
+        else:
+            handle.load_failures += 1
+            if handle.load_failures >= _MAX_LOAD_FAILURES:
+                handle.given_up = True
+                print(f"💀 TTS pool worker {handle.worker_id} died while loading {handle.load_failures} times in a row (exit code {exitcode}), giving up")
+                self._cond.notify_all()
+            else:
+                backoff = min(_RESTART_BACKOFF_S * 2 ** (handle.load_failures - 1), _RESTART_BACKOFF_MAX_S)
+                print(f"💀 TTS pool worker {handle.worker_id} died while loading (exit code {exitcode}), restarting in {backoff:.0f}s")
+                handle.restart_at = now + backoff
+        handle.ready = False
+        orphaned = list(handle.inflight.values())
+        handle.inflight.clear()
+        for task in orphaned:
+            task.attempts += 1
+            # A stream may already have sent audio, so it cannot be replayed
+            if task.kind == "stream" or task.attempts > _MAX_CRASH_RETRIES:
+                self.failed += 1
+                task.future.set_exception(ex.TTSSynthesisError("TTS worker process crashed"))
+            else:
+                self._pending.requeue(task, task.priority, task.req.run_id)
+
+    # ---------------------------------------------------------------- results
+
+    def _collect_loop(self):
+        while not self._stop.is_set():
+            try:
+                kind, worker_id, payload = self._result_q.get(timeout=_POLL_INTERVAL_S)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            try:
+                self._handle_result(kind, self._workers[worker_id], payload)
+            except Exception:
+                log_exception("TTS pool failed to handle a worker result")
+
+    def _handle_result(self, kind: str, handle: _WorkerHandle, payload: Any):
+        if kind == "ready":
+            with self._cond:
+                handle.ready = True
+                handle.load_failures = 0
+                self._cond.notify_all()
+            return
+
+        if kind == "chunk":
+            task_id, chunk = payload
+            task = handle.inflight.get(task_id)
+            if task is not None and task.emit is not None and not task.emit(chunk):
+                handle.cancel_event.set()
+            return
+
+        with self._cond:
+            task = handle.inflight.pop(payload[0], None)
+            self._cond.notify_all()
+        if task is None:
+            return
+        if kind == "done":
+            _, output, cache_stats, metrics = payload
+            handle.completed += 1
+            handle.cache_stats = cache_stats
+            handle.metrics = metrics
+            handle.warm.add(routing_key(task.req))
+            if task.kind == "render":
+                task.future.set_result(output)
+            else:
+                task.future.set_result(TTSOutput.model_validate_json(output) if output else None)
+        else:
+            self.failed += 1
+            task.future.set_exception(pickle.loads(payload[1]))
+
+    def metrics_snapshots(self) -> dict[str, list]:
+        """
+        Latest metrics snapshot of each worker process, keyed by worker id.
+        """
+        with self._cond:
+            return {str(h.worker_id): h.metrics for h in self._workers if h.metrics}
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "queue_depth": self._pending.qsize(),
+                "queue_depths": self._pending.depths(),
+                "max_queue_depth": self.max_queue_depth,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "expired": self.expired,
+                "workers": [
+                    {
+                        "worker_id": h.worker_id,
+                        "pid": h.process.pid if h.process else None,
+                        "ready": h.ready,
+                        "inflight": len(h.inflight),
+                        "completed": h.completed,
+                        "restarts": h.restarts,
+                        "load_failures": h.load_failures,
+                        "given_up": h.given_up,
+                        "warm_voices": len(h.warm),
+                        "conditionals_cache": h.cache_stats,
+                    }
+                    for h in self._workers
+                ],
+            }
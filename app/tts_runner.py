@@ -1,87 +1,192 @@
+from concurrent.futures import Future
 from pathlib import Path
+from typing import Callable
 from app.config import TTSConfig
-from app.utils import Timer
-from app.backends.chatterbox_backend import ChatterboxTTSBackend
+from app.utils import Timer, STARTUP
+from app.backends.base import BackendServices, TTSBackend, failed_future
+from app.backends.registry import create_backends, select_engine
+from app.backends.audio_ops import to_pcm16, wav_stream_header
 from app.models.domain import (
     domain as d, 
     exceptions as ex,
-    speaker as s
+    speaker as s,
+    emotion as e,
+    gender as g
 )
-from app.models.api import TTSOutput
+from app.models.api import TTSOutput, TTSVariant
 from app.services.tts_resolver import (
     resolve_emotion,
     resolve_gender,
-    resolve_speaker
+    resolve_speaker,
+    set_voice_registry,
+    speaker_groups
 )
-from app.utils import ensure_folder
+from app.services.voice_registry import VoiceRegistry
+from app.utils import ensure_folder, gather_futures, relay_future
+from app.services.batch_pipeline import BatchPipeline
+from app.services.chapter_assembler import create_chapter_assembler
+from app.services.take_store import RenderedTake
+from app.services.metrics import stage
+from app.services.text_normalizer import normalize_line
+
+def input_error(e: BaseException) -> ex.TTSInputError:
+    error = ex.TTSInputError("Input data validation failed")
+    error.__cause__ = e
+    return error
+
+def merge_variants(futures: list[Future]) -> Future:
+    """
+    One TTSOutput for the takes of a num_variants request: the first take that succeeded, listing
+    every successful take under variants. Fails only when all of them did.
+    """
+    merged: Future = Future()
+
+    def merge(f: Future):
+        outputs = [r for r in f.result() if isinstance(r, TTSOutput)]
+        if not outputs:
+            errors = [r for r in f.result() if isinstance(r, BaseException)]
+            merged.set_exception(input_error(errors[0]))
+            return
+        merged.set_result(outputs[0].model_copy(update={
+            "variants": [TTSVariant(audio_ref=o.audio_ref, seed=o.seed) for o in outputs]
+        }))
+
+    gather_futures(futures).add_done_callback(merge)
+    return merged
 
 class TTSRunner:
-    def __init__(self, config: TTSConfig):
+    def __init__(self, config: TTSConfig, backend: TTSBackend | None = None):
         """
-        Initialize the TTSRunner with a config and prepare the Chatterbox backend.
+        Initialize the TTSRunner with a config and load the configured TTS engines.
+        A ready backend can be passed in instead (the benchmarks use a stub one); it is then the only engine.
         """
         self.config = config
         self.media_root = str(config.media_root)
         self.media_namespace = str(config.media_namespace)
-        self.backend = None
+        if config.voice_store_enabled:
+            set_voice_registry(VoiceRegistry(config.voice_store_dir, config.voice_ref_dir, config.speaker_map))
+        # Writer, audio cache and version index shared by the engines; a passed-in backend brings its own
+        self.services: BackendServices | None = None
+        if backend is not None:
+            self.backends: dict[str, TTSBackend] = {backend.name: backend}
+            self.default_engine = backend.name
+        else:
+            """
+            Load the TTS engines.
+            """
+            self.services = BackendServices.create(self.config)
+            with Timer("🔊 Load TTS model"):
+                self.backends = create_backends(self.config, self.services)
+            self.default_engine = self.config.default_engine
+        # The default engine; batch runs and single-engine callers use it directly
+        self.backend = self.backends[self.default_engine]
+
+    def close(self):
         """
-        Load the ChatterboxTTS model.
+        Let takes already handed to the writer reach the disk and release every engine.
         """
-        with Timer("🔊 Load TTS model"):
-            self.backend = ChatterboxTTSBackend(self.config)
+        for backend in self.backends.values():
+            backend.close()
+        if self.services is not None:
+            self.services.close()
 
-    def generate_line(
+    def warm_up(self) -> int:
+        """
+        Prepare speaker conditionals for every configured speaker and emotion exaggeration, built-in
+        speakers first so they are the ones warmed when indexed voices outnumber the cache.
+        """
+        if self.backend is None:
+            raise RuntimeError("TTS model is not loaded.")
+
+        builtins = [speaker for group in s.SPEAKER_GROUPS.values() for speaker in group.values()]
+        indexed = [speaker for group in speaker_groups().values() for speaker in group.values()]
+        # Engines skip voices they have already warmed, so the built-ins repeated in indexed are harmless
+        speakers = builtins + indexed
+        exaggerations = [emotion.params.exaggeration for emotion in e.EMOTIONS.values()]
+        with STARTUP.phase("warmup", "🔥 Warm up speaker conditionals"):
+            prepared = sum(backend.warm_up(speakers, exaggerations) for backend in self.backends.values())
+        print(f"🔥 Warmed {prepared} conditionals, cache: {self.backend.cache_stats()}")
+        return prepared
+
+    def select_engine(self, req: d.TTSInput) -> str:
+        """
+        Engine for a request, by explicit engine or quality. Overload spill-over is decided
+        by the server's EngineRouter, which sets req.engine before the request gets here.
+        """
+        engine, _ = select_engine(req, self.default_engine, self.config.preview_engine, self.backends)
+        return engine
+
+    def resolve_voice(
         self,
         req: d.TTSInput
-    ) -> TTSOutput:
-
+    ) -> tuple[g.Gender, e.Emotion, s.Speaker]:
         """
-        Generate a TTS audio file from a single line of text and return output metadata.
+        Resolve the gender, emotion and speaker a request is voiced with.
         """
-        try:
-            if self.backend is None:
-                raise RuntimeError("TTS model is not loaded.")
-            
-            gender = resolve_gender(req.gender.value)
-            emotion = resolve_emotion(req.emotion.name, req.customSettings)
-            
-
-            # Remove this later after tuning voices -----------------
-                # For female voice "RoteDisaster" from gonewildaudio these settings work better and it is not possible to express
-                # all said emotions with just one sample voice files so we divide voice samples to be used based on emotions
-                # this has been curated and tested, only for this voice at the time of writing (Fri, 01 Aug, 2025)
-            speaker_name = ""
-            if gender.value == "female": # and speaker in ["rote_loud", "rote_very_soft", "default"]:
-                if emotion.name in ['neutral', 'happy', 'angry', 'surprised', 'excited', 'scared', 'curious', 'playful', 'serious']:
-                    speaker_name = "rote_loud"
-                elif emotion.name in ['sad', 'nervous', 'aroused', 'calm']:
-                    speaker_name = "rote_very_soft"
-                else:
-                    speaker_name = "default"
+        gender = resolve_gender(req.gender.value)
+        emotion = resolve_emotion(req.emotion.name, req.customSettings)
+        
+
+        # Remove this later after tuning voices -----------------
+            # For female voice "RoteDisaster" from gonewildaudio these settings work better and it is not possible to express
+            # all said emotions with just one sample voice files so we divide voice samples to be used based on emotions
+            # this has been curated and tested, only for this voice at the time of writing (Fri, 01 Aug, 2025)
+        speaker_name = ""
+        if gender.value == "female": # and speaker in ["rote_loud", "rote_very_soft", "default"]:
+            if emotion.name in ['neutral', 'happy', 'angry', 'surprised', 'excited', 'scared', 'curious', 'playful', 'serious']:
+                speaker_name = "rote_loud"
+            elif emotion.name in ['sad', 'nervous', 'aroused', 'calm']:
+                speaker_name = "rote_very_soft"
             else:
-                pass
+                speaker_name = "default"
+        else:
+            pass
 
 
-            speaker = resolve_speaker(req.gender, req.speaker if not speaker_name else 
-                                      s.Speaker(
-                                          name=speaker_name,
-                                          wav_file="",
-                                          gender=gender
-                                      )
-                                      )
+        speaker = resolve_speaker(req.gender, req.speaker if not speaker_name else 
+                                  s.Speaker(
+                                      name=speaker_name,
+                                      wav_file="",
+                                      gender=gender
+                                  )
+                                  )
 
-            
-            # -------------------------------------------------------
+        
+        # -------------------------------------------------------
+        return gender, emotion, speaker
+
+    @stage("resolve")
+    def resolve_request(
+        self,
+        req: d.TTSInput,
+        memo: dict | None = None
+    ) -> tuple[d.TTSInput, Path]:
+        """
+        Resolve gender, emotion, speaker and engine for a request and create its image output folder.
+        Returns the resolved request together with the output folder.
+        Requests resolved with the same memo (see resolve_requests) share voice resolutions and folders.
+        """
+        try:
+            if memo is None:
+                memo = {}
+            voice_key = ("voice", req.gender, req.emotion.name, req.customSettings, req.speaker)
+            if voice_key not in memo:
+                memo[voice_key] = self.resolve_voice(req)
+            gender, emotion, speaker = memo[voice_key]
 
             # Prevent invalid inputs
             if not req.text or not req.run_id or req.dialogue_id < 0:
                 raise ex.TTSInputError("Invalid TTS Input")
+            if req.num_variants > self.config.max_variants:
+                raise ex.TTSInputError(f"num_variants is limited to {self.config.max_variants}")
 
             new_req = req.model_copy(
                 update={
                     "gender": gender,
                     "emotion": emotion,
-                    "speaker": speaker
+                    "speaker": speaker,
+                    "text": normalize_line(req.text) if self.config.text_normalization else req.text,
+                    "engine": self.select_engine(req)
                 }
             )
 
@@ -91,14 +196,207 @@ class TTSRunner:
             img_path_without_ext = Path(req.image_ref.path).with_suffix("")
             img_ext_without_dot = req.image_ref.suffix[1:] # exclude the "."
             out_dir: Path = Path(root)/ns/new_req.run_id/f"{img_path_without_ext}_{img_ext_without_dot}"
-            ensure_folder(out_dir)
+            if ("folder", out_dir) not in memo:
+                memo[("folder", out_dir)] = ensure_folder(out_dir)
 
-            res: TTSOutput = self.backend.synthesize(
-                req=new_req,
-                out_dir=out_dir
-                )
-
-            return res
+            return new_req, out_dir
         except Exception as e:
             raise ex.TTSInputError("Input data validation failed") from e
 
+    def resolve_requests(
+        self,
+        reqs: list[d.TTSInput]
+    ) -> list[tuple[d.TTSInput, Path] | ex.TTSInputError]:
+        """
+        Resolve a list of lines in one pass: each unique gender/emotion/speaker combination is resolved once
+        and each image folder created once. One entry per request, in order; a bad line gets its TTSInputError.
+        """
+        memo: dict = {}
+        results: list[tuple[d.TTSInput, Path] | ex.TTSInputError] = []
+        for req in reqs:
+            try:
+                results.append(self.resolve_request(req, memo))
+            except ex.TTSInputError as e:
+                results.append(e)
+        return results
+
+    def prepare_lines(
+        self,
+        reqs: list[d.TTSInput]
+    ) -> list[tuple[int, tuple[d.TTSInput, Path] | ex.TTSInputError]]:
+        """
+        Resolve lines in one pass (see resolve_requests) and order them for synthesis: lines that failed to
+        resolve first, then by engine and voice so lines sharing conditionals run back to back.
+        Each entry carries the request's index in reqs.
+        """
+        resolved = list(enumerate(self.resolve_requests(reqs)))
+        failed = [(i, r) for i, r in resolved if isinstance(r, Exception)]
+        lines = [(i, r) for i, r in resolved if not isinstance(r, Exception)]
+        lines.sort(key=lambda item: (item[1][0].engine, item[1][0].speaker.wav_file, item[1][0].emotion.params.exaggeration, item[0]))
+        return failed + lines
+
+    def synthesize_resolved(
+        self,
+        new_req: d.TTSInput,
+        out_dir: Path
+    ) -> Future:
+        """
+        Synthesize an already resolved line with its engine; the future settles with the TTSOutput.
+        """
+        backend = self.backends[new_req.engine]
+        if new_req.num_variants > 1:
+            return merge_variants(backend.synthesize_variants(new_req, out_dir))
+        return relay_future(backend.synthesize_deferred(new_req, out_dir), input_error)
+
+    def submit_line(
+        self,
+        req: d.TTSInput
+    ) -> Future:
+        """
+        Generate a line and return as soon as its audio is handed to the writer, so the caller (the
+        inference thread) can start on the next line. The future settles with the TTSOutput.
+        """
+        try:
+            if self.backend is None:
+                raise RuntimeError("TTS model is not loaded.")
+
+            new_req, out_dir = self.resolve_request(req)
+            return self.synthesize_resolved(new_req, out_dir)
+        except Exception as e:
+            failed: Future = Future()
+            failed.set_exception(input_error(e))
+            return failed
+
+    def generate_line(
+        self,
+        req: d.TTSInput
+    ) -> TTSOutput:
+
+        """
+        Generate a TTS audio file from a single line of text and return output metadata.
+        """
+        return self.submit_line(req).result()
+
+    def render_line(
+        self,
+        req: d.TTSInput
+    ) -> RenderedTake:
+        """
+        Generate a line into an in-memory encoded take, with no file written (see TTSBackend.render_take).
+        """
+        if self.backend is None:
+            raise RuntimeError("TTS model is not loaded.")
+
+        new_req, out_dir = self.resolve_request(req)
+        if new_req.num_variants > 1:
+            raise ex.TTSInputError("num_variants is not supported for in-memory takes")
+        return self.backends[new_req.engine].render_take(new_req, out_dir)
+
+    def keep_take(
+        self,
+        take: RenderedTake
+    ) -> Future:
+        """
+        Persist an in-memory take as a versioned take; the future settles with its TTSOutput.
+        """
+        backend = self.backends.get(take.req.engine)
+        if backend is None:
+            return failed_future(ex.TTSInputError(f"Engine {take.req.engine} is not loaded"))
+        return relay_future(backend.keep_take(take), input_error)
+
+    def stream_line(
+        self,
+        req: d.TTSInput,
+        emit: Callable[[bytes], bool]
+    ) -> None:
+        """
+        Synthesize a line as a 16-bit PCM WAV byte stream: emit() gets the header once the input is
+        resolved, then PCM as each chunk is ready. Stops early when emit() returns False.
+        """
+        if self.backend is None:
+            raise RuntimeError("TTS model is not loaded.")
+
+        new_req, out_dir = self.resolve_request(req)
+        if new_req.num_variants > 1:
+            raise ex.TTSInputError("num_variants is not supported when streaming")
+        backend = self.backends[new_req.engine]
+        if not emit(wav_stream_header(backend.sample_rate)):
+            return
+        chunks = backend.synthesize_stream(new_req, out_dir)
+        try:
+            for wav in chunks:
+                if not emit(to_pcm16(wav)):
+                    break
+        finally:
+            chunks.close()
+
+    def generate_lines(
+        self,
+        reqs: list[d.TTSInput]
+    ) -> list[TTSOutput | Exception | Future]:
+        """
+        Generate many lines in one pass per engine so lines sharing a voice reuse its conditionals.
+        Returns one TTSOutput, exception or future (for takes still being written) per request, in
+        input order; one bad line does not fail the rest.
+        """
+        if self.backend is None:
+            raise RuntimeError("TTS model is not loaded.")
+
+        results: list[TTSOutput | Exception | Future | None] = [None] * len(reqs)
+        by_engine: dict[str, list[tuple[int, d.TTSInput, Path]]] = {}
+        for i, entry in enumerate(self.resolve_requests(reqs)):
+            if isinstance(entry, Exception):
+                results[i] = entry
+                continue
+            new_req, out_dir = entry
+            if new_req.num_variants > 1:
+                results[i] = self.synthesize_resolved(new_req, out_dir)
+                continue
+            by_engine.setdefault(new_req.engine, []).append((i, new_req, out_dir))
+
+        for engine, resolved in by_engine.items():
+            outputs = self.backends[engine].synthesize_batch([(req, out_dir) for _, req, out_dir in resolved])
+            for (i, _, _), output in zip(resolved, outputs):
+                # Same error surface as generate_line
+                if isinstance(output, Exception):
+                    output = input_error(output)
+                elif isinstance(output, Future):
+                    output = relay_future(output, input_error)
+                results[i] = output
+        return results
+
+    def process_ocr_result(
+        self,
+        ocr_json: dict,
+        run_id: str,
+        previous_run_id: str | None = None
+    ) -> dict:
+        """
+        Narrate a whole OCR run through the batch pipeline and return the run summary,
+        assembling the chapter track afterwards when chapter_assembly_after_batch is on.
+        With previous_run_id, takes of that earlier narration are carried over for unchanged lines
+        and only new or edited lines are synthesized. An aborted run (see BatchPipeline.run) is not assembled.
+        """
+        if self.backend is None:
+            raise RuntimeError("TTS model is not loaded.")
+
+        pipeline = BatchPipeline(
+            runner=self,
+            queue_depth=self.config.batch_queue_depth,
+            writer_threads=self.config.batch_writer_threads
+        )
+        summary = pipeline.run(ocr_json, run_id, previous_run_id)
+        if self.config.chapter_assembly_after_batch and not summary.get("aborted"):
+            try:
+                summary["chapter"] = self.assemble_chapter(run_id)
+            except Exception as e:
+                # The takes are in place either way; assembly can be rerun on its own
+                summary["chapter"] = {"error": str(e)}
+        return summary
+
+    def assemble_chapter(self, run_id: str, incremental: bool = True) -> dict:
+        """
+        Stitch the run's selected takes into its chapter track and cue index.
+        """
+        return create_chapter_assembler(self.backend.version_index, self.config).assemble(run_id, incremental)
+
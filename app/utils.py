@@ -1,4 +1,9 @@
 from pathlib import Path
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable
+import json
+import threading
 import time
 from rich.console import Console
 from app.models.domain.domain import MediaRef
@@ -10,32 +15,78 @@ def log_exception(context: str = "Unhandled exception", label: str = "💀"):
     print(f"\n{label} {context}:")
     traceback.print_exc()
 
+def relay_future(future: Future, map_error: Callable[[BaseException], BaseException]) -> Future:
+    """
+    A future that settles with future's result, or with map_error(exception) when it fails.
+    """
+    relayed: Future = Future()
+
+    def relay(f: Future):
+        error = f.exception()
+        if error is None:
+            relayed.set_result(f.result())
+        else:
+            relayed.set_exception(map_error(error))
+
+    future.add_done_callback(relay)
+    return relayed
+
+def gather_futures(futures: list[Future]) -> Future:
+    """
+    A future that settles once all futures have, with each one's result or exception in order.
+    """
+    gathered: Future = Future()
+    results: list = [None] * len(futures)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+    if not futures:
+        gathered.set_result(results)
+        return gathered
+
+    def collect(i: int, f: Future):
+        try:
+            results[i] = f.result()
+        except BaseException as e:
+            results[i] = e
+        with lock:
+            remaining[0] -= 1
+            done = remaining[0] == 0
+        if done:
+            gathered.set_result(results)
+
+    for i, future in enumerate(futures):
+        future.add_done_callback(lambda f, i=i: collect(i, f))
+    return gathered
+
 def ensure_folder(path: Path):
     path.mkdir(parents=True, exist_ok=True)
     return path
 
-# Helper to extract version number of tts generated wav file by checking existing files
-def get_next_version(folder_path: Path) -> int:
-    pattern = f"v*.wav"
-    versions = []
+# Helper to map version number -> file for the tts generated takes in a dialogue folder
+def list_version_files(folder_path: Path) -> dict[int, Path]:
     if not folder_path.exists() or not folder_path.is_dir():
         raise EnvError("Invalid tts output folder.")
-    for file in folder_path.glob(pattern):
+    versions: dict[int, Path] = {}
+    for file in folder_path.glob("v*.*"):
         parts = file.stem.split("__")
         if len(parts) > 0 and parts[0].startswith("v"):
             try:
-                version_num = int(parts[0][1:])
-                versions.append(version_num)
+                versions[int(parts[0][1:])] = file
             except ValueError:
                 continue
-    return max(versions, default=0) + 1
+    return versions
 
-class Timer:
-    last_duration = 0.0
+# Helper to extract version number of tts generated wav file by checking existing files.
+# Walks the folder on every call; the server allocates through VersionIndex instead
+def get_next_version(folder_path: Path) -> int:
+    return max(list_version_files(folder_path), default=0) + 1
 
+class Timer:
+    # Each timer keeps its own duration; a shared class attribute would race between threads
     def __init__(self, label: str = "", use_spinner: bool = True):
         self.label = label
         self.start_time = None
+        self.duration = 0.0
         self.use_spinner = use_spinner
         self.console = Console()
         self.status = None
@@ -57,7 +108,7 @@ class Timer:
             duration = time.perf_counter() - self.start_time
         else:
             duration = 0.0
-        Timer.last_duration = duration
+        self.duration = duration
 
         if self.use_spinner and self.status:
             self.status.__exit__(exc_type, exc_val, exc_tb)
@@ -65,4 +116,54 @@ class Timer:
         if self.label:
             self.console.print(
                 f"✅ [green]{self.label}[/] done in [yellow]{duration:.2f}s[/]"
-            )
\ No newline at end of file
+            )
+
+
+class StartupLog:
+    """
+    Timed record of the named startup phases, each logged as one JSON line so an
+    orchestrator can tell a slow boot from a hung one.
+    """
+    def __init__(self):
+        self.state = "booting"
+        self.started_at = time.time()
+        self.phases: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _log(self, **fields):
+        print(json.dumps({"event": "startup", "ts": round(time.time(), 3), **fields}), flush=True)
+
+    @contextmanager
+    def phase(self, name: str, label: str = ""):
+        with self._lock:
+            self.phases[name] = {"status": "running", "seconds": None}
+        self._log(phase=name, status="running")
+        timer = Timer(label or name, use_spinner=False)
+        try:
+            with timer:
+                yield
+        except Exception as e:
+            with self._lock:
+                self.phases[name] = {"status": "failed", "seconds": round(timer.duration, 3), "error": repr(e)}
+            self._log(phase=name, status="failed", seconds=round(timer.duration, 3), error=repr(e))
+            raise
+        with self._lock:
+            self.phases[name] = {"status": "ok", "seconds": round(timer.duration, 3)}
+        self._log(phase=name, status="ok", seconds=round(timer.duration, 3))
+
+    def set_state(self, state: str):
+        self.state = state
+        self._log(state=state, uptime_seconds=round(time.time() - self.started_at, 3))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "phases": dict(self.phases),
+            }
+
+
+# Per-process startup record (each pool worker process has its own)
+STARTUP = StartupLog()
+
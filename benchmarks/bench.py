@@ -0,0 +1,479 @@
+"""
+Hot-path benchmarks.
+
+    python benchmarks/bench.py stub [--iterations 500] [--concurrency 1,4,8] [--out results.json]
+    python benchmarks/bench.py real [--repeat 3] [--out results.json]
+    python benchmarks/bench.py precision [--modes fp32,bf16,int8] [--out results.json]
+    python benchmarks/bench.py compare BASELINE.json CURRENT.json [--threshold 0.10]
+
+stub: the real runner, backend, version index and server around a sine-wave model, so the numbers
+are framework overhead only (validation, resolution, paths, versioning, wav writing, HTTP).
+real: the Chatterbox model on CPU, for end-to-end latency and real-time factor.
+precision: the Chatterbox model once per inference_precision, each in a fresh process, reporting load time,
+memory (RSS and weight bytes) and RTF, and the quality of each mode's takes against fp32 on the sample lines.
+compare: exits 1 when a scenario's p50/p95/p99 rose or its throughput/RTF fell past the threshold.
+
+Everything is written to a temporary media root and state dir, never to the configured share.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from harness import (
+    ScenarioResult,
+    compare_results,
+    load_results,
+    run_concurrent,
+    run_sequential,
+    write_results
+)
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SAMPLE_LINES = (
+    "Wait... you can't be serious!",
+    "I told you, the magic doesn't work like that.",
+    "Hah! Is that all you've got?",
+    "We have to leave before the gate closes at dawn.",
+    "Don't look back. Whatever happens, keep running.",
+    "...I'm sorry. I should have said something sooner.",
+)
+SAMPLE_GENDERS = ("female", "male", "neutral")
+SAMPLE_EMOTIONS = ("neutral", "happy", "sad", "angry", "calm")
+
+
+def sample_payload(i: int, run_id: str = "bench_run") -> dict[str, Any]:
+    """
+    JSON body of a /tts/dialogue request, varied by i across texts, voices, emotions and pages.
+    """
+    from app.models.domain.emotion import EMOTIONS
+
+    gender = SAMPLE_GENDERS[i % len(SAMPLE_GENDERS)]
+    emotion = EMOTIONS[SAMPLE_EMOTIONS[i % len(SAMPLE_EMOTIONS)]]
+    return {
+        "text": SAMPLE_LINES[i % len(SAMPLE_LINES)],
+        "gender": {"value": gender},
+        "emotion": emotion.model_dump(mode="json"),
+        "speaker": {"name": "default", "wav_file": "", "gender": {"value": gender}},
+        "image_ref": {"namespace": "inputs", "path": f"chapter_1/page_{i % 8:03d}.jpg"},
+        "run_id": run_id,
+        "dialogue_id": i % 16,
+    }
+
+
+def bench_config(workdir: Path, audio_cache: bool, voice_ref_dir: Path | None = None):
+    """
+    The repo config with every output and state path moved under workdir.
+    """
+    from app.config import TTSConfig
+
+    config = TTSConfig()
+    config.media_root = str(workdir / "media")
+    config.media_namespace = "outputs"
+    config.voice_ref_dir = voice_ref_dir or workdir / "voice_refs"
+    config.state_dir = workdir / "state"
+    config.version_index_path = config.state_dir / "versions.sqlite3"
+    config.audio_write_tmp_dir = config.state_dir / "tmp"
+    config.audio_cache_enabled = audio_cache
+    config.audio_cache_dir = workdir / "audio_cache"
+    # Measure the default engine only
+    config.engines = [config.default_engine]
+    # Built-in speakers only, conditionals computed from the voice refs
+    config.voice_store_enabled = False
+    return config
+
+
+async def http_scenarios(
+    runner,
+    config,
+    iterations: int,
+    concurrencies: list[int],
+    warmup: int
+) -> list[ScenarioResult]:
+    """
+    POST /tts/dialogue through tts_server.app in-process (ASGI transport, no socket), with the
+    server state set up the way its lifespan does for thread mode.
+    """
+    import httpx
+    import tts_server
+    from app.services.job_store import JobStore
+    from app.services.version_index import VersionIndex
+
+    app = tts_server.app
+    app.state.config = config
+    app.state.runner = runner
+    app.state.job_dispatcher = None
+    app.state.version_index = VersionIndex(config.version_index_path)
+    app.state.job_store = JobStore(config.state_dir / "jobs.sqlite3")
+    worker = tts_server.create_thread_worker(runner, config)
+    worker.start()
+    app.state.inference_worker = worker
+
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=config.inference_timeout_s) as client:
+            async def call(i: int):
+                response = await client.post("/tts/dialogue", json=sample_payload(i))
+                response.raise_for_status()
+
+            for concurrency in concurrencies:
+                results.append(await run_concurrent(
+                    f"http_dialogue@c{concurrency}", call, iterations, concurrency, warmup=warmup
+                ))
+    finally:
+        worker.stop(timeout=5)
+        app.state.inference_worker = None
+        app.state.job_store.close()
+        app.state.version_index.close()
+    return results
+
+
+def stub_scenarios(args: argparse.Namespace, workdir: Path) -> list[ScenarioResult]:
+    from stub_backend import StubTTSBackend, write_voice_refs
+    from app.tts_runner import TTSRunner
+    from app.models.domain import domain as d
+    from app.services.tts_resolver import resolve_emotion, resolve_gender, resolve_speaker
+    from app.utils import get_next_version
+
+    config = bench_config(workdir, audio_cache=args.audio_cache)
+    if args.audio_format:
+        config.audio_format = args.audio_format
+    write_voice_refs(Path(config.voice_ref_dir))
+    backend = StubTTSBackend(config, delay_ms=args.synth_delay_ms)
+    runner = TTSRunner(config, backend=backend)
+    runner.warm_up()
+
+    n, warmup = args.iterations, args.warmup
+    payloads = [sample_payload(i) for i in range(max(n, 64))]
+    reqs = [d.TTSInput.model_validate(payload) for payload in payloads]
+    pick = lambda items, i: items[i % len(items)]
+
+    def resolve(i: int):
+        req = pick(reqs, i)
+        gender = resolve_gender(req.gender.value)
+        resolve_emotion(req.emotion.name, req.customSettings)
+        resolve_speaker(gender, req.speaker)
+
+    def model_copy(i: int):
+        req = pick(reqs, i)
+        req.model_copy(update={"gender": req.gender, "emotion": req.emotion, "speaker": req.speaker})
+
+    # A dialogue folder holding a realistic number of earlier takes
+    takes_dir = workdir / "takes" / "dialogue__0"
+    takes_dir.mkdir(parents=True)
+    for version in range(1, args.takes + 1):
+        (takes_dir / f"v{version}__exg0.5__cfg0.5.wav").touch()
+
+    wav = backend.model.generate(SAMPLE_LINES[1])
+    wav_dir = workdir / "wavs"
+    wav_dir.mkdir()
+
+    results = [
+        run_sequential("validate_input", lambda i: d.TTSInput.model_validate(pick(payloads, i)), n, warmup),
+        run_sequential("resolve", resolve, n, warmup),
+        run_sequential("model_copy", model_copy, n, warmup),
+        run_sequential("resolve_request", lambda i: runner.resolve_request(pick(reqs, i)), n, warmup),
+        run_sequential("get_next_version", lambda i: get_next_version(takes_dir), n, warmup),
+        run_sequential(
+            "version_reserve",
+            lambda i: backend.version_index.reserve(("bench_run", "takes", 0), takes_dir),
+            n, warmup
+        ),
+        run_sequential("save_audio", lambda i: backend.save_audio(wav, wav_dir / f"{i % 32}.wav"), n, warmup),
+        run_sequential("generate_line", lambda i: runner.generate_line(pick(reqs, i)), n, warmup),
+    ]
+    results += asyncio.run(http_scenarios(runner, config, n, args.concurrency, warmup))
+    results.append(routing_scenario(config))
+    backend.close()
+    return results
+
+
+def routing_scenario(config, lines: int = 20) -> ScenarioResult:
+    """
+    Route a bulk page of lines through an EngineRouter of stub engines with the repo's overload
+    settings, the way /tts/dialogues does (priority "batch", retried while the queue is full).
+    Passes when every line stays on the default engine, however deep its queue gets.
+    """
+    from app.models.domain import domain as d
+    from app.models.domain.exceptions import TTSQueueFullError
+    from app.services.engine_router import EngineRouter
+    from app.services.inference_worker import InferenceWorker
+
+    # Slow enough that the page is queued faster than it drains, past overload depth and up to full
+    def handler(req):
+        time.sleep(0.02)
+        return req.engine
+
+    preview = config.preview_engine if config.preview_engine != config.default_engine else "espeak"
+    workers = {
+        engine: InferenceWorker(handler, max_queue_depth=config.inference_queue_depth, name=f"bench-{engine}")
+        for engine in (config.default_engine, preview)
+    }
+    router = EngineRouter(workers, config.default_engine, preview, config.engine_overload_queue_depth)
+    reqs = [d.TTSInput.model_validate(sample_payload(i)) for i in range(lines)]
+    for worker in workers.values():
+        worker.start()
+    latencies, futures = [], []
+    start = time.perf_counter()
+    for req in reqs:
+        while True:
+            try:
+                futures.append(router.submit(req, priority="batch"))
+                break
+            except TTSQueueFullError:
+                time.sleep(0.005)
+    engines = []
+    for future in futures:
+        engines.append(future.result(timeout=30))
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - start
+    for worker in workers.values():
+        worker.stop(timeout=5)
+    return ScenarioResult(
+        "route_bulk_page",
+        latencies,
+        wall,
+        extra={
+            "default_engine_lines": engines.count(config.default_engine),
+            "quality_passed": all(engine == config.default_engine for engine in engines),
+        }
+    )
+
+
+def real_scenarios(args: argparse.Namespace, workdir: Path) -> list[ScenarioResult]:
+    from app.config import TTSConfig
+    from app.tts_runner import TTSRunner
+    from app.models.domain import domain as d
+
+    # Real voice refs, but outputs, versions and cache stay in the scratch dir
+    config = bench_config(workdir, audio_cache=False, voice_ref_dir=TTSConfig().voice_ref_dir)
+    runner = TTSRunner(config)
+    runner.warm_up()
+    reqs = [d.TTSInput.model_validate(sample_payload(i)) for i in range(len(SAMPLE_LINES))]
+    media_dir = Path(config.media_root) / config.media_namespace
+
+    audio_seconds: list[float] = []
+    def line(i: int):
+        output = runner.generate_line(reqs[i % len(reqs)])
+        audio_seconds.append(runner.backend.audio_duration(media_dir / output.audio_ref.path))
+
+    result = run_sequential("e2e_line", line, len(reqs) * args.repeat, warmup=args.warmup)
+    total_audio = sum(audio_seconds[args.warmup:])
+    busy = sum(result.latencies_s)
+    result.extra = {
+        "audio_seconds": round(total_audio, 3),
+        # Same definition as tts_realtime_factor: audio seconds per wall second
+        "rtf": round(total_audio / busy, 4) if busy else 0.0,
+    }
+    runner.close()
+    return [result]
+
+
+def precision_worker(precision: str, workdir: str, repeat: int, warmup: int, seed: int) -> dict[str, Any]:
+    """
+    Load Chatterbox at one precision and time every sample line, seeded per line so modes sample
+    alike. Runs in its own process so RSS belongs to this mode alone; the first pass is saved
+    as wav for the quality comparison.
+    """
+    import torch
+    from app.services.memory import peak_rss_bytes, rss_bytes
+    from app.config import TTSConfig
+    from app.models.domain import domain as d
+    from app.tts_runner import TTSRunner
+
+    mode_dir = Path(workdir) / precision
+    config = bench_config(mode_dir, audio_cache=False, voice_ref_dir=TTSConfig().voice_ref_dir)
+    config.inference_precision = precision
+    config.audio_format = "wav"
+    # Banked takes would skip the model being measured
+    config.phrase_bank_enabled = False
+
+    rss_start = rss_bytes()
+    load_start = time.perf_counter()
+    runner = TTSRunner(config)
+    runner.warm_up()
+    load_s = time.perf_counter() - load_start
+    rss_loaded = rss_bytes()
+    backend = runner.backend
+    reqs = [runner.resolve_request(d.TTSInput.model_validate(sample_payload(i)))[0] for i in range(len(SAMPLE_LINES))]
+    for i in range(warmup):
+        backend.generate_audio(reqs[i % len(reqs)])
+
+    wav_dir = mode_dir / "takes"
+    wav_dir.mkdir(parents=True)
+    latencies, audio_seconds = [], 0.0
+    for r in range(repeat):
+        for i, req in enumerate(reqs):
+            torch.manual_seed(seed + i)
+            start = time.perf_counter()
+            wav = backend.generate_audio(req)
+            latencies.append(time.perf_counter() - start)
+            audio_seconds += wav.shape[-1] / backend.sample_rate
+            if r == 0:
+                backend.save_audio(wav, wav_dir / f"line_{i:02d}.wav")
+    result = {
+        "precision": backend.precision,
+        "latencies_s": latencies,
+        "audio_seconds": audio_seconds,
+        "load_s": load_s,
+        "model_mb": backend.model_bytes() / 1024 / 1024,
+        "rss_loaded_mb": rss_loaded / 1024 / 1024,
+        "rss_delta_mb": (rss_loaded - rss_start) / 1024 / 1024,
+        "rss_peak_mb": peak_rss_bytes() / 1024 / 1024,
+        "takes_dir": str(wav_dir),
+    }
+    runner.close()
+    return result
+
+
+def precision_scenarios(args: argparse.Namespace, workdir: Path) -> list[ScenarioResult]:
+    from app.config import TTSConfig
+    from quality import compare_takes, load_voice_encoder
+
+    modes = ["fp32"] + [mode for mode in args.modes if mode != "fp32"]
+    runs: dict[str, dict[str, Any]] = {}
+    for mode in modes:
+        # A fresh interpreter per mode: memory is not shared or left behind between modes
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            runs[mode] = pool.submit(precision_worker, mode, str(workdir), args.repeat, args.warmup, args.seed).result()
+
+    ve = load_voice_encoder(TTSConfig().model_snapshot_dir)
+    reference_dir = Path(runs["fp32"]["takes_dir"])
+    results = []
+    for mode, run in runs.items():
+        quality = compare_takes(ve, reference_dir, Path(run["takes_dir"]))
+        passed = (
+            quality["speaker_similarity_min"] >= args.min_similarity
+            and quality["duration_change_max"] <= args.max_duration_change
+        )
+        busy = sum(run["latencies_s"])
+        results.append(ScenarioResult(
+            f"precision_{mode}",
+            run["latencies_s"],
+            busy,
+            extra={
+                "precision": run["precision"],
+                "rtf": round(run["audio_seconds"] / busy, 4) if busy else 0.0,
+                "load_s": round(run["load_s"], 2),
+                "model_mb": round(run["model_mb"], 1),
+                "rss_loaded_mb": round(run["rss_loaded_mb"], 1),
+                "rss_delta_mb": round(run["rss_delta_mb"], 1),
+                "rss_peak_mb": round(run["rss_peak_mb"], 1),
+                **quality,
+                "quality_passed": passed,
+            }
+        ))
+    return results
+
+
+def print_report(report: dict, out_path: Path):
+    print(f"[bench] {report['mode']} @ {report['git_commit'] or 'unknown commit'} -> {out_path}")
+    for name, r in report["results"].items():
+        rtf = f"  rtf {r['rtf']}" if "rtf" in r else ""
+        print(
+            f"  {name:<22} n={r['count']:<5} err={r['errors']:<3} "
+            f"p50 {r['p50_ms']:>10.3f}ms  p95 {r['p95_ms']:>10.3f}ms  p99 {r['p99_ms']:>10.3f}ms  "
+            f"{r['throughput_per_s']:>9.1f}/s{rtf}"
+        )
+        if "precision" in r:
+            print(
+                f"  {'':<22} ran {r['precision']}  weights {r['model_mb']:.0f} MB  rss {r['rss_loaded_mb']:.0f} MB "
+                f"(peak {r['rss_peak_mb']:.0f})  load {r['load_s']:.1f}s  similarity {r['speaker_similarity_mean']:.3f} "
+                f"(min {r['speaker_similarity_min']:.3f})  duration ±{r['duration_change_max']:.0%}  "
+                f"mel L1 {r['mel_l1_mean']:.3f}  {'ok' if r['quality_passed'] else '❌ QUALITY'}"
+            )
+        elif "quality_passed" in r:
+            print(f"  {'':<22} {r['default_engine_lines']}/{r['count']} lines on the default engine  {'ok' if r['quality_passed'] else '❌ ROUTING'}")
+
+
+def run_mode(args: argparse.Namespace) -> int:
+    if args.mode in ("real", "precision") and not args.gpu:
+        # Must be set before torch is imported
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    out_path = Path(args.out) if args.out else RESULTS_DIR / f"{args.mode}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    params = {k: v for k, v in vars(args).items() if k not in ("command", "out")}
+
+    with tempfile.TemporaryDirectory(prefix="tts-bench-") as tmp:
+        scenarios = {"stub": stub_scenarios, "real": real_scenarios, "precision": precision_scenarios}[args.mode]
+        results = scenarios(args, Path(tmp))
+        report = write_results(out_path, args.mode, params, results)
+    print_report(report, out_path)
+    failed = [name for name, r in report["results"].items() if r.get("quality_passed") is False]
+    return 1 if failed else 0
+
+
+def run_compare(args: argparse.Namespace) -> int:
+    baseline, current = load_results(Path(args.baseline)), load_results(Path(args.current))
+    if baseline["mode"] != current["mode"]:
+        print(f"[bench] warning: comparing a {current['mode']} run against a {baseline['mode']} baseline")
+    rows = compare_results(baseline, current, args.threshold, args.min_delta_ms)
+    for row in rows:
+        flag = "❌ REGRESSION" if row.regressed else "ok"
+        print(f"  {row.scenario:<22} {row.metric:<17} {row.baseline:>12.3f} -> {row.current:>12.3f}  {row.change:+7.1%}  {flag}")
+    regressions = [row for row in rows if row.regressed]
+    print(f"[bench] {len(regressions)} regression(s) over {args.threshold:.0%} in {len(rows)} metrics")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="TTS hot-path benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stub = commands.add_parser("stub", help="framework overhead with a sine-wave model")
+    stub.add_argument("--iterations", type=int, default=500)
+    stub.add_argument("--warmup", type=int, default=20)
+    stub.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 4, 8],
+                      help="comma-separated client counts for the HTTP scenario")
+    stub.add_argument("--takes", type=int, default=50, help="existing takes in the get_next_version folder")
+    stub.add_argument("--synth-delay-ms", type=float, default=0.0, help="fake model time per chunk")
+    stub.add_argument("--audio-cache", action="store_true", help="leave the audio cache on (repeats become hits)")
+    stub.add_argument("--audio-format", choices=["wav", "flac", "opus"], help="override audio_format from config.yaml")
+    stub.add_argument("--out")
+
+    real = commands.add_parser("real", help="end-to-end latency and RTF with the Chatterbox model")
+    real.add_argument("--repeat", type=int, default=3, help="passes over the sample lines")
+    real.add_argument("--warmup", type=int, default=1)
+    real.add_argument("--gpu", action="store_true", help="allow CUDA (default: CPU only)")
+    real.add_argument("--out")
+
+    precision = commands.add_parser("precision", help="memory, RTF and quality vs fp32 per inference_precision")
+    precision.add_argument("--modes", type=lambda v: v.split(","), default=["fp32", "bf16", "int8"],
+                           help="comma-separated precisions; fp32 always runs as the reference")
+    precision.add_argument("--repeat", type=int, default=1, help="passes over the sample lines")
+    precision.add_argument("--warmup", type=int, default=1)
+    precision.add_argument("--seed", type=int, default=0, help="per-line torch seed base")
+    precision.add_argument("--min-similarity", type=float, default=0.85,
+                           help="fail a mode whose worst speaker-embedding cosine vs fp32 is below this")
+    precision.add_argument("--max-duration-change", type=float, default=0.25,
+                           help="fail a mode whose takes are longer/shorter than fp32 by more than this")
+    precision.add_argument("--gpu", action="store_true", help="allow CUDA (default: CPU only)")
+    precision.add_argument("--out")
+
+    compare = commands.add_parser("compare", help="flag regressions against a saved baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="allowed relative change (0.10 = 10%%)")
+    compare.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore latency changes below this")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        return run_compare(args)
+    args.mode = args.command
+    return run_mode(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,196 @@
+# benchmarks/harness.py
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+# Latency metrics are regressions when they go up, the others when they go down
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRICS = ("throughput_per_s", "rtf")
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Linear-interpolated percentile (q in 0..100) of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies_s: list[float]
+    wall_s: float
+    concurrency: int = 1
+    errors: int = 0
+    # Scenario-specific numbers (audio seconds, rtf...) copied into the summary as-is
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies_s)
+        ms = lambda seconds: round(seconds * 1000, 4)
+        return {
+            "count": len(ordered),
+            "errors": self.errors,
+            "concurrency": self.concurrency,
+            "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "p50_ms": ms(percentile(ordered, 50)),
+            "p95_ms": ms(percentile(ordered, 95)),
+            "p99_ms": ms(percentile(ordered, 99)),
+            "max_ms": ms(ordered[-1]) if ordered else 0.0,
+            "throughput_per_s": round(len(ordered) / self.wall_s, 3) if self.wall_s else 0.0,
+            **self.extra,
+        }
+
+
+def run_sequential(
+    name: str,
+    fn: Callable[[int], Any],
+    iterations: int,
+    warmup: int = 0
+) -> ScenarioResult:
+    """
+    Call fn(i) iterations times back to back, timing each call.
+    """
+    for i in range(warmup):
+        fn(i)
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - call_start)
+    return ScenarioResult(name, latencies, time.perf_counter() - start, errors=errors)
+
+
+async def run_concurrent(
+    name: str,
+    call: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    concurrency: int,
+    warmup: int = 0
+) -> ScenarioResult:
+    """
+    Spread iterations calls over concurrency clients that each send their next call as soon
+    as the previous one returns.
+    """
+    for i in range(warmup):
+        await call(i)
+    latencies: list[float] = []
+    errors = 0
+    indices = iter(range(iterations))
+
+    async def client():
+        nonlocal errors
+        for i in indices:
+            call_start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - call_start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(max(1, concurrency))))
+    return ScenarioResult(name, latencies, time.perf_counter() - start, concurrency=concurrency, errors=errors)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        )
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def write_results(
+    path: Path,
+    mode: str,
+    params: dict[str, Any],
+    results: list[ScenarioResult]
+) -> dict[str, Any]:
+    report = {
+        "mode": mode,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": {result.name: result.summary() for result in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+    return report
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@dataclass
+class Comparison:
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = 0.10,
+    min_delta_ms: float = 0.05
+) -> list[Comparison]:
+    """
+    Compare every scenario present in both reports. A latency percentile regresses when it grows
+    by more than threshold and by more than min_delta_ms (sub-0.1ms stages are mostly timer noise);
+    throughput and RTF regress when they drop by more than threshold.
+    """
+    rows: list[Comparison] = []
+    for name, base in baseline["results"].items():
+        cur = current["results"].get(name)
+        if cur is None:
+            continue
+        for metric in LATENCY_METRICS:
+            b, c = base.get(metric), cur.get(metric)
+            if b is None or c is None:
+                continue
+            regressed = c > b * (1 + threshold) and (c - b) > min_delta_ms
+            rows.append(Comparison(name, metric, b, c, regressed))
+        for metric in THROUGHPUT_METRICS:
+            b, c = base.get(metric), cur.get(metric)
+            if b is None or c is None:
+                continue
+            rows.append(Comparison(name, metric, b, c, c < b * (1 - threshold)))
+        if cur.get("errors", 0) > base.get("errors", 0):
+            rows.append(Comparison(name, "errors", base.get("errors", 0), cur["errors"], True))
+    return rows
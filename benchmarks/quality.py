@@ -0,0 +1,71 @@
+# benchmarks/quality.py
+from pathlib import Path
+from typing import Any
+import soundfile as sf
+import torch
+import torchaudio
+
+
+def load_voice_encoder(snapshot_dir: Path | None):
+    """
+    Chatterbox's fp32 speaker encoder alone, as the fixed yardstick for every precision mode.
+    """
+    from chatterbox.models.voice_encoder import VoiceEncoder
+    from chatterbox.tts import REPO_ID
+    from huggingface_hub import hf_hub_download
+    from safetensors.torch import load_file
+
+    path = snapshot_dir / "ve.safetensors" if snapshot_dir else None
+    if path is None or not path.is_file():
+        path = hf_hub_download(repo_id=REPO_ID, filename="ve.safetensors")
+    ve = VoiceEncoder()
+    ve.load_state_dict(load_file(path))
+    return ve.eval()
+
+
+def read_mono(path: Path) -> tuple[torch.Tensor, int]:
+    data, sr = sf.read(str(path), dtype="float32")
+    wav = torch.from_numpy(data)
+    return (wav.mean(dim=-1) if wav.dim() > 1 else wav), sr
+
+
+def speaker_embeddings(ve, wavs: list[torch.Tensor], sample_rate: int) -> torch.Tensor:
+    with torch.inference_mode():
+        embeds = ve.embeds_from_wavs([wav.numpy() for wav in wavs], sample_rate=sample_rate)
+    return torch.nn.functional.normalize(torch.as_tensor(embeds), dim=-1)
+
+
+def mel_distance(reference: torch.Tensor, wav: torch.Tensor, sample_rate: int) -> float:
+    """
+    Mean absolute log-mel difference over the common length. Sampling diverges between precisions,
+    so this tracks spectral drift (noise, muffling, artifacts) rather than sample-exact equality.
+    """
+    mel = torchaudio.transforms.MelSpectrogram(sample_rate=sample_rate, n_fft=1024, hop_length=256, n_mels=80)
+    length = min(reference.shape[-1], wav.shape[-1])
+    a, b = (torch.log(mel(x[:length]) + 1e-5) for x in (reference, wav))
+    return float((a - b).abs().mean())
+
+
+def compare_takes(ve, reference_dir: Path, candidate_dir: Path) -> dict[str, Any]:
+    """
+    Per-line quality of candidate_dir against the same lines in reference_dir: speaker-embedding
+    cosine similarity, duration ratio and log-mel distance, summarized as mean and worst case.
+    """
+    names = sorted(p.name for p in reference_dir.glob("*.wav"))
+    references, candidates, sample_rate = [], [], 0
+    for name in names:
+        reference, sample_rate = read_mono(reference_dir / name)
+        candidate, _ = read_mono(candidate_dir / name)
+        references.append(reference)
+        candidates.append(candidate)
+    similarity = (speaker_embeddings(ve, references, sample_rate) * speaker_embeddings(ve, candidates, sample_rate)).sum(dim=-1)
+    ratios = [c.shape[-1] / r.shape[-1] for r, c in zip(references, candidates)]
+    distances = [mel_distance(r, c, sample_rate) for r, c in zip(references, candidates)]
+    return {
+        "lines": len(names),
+        "speaker_similarity_mean": round(float(similarity.mean()), 4),
+        "speaker_similarity_min": round(float(similarity.min()), 4),
+        "duration_ratio_mean": round(sum(ratios) / len(ratios), 4),
+        "duration_change_max": round(max(abs(r - 1.0) for r in ratios), 4),
+        "mel_l1_mean": round(sum(distances) / len(distances), 4),
+    }
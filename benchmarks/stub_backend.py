@@ -0,0 +1,81 @@
+# benchmarks/stub_backend.py
+import math
+import time
+import wave
+import zlib
+from pathlib import Path
+import torch
+from app.config import TTSConfig
+from app.backends.chatterbox_backend import ChatterboxTTSBackend
+from app.models.domain import speaker as s
+
+STUB_SAMPLE_RATE = 24000
+
+
+class SineModel:
+    """
+    Stand-in for ChatterboxTTS with the calls the backend makes, producing a sine tone instead
+    of running inference. Pitch follows the text and length its character count, so repeated
+    runs write identical files.
+    """
+    def __init__(
+        self,
+        sr: int = STUB_SAMPLE_RATE,
+        seconds_per_char: float = 0.06,
+        delay_ms: float = 0.0
+    ):
+        self.sr = sr
+        self.seconds_per_char = seconds_per_char
+        self.delay_s = max(0.0, delay_ms) / 1000
+        self.device = "cpu"
+        self.conds = None
+
+    def prepare_conditionals(self, wav_fpath: str, exaggeration: float = 0.5):
+        self.conds = (wav_fpath, float(exaggeration))
+
+    def generate(self, text: str, exaggeration: float = 0.5, cfg_weight: float = 0.5, **kwargs) -> torch.Tensor:
+        if self.delay_s:
+            # Optional fake model time, to see how queueing behaves once inference dominates
+            time.sleep(self.delay_s)
+        num_samples = max(1, int(len(text) * self.seconds_per_char * self.sr))
+        freq = 180.0 + zlib.crc32(text.encode("utf-8")) % 220
+        t = torch.arange(num_samples, dtype=torch.float32) / self.sr
+        return (0.3 * torch.sin(2 * math.pi * freq * t)).unsqueeze(0)
+
+
+class StubTTSBackend(ChatterboxTTSBackend):
+    """
+    The real backend (caches, version index, wav writing) around a SineModel, so a benchmark
+    measures everything on the hot path except the model itself.
+    """
+    model_id: str = "bench/sine-stub"
+
+    def __init__(
+        self,
+        config: TTSConfig,
+        seconds_per_char: float = 0.06,
+        delay_ms: float = 0.0
+    ):
+        self._sine = SineModel(seconds_per_char=seconds_per_char, delay_ms=delay_ms)
+        super().__init__(config)
+
+    def _load_model(self):
+        return self._sine
+
+
+def write_voice_refs(voice_ref_dir: Path, seconds: float = 0.5) -> list[Path]:
+    """
+    Write a short silent wav for every configured speaker, so conditionals and audio cache
+    keys (which stat and hash the voice ref) run as they do in production.
+    """
+    voice_ref_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for wav_file in sorted({speaker.wav_file for group in s.SPEAKER_GROUPS.values() for speaker in group.values()}):
+        path = voice_ref_dir / wav_file
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(STUB_SAMPLE_RATE)
+            f.writeframes(b"\x00\x00" * int(STUB_SAMPLE_RATE * seconds))
+        paths.append(path)
+    return paths
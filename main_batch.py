@@ -1,4 +1,5 @@
 import json
+import sys
 from app.tts_runner import TTSRunner
 from app.config import TTSConfig
 
@@ -15,15 +16,25 @@ def main():
     # Run ID returned from OCR module (used in output folder name)
     ocr_runid = "api_batch_20250730_204035_1182d4e1"  # Adjust to match the folder name
 
+    # Run ID of an earlier narration of the same chapter: only new or edited lines are synthesized
+    previous_runid = None
+
     # Load OCR output
     with open(ocr_path, "r", encoding="utf-8") as f:
         ocr_json = json.load(f)
 
     # Process batch
-    result = runner.process_ocr_result(ocr_json, ocr_runid)
+    result = runner.process_ocr_result(ocr_json, ocr_runid, previous_runid)
+
+    if result.get("aborted"):
+        print(f"❌ Aborted after {result['lines']} lines: {result['error']}")
+        print(f"Manifest: {result['manifest']}")
+        sys.exit(1)
 
     print("✅ Done.")
     print(f"Output folder: {result['output_folder']}")
+    if "renarration" in result:
+        print(f"Re-narration: {result['renarration']}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import TTSConfig
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stitch a run's latest (or pinned) takes into one chapter track with a cue index")
+    parser.add_argument("run_id")
+    parser.add_argument("--full", action="store_true", help="rewrite the whole track instead of only changed segments")
+    parser.add_argument("--line-gap-ms", type=int, help="override chapter_line_gap_ms")
+    parser.add_argument("--page-gap-ms", type=int, help="override chapter_page_gap_ms")
+    args = parser.parse_args()
+
+    config = TTSConfig()
+    if args.line_gap_ms is not None:
+        config.chapter_line_gap_ms = args.line_gap_ms
+    if args.page_gap_ms is not None:
+        config.chapter_page_gap_ms = args.page_gap_ms
+    from app.services.chapter_assembler import create_chapter_assembler
+    from app.services.version_index import VersionIndex
+
+    # Only the version index and the takes on disk are needed, not the model
+    index = VersionIndex(config.version_index_path)
+    try:
+        result = create_chapter_assembler(index, config).assemble(args.run_id, incremental=not args.full)
+    except ValueError as e:
+        print(f"[chapter] {e}")
+        return 1
+    finally:
+        index.close()
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import TTSConfig
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pre-render frequent interjections for every voice and emotion")
+    parser.add_argument("--from-ocr", nargs="*", default=[], help="OCR run JSON files to mine frequent short lines from")
+    parser.add_argument("--top", type=int, default=40, help="how many mined phrases to add")
+    parser.add_argument("--max-chars", type=int, default=16, help="longest line that counts as an interjection")
+    parser.add_argument("--no-defaults", action="store_true", help="only use mined phrases")
+    args = parser.parse_args()
+
+    config = TTSConfig()
+    from app.services.phrase_bank import DEFAULT_PHRASES, build_phrase_bank, mine_phrases
+    from app.tts_runner import TTSRunner
+
+    phrases = [] if args.no_defaults else list(DEFAULT_PHRASES)
+    if args.from_ocr:
+        runs = []
+        for path in args.from_ocr:
+            with open(path, "r", encoding="utf-8") as f:
+                runs.append(json.load(f))
+        mined = mine_phrases(runs, top=args.top, max_chars=args.max_chars)
+        print(f"[phrase_bank] Mined {len(mined)} phrases: {mined}")
+        phrases += mined
+    if not phrases:
+        print("[phrase_bank] No phrases to render")
+        return 1
+
+    runner = TTSRunner(config)
+    rendered = build_phrase_bank(runner.backend, phrases, config.phrase_bank_dir)
+    runner.close()
+    print(f"[phrase_bank] Rendered {rendered} takes into {config.phrase_bank_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
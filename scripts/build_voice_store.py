@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import TTSConfig
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Precompute speaker conditionals for every voice in voice_ref_dir")
+    parser.add_argument("--force", action="store_true", help="recompute voices whose stored entry is still fresh")
+    parser.add_argument("--list", action="store_true", help="only print the current index")
+    args = parser.parse_args()
+
+    config = TTSConfig()
+    from app.services.voice_registry import VoiceRegistry
+
+    registry = VoiceRegistry(config.voice_store_dir, config.voice_ref_dir, config.speaker_map)
+    if args.list:
+        for voice in registry.listing():
+            print(f"[voice_store] {voice['gender']:<8} {voice['name']:<20} {voice['wav_file']:<28} "
+                  f"stored={voice['stored']} fresh={voice['fresh']} tags={voice['tags']}")
+        return 0
+
+    from app.backends.chatterbox_backend import ChatterboxTTSBackend
+    from app.backends.voice_store import build_voice_store
+
+    backend = ChatterboxTTSBackend(config)
+    try:
+        computed, kept = build_voice_store(backend, registry, force=args.force)
+    finally:
+        backend.close()
+    print(f"[voice_store] {computed} computed, {kept} unchanged, index: {config.voice_store_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
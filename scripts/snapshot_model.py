@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import TTSConfig
+
+
+def main() -> int:
+    config = TTSConfig()
+    if not config.model_snapshot_dir:
+        print("[snapshot] model_snapshot_dir is not set in config.yaml")
+        return 1
+    from app.backends.chatterbox_backend import save_snapshot
+    save_snapshot(config.model_snapshot_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Run from anywhere: the app package lives at the repo root (as for benchmarks/bench.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
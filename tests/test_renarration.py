@@ -0,0 +1,138 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from app.models.domain import domain as d
+from app.models.domain.emotion import EMOTIONS
+from app.models.domain.speaker import SPEAKER_GROUPS
+from app.services.renarration import EDITED, NEW, UNCHANGED, PreviousRun
+
+IMAGE = "ch01/page_001"
+SPEAKER = SPEAKER_GROUPS["female"]["default"]
+
+
+def _req(dialogue_id: int, text: str, emotion: str = "neutral", speaker=SPEAKER) -> d.TTSInput:
+    # image_ref is not looked at by matching
+    return d.TTSInput.model_construct(
+        text=text,
+        gender=speaker.gender,
+        emotion=EMOTIONS[emotion],
+        speaker=speaker,
+        run_id="run-2",
+        dialogue_id=dialogue_id,
+    )
+
+
+def _entry(outputs: Path, dialogue_id: int, text: str, version: int = 1, **overrides) -> dict:
+    audio_path = f"run-1/{IMAGE}/dialogue__{dialogue_id}/v{version}__neutral.wav"
+    (outputs / audio_path).parent.mkdir(parents=True, exist_ok=True)
+    (outputs / audio_path).write_bytes(b"RIFF")
+    params = EMOTIONS["neutral"].params
+    return {
+        "image": IMAGE,
+        "dialogue_id": dialogue_id,
+        "text": text,
+        "status": "ok",
+        "speaker_wav": SPEAKER.wav_file,
+        "speaker_wav_sha256": "abc",
+        "exaggeration": params.exaggeration,
+        "cfg": params.cfg,
+        "model_id": "chatterbox",
+        "audio_path": audio_path,
+        "audio_seconds": 1.0,
+        **overrides,
+    }
+
+
+def _run(outputs: Path, entries: list[dict], fingerprint: Optional[str] = "abc") -> PreviousRun:
+    return PreviousRun(
+        "run-1",
+        {"entries": entries},
+        outputs,
+        model_id="chatterbox",
+        suffix=".wav",
+        voice_fingerprint=lambda speaker: fingerprint,
+    )
+
+
+@pytest.fixture
+def outputs(tmp_path) -> Path:
+    return tmp_path / "outputs"
+
+
+def test_same_dialogue_id_and_text_is_unchanged(outputs):
+    entries = [_entry(outputs, 0, "Hello there."), _entry(outputs, 1, "Who are you?")]
+    run = _run(outputs, entries)
+    # OCR noise and spacing do not count as an edit
+    matches = run.match_image(IMAGE, [_req(0, "Hello   there ."), _req(1, "Who are you ?")])
+    assert [m.change for m in matches] == [UNCHANGED, UNCHANGED]
+    assert [m.previous for m in matches] == entries
+    assert run.removed() == 0
+
+
+def test_edited_and_new_lines(outputs):
+    run = _run(outputs, [_entry(outputs, 0, "Hello there.")])
+    matches = run.match_image(IMAGE, [_req(0, "Goodbye."), _req(1, "Wait!")])
+    assert [m.change for m in matches] == [EDITED, NEW]
+    assert all(m.previous is None for m in matches)
+    assert run.removed() == 1
+
+
+def test_moved_line_takes_the_nearest_previous_take(outputs):
+    entries = [_entry(outputs, 0, "Huh?"), _entry(outputs, 5, "Huh?")]
+    run = _run(outputs, entries)
+    [match] = run.match_image(IMAGE, [_req(4, "Huh?")])
+    assert match.change == UNCHANGED and match.previous is entries[1]
+
+
+def test_same_position_wins_over_an_earlier_duplicate(outputs):
+    entries = [_entry(outputs, 1, "Huh?"), _entry(outputs, 2, "Huh?")]
+    run = _run(outputs, entries)
+    # The moved line (3) must not claim dialogue 2's take before dialogue 2 does
+    matches = run.match_image(IMAGE, [_req(3, "Huh?"), _req(2, "Huh?")])
+    assert [m.previous for m in matches] == [entries[0], entries[1]]
+
+
+def test_each_previous_take_is_carried_over_once(outputs):
+    entries = [_entry(outputs, 0, "Huh?")]
+    run = _run(outputs, entries)
+    matches = run.match_image(IMAGE, [_req(0, "Huh?"), _req(1, "Huh?")])
+    assert [m.change for m in matches] == [UNCHANGED, NEW]
+    # A second pass over the same image finds it used too
+    assert run.match_image(IMAGE, [_req(0, "Huh?")])[0].change == EDITED
+
+
+@pytest.mark.parametrize("change", [
+    {"status": "error"},
+    {"speaker_wav": "male_default.wav"},
+    {"speaker_wav_sha256": "re-recorded"},
+    {"cfg": 0.9},
+    {"model_id": "other-model"},
+    {"audio_path": "run-1/elsewhere/v1__neutral.mp3"},
+])
+def test_takes_that_cannot_be_reused(outputs, change):
+    entry = _entry(outputs, 0, "Hello there.")
+    entry.update(change)
+    run = _run(outputs, [entry])
+    assert run.match_image(IMAGE, [_req(0, "Hello there.")])[0].change == EDITED
+
+
+def test_missing_take_file_and_other_emotion_are_not_reused(outputs):
+    entry = _entry(outputs, 0, "Hello there.")
+    (outputs / entry["audio_path"]).unlink()
+    run = _run(outputs, [entry, _entry(outputs, 1, "Stop.")])
+    matches = run.match_image(IMAGE, [_req(0, "Hello there."), _req(1, "Stop.", emotion="angry")])
+    assert [m.change for m in matches] == [EDITED, EDITED]
+
+
+def test_manifests_without_model_id_match_the_current_model(outputs):
+    entry = _entry(outputs, 0, "Hello there.")
+    del entry["model_id"]
+    run = _run(outputs, [entry])
+    assert run.match_image(IMAGE, [_req(0, "Hello there.")])[0].change == UNCHANGED
+
+
+def test_other_images_do_not_match(outputs):
+    run = _run(outputs, [_entry(outputs, 0, "Hello there.")])
+    assert run.match_image("ch01/page_002", [_req(0, "Hello there.")])[0].change == NEW
@@ -0,0 +1,95 @@
+import queue
+import time
+
+import pytest
+
+from app.services.scheduler import FairQueue
+
+
+def _drain(q: FairQueue) -> list:
+    return [q.get_nowait() for _ in range(q.qsize())]
+
+
+def test_priority_classes_are_served_strictly_in_order():
+    q = FairQueue(maxsize=10, aging_s=0)
+    q.put_nowait("prewarm", "prewarm")
+    q.put_nowait("batch", "batch")
+    q.put_nowait("interactive", "interactive")
+    assert _drain(q) == ["interactive", "batch", "prewarm"]
+
+
+def test_fifo_within_one_flow():
+    q = FairQueue(maxsize=10, aging_s=0)
+    for i in range(4):
+        q.put_nowait(i, "batch", flow="run-a")
+    assert _drain(q) == [0, 1, 2, 3]
+
+
+def test_flows_take_turns_within_a_class():
+    q = FairQueue(maxsize=10, aging_s=0)
+    for i in range(3):
+        q.put_nowait(f"a{i}", "batch", flow="run-a")
+    q.put_nowait("b0", "batch", flow="run-b")
+    q.put_nowait("b1", "batch", flow="run-b")
+    assert _drain(q) == ["a0", "b0", "a1", "b1", "a2"]
+
+
+def test_cost_and_weight_shift_the_share():
+    q = FairQueue(maxsize=10, aging_s=0, run_weights={"heavy": 2.0})
+    for i in range(4):
+        q.put_nowait(f"h{i}", "batch", flow="heavy")
+        q.put_nowait(f"l{i}", "batch", flow="light")
+    order = _drain(q)
+    # Twice the weight: the heavy run is served two lines per light one
+    assert order[:6] == ["h0", "l0", "h1", "h2", "l1", "h3"]
+
+
+def test_aging_promotes_waiting_work():
+    q = FairQueue(maxsize=10, aging_s=0.05)
+    q.put_nowait("old-prewarm", "prewarm")
+    time.sleep(0.12)
+    q.put_nowait("fresh-batch", "batch")
+    # Two aging steps lift prewarm above a batch request that has not waited one
+    assert q.get_nowait() == "old-prewarm"
+    assert q.get_nowait() == "fresh-batch"
+
+
+def test_get_returns_what_peek_showed():
+    q = FairQueue(maxsize=10, aging_s=0.05)
+    q.put_nowait("batch", "batch")
+    q.put_nowait("prewarm", "prewarm")
+    assert q.peek() == "batch"
+    # Aging would now pick prewarm, but get() honours the peek
+    time.sleep(0.12)
+    assert q.get_nowait() == "batch"
+
+
+def test_reserved_slots_only_admit_interactive():
+    q = FairQueue(maxsize=3, aging_s=0, reserved=1)
+    q.put_nowait(1, "batch")
+    q.put_nowait(2, "batch")
+    with pytest.raises(queue.Full):
+        q.put_nowait(3, "batch")
+    q.put_nowait("edit", "interactive")
+    with pytest.raises(queue.Full):
+        q.put_nowait("edit-2", "interactive")
+
+
+def test_requeue_goes_to_the_head_of_its_class_past_the_bound():
+    q = FairQueue(maxsize=2, aging_s=0)
+    q.put_nowait("a", "batch", flow="run")
+    q.put_nowait("b", "batch", flow="run")
+    q.requeue("retry", "batch", flow="run")
+    assert q.qsize() == 3
+    assert _drain(q) == ["retry", "a", "b"]
+
+
+def test_unknown_priority_and_empty_queue():
+    q = FairQueue(maxsize=2)
+    with pytest.raises(ValueError):
+        q.put_nowait("x", "urgent")
+    with pytest.raises(queue.Empty):
+        q.get_nowait()
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0.01)
+    assert q.peek() is None
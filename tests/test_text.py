@@ -0,0 +1,56 @@
+from app.services.text_normalizer import is_silent, normalize_line, phrase_key
+from app.services.text_segmenter import TextSegment, segment_text
+
+
+def test_normalize_line_canonical_punctuation():
+    assert normalize_line("Wait. . .  you   can't be serious!!!") == "Wait… you can't be serious!"
+    assert normalize_line("What?!?!") == "What?!"
+    assert normalize_line("Really ?") == "Really?"
+
+
+def test_normalize_line_quotes_and_noise():
+    assert normalize_line("「Hello」 ♡") == "“Hello”"
+    assert normalize_line('She said "run" and ran.') == "She said “run” and ran."
+    assert normalize_line("It’s fine~") == "It's fine"
+
+
+def test_normalize_line_keeps_paragraphs():
+    assert normalize_line("One.\n\n\n\nTwo.") == "One.\n\nTwo."
+
+
+def test_silent_lines_and_phrase_keys():
+    assert is_silent("...!?")
+    assert not is_silent("Huh?")
+    assert phrase_key("Huh??") == phrase_key("HUH ?") == "huh?"
+    assert phrase_key("Huh!") != phrase_key("Huh?")
+
+
+def test_segment_text_short_line_is_one_segment():
+    assert segment_text("Hello there.") == [TextSegment("Hello there.", paragraph_end=True)]
+
+
+def test_segment_text_packs_sentences_under_max_chars():
+    text = "One two three. Four five six. Seven eight nine."
+    segments = segment_text(text, max_chars=30)
+    assert [s.text for s in segments] == ["One two three. Four five six.", "Seven eight nine."]
+    assert all(len(s.text) <= 30 for s in segments)
+
+
+def test_segment_text_paragraphs_and_blockquotes():
+    segments = segment_text("First paragraph.\n\nSecond one.\n> Quoted line", max_chars=280)
+    assert [(s.text, s.paragraph_end) for s in segments] == [
+        ("First paragraph.", True),
+        ("Second one.", True),
+        ("Quoted line", True),
+    ]
+
+
+def test_segment_text_never_straddles_a_quote():
+    segments = segment_text("He turned. “Stop right there.” Nobody moved.", max_chars=280)
+    assert [s.text for s in segments] == ["He turned.", "“Stop right there.”", "Nobody moved."]
+
+
+def test_segment_text_wraps_unpunctuated_text_on_words():
+    segments = segment_text("word " * 20, max_chars=22)
+    assert all(len(s.text) <= 22 for s in segments)
+    assert " ".join(s.text for s in segments).split() == ["word"] * 20
@@ -0,0 +1,84 @@
+import threading
+
+from app.services.version_index import VersionIndex
+
+KEY = ("run-1", "ch01/page_001", 3)
+
+
+def _index(tmp_path) -> VersionIndex:
+    return VersionIndex(tmp_path / "index" / "versions.sqlite3")
+
+
+def test_reserve_counts_up_and_blocks_are_consecutive(tmp_path):
+    index = _index(tmp_path)
+    folder = tmp_path / "missing"
+    assert index.reserve(KEY, folder) == 1
+    assert index.reserve(KEY, folder) == 2
+    # Three variants: versions 3, 4, 5
+    assert index.reserve(KEY, folder, count=3) == 3
+    assert index.reserve(KEY, folder) == 6
+    # Other dialogues have their own counters
+    assert index.reserve(("run-1", "ch01/page_001", 4), folder) == 1
+
+
+def test_reserve_seeds_from_takes_on_disk(tmp_path):
+    folder = tmp_path / "dialogue__3"
+    folder.mkdir()
+    for name in ("v1__neutral.wav", "v4__happy.wav", "notes.txt"):
+        (folder / name).write_bytes(b"")
+    index = _index(tmp_path)
+    assert index.reserve(KEY, folder) == 5
+    # Seeded takes are listed, and the folder is not consulted again
+    assert [t["version"] for t in index.list_takes("run-1")] == [1, 4]
+    (folder / "v9__sad.wav").write_bytes(b"")
+    assert index.reserve(KEY, folder) == 6
+
+
+def test_reserve_survives_reopening(tmp_path):
+    folder = tmp_path / "dialogue__3"
+    index = _index(tmp_path)
+    index.reserve(KEY, folder, count=2)
+    index.close()
+    reopened = _index(tmp_path)
+    assert reopened.reserve(KEY, folder) == 3
+
+
+def test_concurrent_reserves_never_share_a_version(tmp_path):
+    folder = tmp_path / "dialogue__3"
+    indexes = [_index(tmp_path) for _ in range(2)]
+    results: list[int] = []
+    lock = threading.Lock()
+
+    def worker(index: VersionIndex):
+        for _ in range(25):
+            version = index.reserve(KEY, folder)
+            with lock:
+                results.append(version)
+
+    threads = [threading.Thread(target=worker, args=(indexes[i % 2],)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == list(range(1, 101))
+
+
+def test_selected_takes_prefers_pins_then_latest_of_engine(tmp_path):
+    index = _index(tmp_path)
+    folder = tmp_path / "dialogue__3"
+    first = index.reserve(KEY, folder, count=3)
+    index.record_take(KEY, first, "v1__neutral.wav", {"engine": "chatterbox"})
+    index.record_take(KEY, first + 1, "v2__neutral.wav", {"engine": "chatterbox"})
+    index.record_take(KEY, first + 2, "v3__neutral.wav", {"engine": "espeak"})
+
+    assert [t["version"] for t in index.selected_takes("run-1")] == [3]
+    [take] = index.selected_takes("run-1", engine="chatterbox")
+    assert take["version"] == 2 and not take["pinned"]
+    assert take["path"] == "run-1/ch01/page_001/dialogue__3/v2__neutral.wav"
+
+    assert index.pin_take(KEY, 1)
+    assert not index.pin_take(KEY, 42)
+    [take] = index.selected_takes("run-1", engine="chatterbox")
+    assert take["version"] == 1 and take["pinned"]
+    assert index.unpin_take(KEY)
+    assert index.selected_takes("run-1", engine="chatterbox")[0]["version"] == 2
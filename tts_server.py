@@ -1,17 +1,158 @@
-from fastapi import FastAPI, Request, Body
-from fastapi.responses import JSONResponse
-from app.models.domain.exceptions import TTSInputError
+from fastapi import FastAPI, Request, Response, Body
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from app.models.domain.exceptions import TTSInputError, TTSQueueFullError, TTSTimeoutError
 from contextlib import asynccontextmanager
-from app.tts_runner import TTSRunner
+from concurrent.futures import Future
+import asyncio
+import threading
+from collections import deque
+from app.services.inference_worker import InferenceWorker
+from app.services.worker_pool import ProcessWorkerPool, routing_key
+from app.services.engine_router import EngineRouter
+from app.services.scheduler import PRIORITIES
+from app.services.job_store import JobStore, JobDispatcher
+from app.services.prefetcher import Prefetcher
+from app.services.memory import MemoryGovernor
+from app.services.take_store import MEDIA_TYPES, RenderedTake, TakeStore
+from app.services.version_index import VersionIndex
+from app.services.chapter_assembler import create_chapter_assembler
+from app.services.voice_registry import VoiceRegistry
+from app.services.tts_resolver import set_voice_registry
+from app.services.metrics import METRICS
 from app.config import TTSConfig
+from app.utils import STARTUP, log_exception
+from typing import TYPE_CHECKING, Literal
 from fastapi.middleware.cors import CORSMiddleware
-from app.models.api import TTSInput, TTSOutput, EmotionOptionsOutput
+from app.models.api import (
+    TTSInput,
+    TTSOutput,
+    TTSDialogueResult,
+    EmotionOptionsOutput,
+    TTSJobInfo,
+    TTSJobSubmitted,
+    TTSJobBatchSubmitted,
+    TTSJobBatchInfo
+)
+import uuid
+
+if TYPE_CHECKING:
+    from app.tts_runner import TTSRunner
 from typing import List, Any
 from fastapi.exceptions import RequestValidationError
 import logging
 from pydantic import ValidationError
 from fastapi import HTTPException
 
+def create_inference_worker(app: FastAPI) -> InferenceWorker | EngineRouter | ProcessWorkerPool:
+    """
+    Build the single owner of inference: a thread around an in-process runner (one per engine,
+    behind an EngineRouter, when several engines are loaded), or a pool of worker processes that
+    each load their own engines (inference_mode: process; requests are routed by engine/quality only).
+    All of them admit requests through one MemoryGovernor (app.state.memory).
+    """
+    config: TTSConfig = app.state.config
+    app.state.memory = MemoryGovernor(
+        budget_bytes=config.memory_budget_mb << 20,
+        chars_per_second=config.memory_chars_per_second,
+        overhead_bytes=config.memory_request_overhead_mb << 20,
+        # Pool processes trim themselves; the server process only holds queues and responses then
+        trim_interval_s=0.0 if config.inference_mode == "process" else config.memory_trim_interval_s
+    )
+    if config.inference_mode == "process":
+        pool = ProcessWorkerPool(
+            num_workers=config.pool_workers,
+            threads_per_worker=config.pool_threads_per_worker,
+            max_queue_depth=config.inference_queue_depth,
+            max_inflight_per_worker=config.pool_max_inflight_per_worker,
+            aging_s=config.scheduler_aging_s,
+            run_weights=config.scheduler_run_weights,
+            interactive_reserve=config.scheduler_interactive_reserve,
+            memory=app.state.memory
+        )
+        # The budget covers the worker processes, where the models and waveforms live
+        app.state.memory.rss_fn = pool.rss_bytes
+        return pool
+
+    # Heavy imports (torch, torchaudio, chatterbox) happen here, not when the server module loads
+    with STARTUP.phase("imports", "📦 Import TTS runtime"):
+        from app.tts_runner import TTSRunner
+    app.state.runner = TTSRunner(config)
+    app.state.runner.warm_up()
+    runner: "TTSRunner" = app.state.runner
+    if len(runner.backends) == 1:
+        return create_thread_worker(runner, config, memory=app.state.memory)
+    return EngineRouter(
+        workers={
+            name: create_thread_worker(runner, config, name=f"tts-inference-{name}", memory=app.state.memory)
+            for name in runner.backends
+        },
+        default_engine=runner.default_engine,
+        preview_engine=config.preview_engine,
+        overload_queue_depth=config.engine_overload_queue_depth
+    )
+
+def create_thread_worker(
+    runner: "TTSRunner",
+    config: TTSConfig,
+    name: str = "tts-inference",
+    memory: MemoryGovernor | None = None
+) -> InferenceWorker:
+    # The worker thread is the only caller of the model from here on. It hands takes to the
+    # audio writer and moves on; requests are answered when their file is in place
+    return InferenceWorker(
+        handler=runner.submit_line,
+        max_queue_depth=config.inference_queue_depth,
+        name=name,
+        batch_handler=runner.generate_lines,
+        max_batch_size=config.inference_max_batch_size,
+        max_batch_wait_ms=config.inference_max_batch_wait_ms,
+        stream_handler=runner.stream_line,
+        render_handler=runner.render_line,
+        aging_s=config.scheduler_aging_s,
+        run_weights=config.scheduler_run_weights,
+        interactive_reserve=config.scheduler_interactive_reserve,
+        memory=memory
+    )
+
+def load_inference(app: FastAPI):
+    """
+    Load the model and start inference in the background, so the server answers
+    health checks and /tts/emotions while the weights are still loading.
+    """
+    try:
+        STARTUP.set_state("loading")
+        worker = create_inference_worker(app)
+        worker.start()
+        app.state.memory.start()
+        if isinstance(worker, ProcessWorkerPool):
+            with STARTUP.phase("pool", "🧵 Wait for pool workers to load"):
+                if not worker.wait_ready(app.state.config.pool_ready_timeout_s):
+                    worker.stop(timeout=5)
+                    raise RuntimeError("TTS pool workers failed to load the model")
+        app.state.inference_worker = worker
+        METRICS.gauge("tts_queue_depth", "Requests waiting for inference").set_function(lambda: worker.queue_depth)
+        priority_depth = METRICS.gauge("tts_queue_depth_by_priority", "Requests waiting for inference, by priority class", ["priority"])
+        for priority in PRIORITIES:
+            priority_depth.set_function(lambda priority=priority: worker.queue_depths().get(priority, 0), priority=priority)
+        app.state.job_dispatcher = JobDispatcher(
+            store=app.state.job_store,
+            worker=worker,
+            max_inflight=app.state.config.job_max_inflight
+        )
+        app.state.job_dispatcher.start()
+        if app.state.config.prefetch_enabled:
+            app.state.prefetcher = Prefetcher(
+                worker=worker,
+                ahead=app.state.config.prefetch_ahead,
+                max_queued=app.state.config.prefetch_max_queued,
+                max_runs=app.state.config.prefetch_max_runs
+            )
+            app.state.prefetcher.start()
+        STARTUP.set_state("ready")
+    except Exception:
+        log_exception("TTS model failed to load")
+        STARTUP.set_state("failed")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -21,8 +162,43 @@ async def lifespan(app: FastAPI):
     """
     # print("Application startup: Initializing resources...")
     app.state.config = TTSConfig()
-    app.state.runner = TTSRunner(app.state.config)
+    app.state.runner = None
+    app.state.inference_worker = None
+    app.state.job_dispatcher = None
+    app.state.prefetcher = None
+    app.state.memory = None
+    app.state.take_store = TakeStore(
+        app.state.config.take_store_max_mb << 20,
+        app.state.config.take_store_ttl_s
+    )
+    app.state.version_index = VersionIndex(app.state.config.version_index_path)
+    app.state.voice_registry = None
+    if app.state.config.voice_store_enabled:
+        app.state.voice_registry = VoiceRegistry(
+            app.state.config.voice_store_dir,
+            app.state.config.voice_ref_dir,
+            app.state.config.speaker_map
+        )
+    # Resolution sees the stored voices before the model is loaded
+    set_voice_registry(app.state.voice_registry)
+    # Jobs can be submitted and polled while the model loads; they start once it is ready
+    app.state.job_store = JobStore(app.state.config.state_dir / "jobs.sqlite3")
+    loader = threading.Thread(target=load_inference, args=(app,), name="tts-model-loader", daemon=True)
+    loader.start()
     yield  # The application starts serving requests here
+    if app.state.job_dispatcher is not None:
+        app.state.job_dispatcher.stop(timeout=5)
+    if app.state.prefetcher is not None:
+        app.state.prefetcher.stop(timeout=5)
+    if app.state.inference_worker is not None:
+        app.state.inference_worker.stop(timeout=5)
+    if app.state.memory is not None:
+        app.state.memory.stop()
+    if app.state.runner is not None:
+        # Let takes already handed to the writer reach the disk
+        app.state.runner.close()
+    app.state.job_store.close()
+    app.state.version_index.close()
     # print("Application shutdown: Cleaning up resources...")
     # # Clean up resources
     # print("Resources cleaned up.")
@@ -68,12 +244,136 @@ async def tts_input_error_handler(
         }
     )
 
+@app.exception_handler(TTSQueueFullError)
+async def tts_queue_full_handler(
+    request: Request,
+    exc: TTSQueueFullError
+):
+    return JSONResponse(
+        status_code=request.app.state.config.inference_queue_full_status,
+        headers={"Retry-After": "5"},
+        content={
+            "error": "TTS_QUEUE_FULL",
+            "message": str(exc)
+        }
+    )
+
+
+@app.exception_handler(TTSTimeoutError)
+async def tts_timeout_handler(
+    request: Request,
+    exc: TTSTimeoutError
+):
+    return JSONResponse(
+        status_code=504,
+        content={
+            "error": "TTS_TIMEOUT",
+            "message": str(exc)
+        }
+    )
+
+
+# How often a waiting handler checks whether its client is still connected
+DISCONNECT_POLL_S = 0.5
+
+TRACE_HEADER = "X-Trace-Id"
+
+def get_trace_id(request: Request) -> str:
+    """
+    The caller's trace id, or a fresh one so every request can be found in the trace logs.
+    """
+    return request.headers.get(TRACE_HEADER) or uuid.uuid4().hex
+
+def get_inference_worker(request: Request) -> InferenceWorker | ProcessWorkerPool:
+    worker = request.app.state.inference_worker
+    if worker is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"TTS model is not ready ({STARTUP.state})",
+            headers={"Retry-After": "10"}
+        )
+    return worker
+
+def claim_prefetched(request: Request, ttsInput: TTSInput) -> Future | None:
+    """
+    The speculative render of this line, if the prefetcher has a usable one.
+    """
+    prefetcher: Prefetcher | None = request.app.state.prefetcher
+    return prefetcher.claim(ttsInput) if prefetcher is not None else None
+
+async def await_inference(request: Request, future: Future, timeout: float):
+    """
+    Await an inference future without blocking the event loop.
+    Cancels the job if the client disconnects or the timeout elapses before it finishes.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    waiter = asyncio.wrap_future(future)
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            future.cancel()
+            raise TTSTimeoutError(f"Request did not finish within {timeout:.0f}s")
+        done, _ = await asyncio.wait({waiter}, timeout=min(DISCONNECT_POLL_S, remaining))
+        if done:
+            return waiter.result()
+        if await request.is_disconnected():
+            # Only takes effect if the job is still queued; a running inference finishes on its own
+            future.cancel()
+            raise asyncio.CancelledError("Client disconnected")
+
+
+TAKE_HEADER = "X-Take-Id"
+SEED_HEADER = "X-TTS-Seed"
+
+def take_response(request: Request, take: RenderedTake, delivery: str, trace_id: str) -> Response:
+    """
+    Answer with an in-memory take, held in the take store so it can still be kept (no take id when it is
+    too large to hold). The encoded audio is sent from the buffer it was encoded into: as the body (audio),
+    or as the second part after the TTSOutput JSON (multipart).
+    """
+    take_id = request.app.state.take_store.put(take)
+    output = TTSOutput(ttsInput=take.req, seed=take.req.seed, take_id=take_id, trace_id=trace_id)
+    media_type = MEDIA_TYPES[take.audio_format]
+    headers = {TRACE_HEADER: trace_id}
+    if take_id is not None:
+        headers[TAKE_HEADER] = take_id
+    if take.req.seed is not None:
+        headers[SEED_HEADER] = str(take.req.seed)
+    if delivery == "audio":
+        return Response(content=memoryview(take.audio), media_type=media_type, headers=headers)
+
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode() + output.model_dump_json().encode(),
+        f"\r\n--{boundary}\r\nContent-Type: {media_type}\r\nContent-Length: {len(take.audio)}\r\n\r\n".encode(),
+        memoryview(take.audio),
+        f"\r\n--{boundary}--\r\n".encode(),
+    ]
+
+    async def body():
+        for part in parts:
+            yield part
+
+    headers["Content-Length"] = str(sum(len(part) for part in parts))
+    return StreamingResponse(body(), media_type=f"multipart/mixed; boundary={boundary}", headers=headers)
+
 @app.post(
     "/tts/dialogue", 
     response_model=TTSOutput,
     summary="Generate TTS for one dialogue with versioned path"
     )
-def tts_dialogue(request: Request, ttsInput: TTSInput):
+async def tts_dialogue(
+    request: Request,
+    response: Response,
+    ttsInput: TTSInput,
+    delivery: Literal["file", "audio", "multipart"] = "file"
+):
+    """
+    delivery=file writes a versioned take and returns its TTSOutput. audio and multipart write nothing:
+    the take is encoded in memory and returned directly (the audio as the body, or a multipart/mixed
+    TTSOutput + audio), for clients that only play it; POST /tts/takes/{take_id}/keep persists it later.
+    """
     try:
         # try:
         #     ttsInput = TTSInput.model_validate(ttsInput)
@@ -86,11 +386,333 @@ def tts_dialogue(request: Request, ttsInput: TTSInput):
         #             "details": e.errors(),
         #         },
         #     )
-        runner: TTSRunner =  request.app.state.runner
-        return runner.generate_line(ttsInput)
+        config: TTSConfig = request.app.state.config
+        worker = get_inference_worker(request)
+        trace_id = get_trace_id(request)
+        if delivery != "file":
+            # Prefetched renders are files already; an in-memory take is always rendered on its own
+            future = worker.submit_render(ttsInput, timeout=config.inference_timeout_s, trace_id=trace_id)
+            take: RenderedTake = await await_inference(request, future, config.inference_timeout_s)
+            return take_response(request, take, delivery, trace_id)
+        future = claim_prefetched(request, ttsInput) or worker.submit(ttsInput, timeout=config.inference_timeout_s, trace_id=trace_id)
+        output: TTSOutput = await await_inference(request, future, config.inference_timeout_s)
+        response.headers[TRACE_HEADER] = trace_id
+        return output.model_copy(update={"trace_id": trace_id})
     except Exception as e:
         raise e
 
+# Marks the end of a streamed synthesis on the chunk queue
+_STREAM_END = object()
+
+@app.post(
+    "/tts/dialogue/stream",
+    summary="Generate TTS for one dialogue and stream it as 16-bit PCM WAV while it is synthesized"
+    )
+async def tts_dialogue_stream(request: Request, ttsInput: TTSInput):
+    config: TTSConfig = request.app.state.config
+    worker = get_inference_worker(request)
+
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def emit(chunk: bytes) -> bool:
+        # Called from the inference thread (or the pool collector); False stops synthesis
+        if stop.is_set():
+            return False
+        loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        return True
+
+    trace_id = get_trace_id(request)
+    future = worker.submit_stream(ttsInput, emit, timeout=config.inference_timeout_s, trace_id=trace_id)
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(chunks.put_nowait, _STREAM_END))
+
+    # The WAV header is emitted once the input is resolved, so bad input is still a proper
+    # error response rather than a broken stream
+    try:
+        first = await await_inference(request, asyncio.ensure_future(chunks.get()), config.inference_timeout_s)
+    except BaseException:
+        stop.set()
+        future.cancel()
+        raise
+    if first is _STREAM_END:
+        return future.result()
+
+    async def body():
+        try:
+            yield first
+            while True:
+                chunk = await chunks.get()
+                if chunk is _STREAM_END:
+                    break
+                yield chunk
+            if not future.cancelled() and future.exception() is not None:
+                logging.error(f"Streamed synthesis failed: {future.exception()!r}")
+        finally:
+            # Client gone or stream finished: stop synthesizing the remaining chunks
+            stop.set()
+            future.cancel()
+
+    return StreamingResponse(body(), media_type="audio/wav", headers={TRACE_HEADER: trace_id})
+
+# How long a bulk request waits before retrying a line the full inference queue turned away
+QUEUE_RETRY_S = 0.1
+
+_ERROR_CODES = {
+    TTSInputError: "TTS_INPUT_ERROR",
+    TTSQueueFullError: "TTS_QUEUE_FULL",
+    TTSTimeoutError: "TTS_TIMEOUT",
+}
+
+def dialogue_result(index: int, req: TTSInput, outcome: Any, trace_id: str) -> bytes:
+    if isinstance(outcome, TTSOutput):
+        result = TTSDialogueResult(
+            index=index,
+            dialogue_id=req.dialogue_id,
+            status="ok",
+            output=outcome.model_copy(update={"trace_id": trace_id})
+        )
+    else:
+        result = TTSDialogueResult(
+            index=index,
+            dialogue_id=req.dialogue_id,
+            status="error",
+            error=_ERROR_CODES.get(type(outcome), "TTS_SYNTHESIS_ERROR"),
+            message=str(outcome)
+        )
+    return (result.model_dump_json() + "\n").encode("utf-8")
+
+def plan_dialogues(runner: "TTSRunner | None", reqs: list[TTSInput]) -> list[tuple[int, Any]]:
+    """
+    Submission order for a bulk request: (index, handler or error) per line. In thread mode the runner
+    resolves every line up front, and each line is queued with a handler that goes straight to synthesis,
+    ordered so lines sharing a voice run back to back. Pool workers resolve on their own, so there
+    the lines are only ordered by voice (None: submit as a plain line).
+    """
+    if runner is None:
+        return sorted(((i, None) for i in range(len(reqs))), key=lambda item: (routing_key(reqs[item[0]]), item[0]))
+
+    def handler_for(new_req: TTSInput, out_dir) -> Any:
+        # The EngineRouter may have moved the line to another engine (overload spill-over)
+        return lambda routed: runner.synthesize_resolved(
+            new_req.model_copy(update={"engine": routed.engine}) if routed.engine else new_req,
+            out_dir
+        )
+
+    return [
+        (i, entry if isinstance(entry, Exception) else handler_for(*entry))
+        for i, entry in runner.prepare_lines(reqs)
+    ]
+
+@app.post(
+    "/tts/dialogues",
+    response_class=StreamingResponse,
+    summary="Generate TTS for many dialogues (e.g. the bubbles of a page), streaming one NDJSON TTSDialogueResult per line as it finishes"
+    )
+async def tts_dialogues(request: Request, ttsInputs: List[TTSInput]):
+    config: TTSConfig = request.app.state.config
+    worker = get_inference_worker(request)
+    trace_id = get_trace_id(request)
+    plan = await asyncio.to_thread(plan_dialogues, request.app.state.runner, ttsInputs)
+
+    def submit(index: int, handler: Any) -> Future:
+        prefetched = claim_prefetched(request, ttsInputs[index])
+        if prefetched is not None:
+            return prefetched
+        if handler is None:
+            return worker.submit(ttsInputs[index], timeout=config.inference_timeout_s, trace_id=trace_id, priority="batch")
+        return worker.submit(ttsInputs[index], timeout=config.inference_timeout_s, handler=handler, trace_id=trace_id, priority="batch")
+
+    async def body():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + config.inference_timeout_s
+        pending = deque(plan)
+        running: dict[asyncio.Future, tuple[int, Future]] = {}
+        try:
+            while pending or running:
+                # Lines are queued as the inference queue has room, so a page larger than the queue
+                # is not turned away; a bad line only fails itself
+                while pending:
+                    index, handler = pending[0]
+                    if isinstance(handler, Exception):
+                        pending.popleft()
+                        yield dialogue_result(index, ttsInputs[index], handler, trace_id)
+                        continue
+                    try:
+                        future = submit(index, handler)
+                    except TTSQueueFullError as e:
+                        if running:
+                            break
+                        if loop.time() > deadline:
+                            pending.popleft()
+                            yield dialogue_result(index, ttsInputs[index], e, trace_id)
+                            continue
+                        await asyncio.sleep(QUEUE_RETRY_S)
+                        continue
+                    except Exception as e:
+                        pending.popleft()
+                        yield dialogue_result(index, ttsInputs[index], e, trace_id)
+                        continue
+                    pending.popleft()
+                    running[asyncio.wrap_future(future)] = (index, future)
+                if not running:
+                    continue
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in done:
+                    index, _ = running.pop(waiter)
+                    outcome = RuntimeError("Line was cancelled") if waiter.cancelled() else waiter.exception()
+                    yield dialogue_result(index, ttsInputs[index], outcome or waiter.result(), trace_id)
+        finally:
+            # Client gone (the response cancels this generator): lines still queued are dropped,
+            # running ones finish on their own
+            for _, future in running.values():
+                future.cancel()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers={TRACE_HEADER: trace_id})
+
+@app.get(
+    "/tts/stats",
+    summary="Queue and cache counters"
+)
+def tts_stats(request: Request):
+    runner: "TTSRunner | None" = request.app.state.runner
+    worker = get_inference_worker(request)
+    prefetcher: Prefetcher | None = request.app.state.prefetcher
+    prefetch = prefetcher.stats() if prefetcher is not None else None
+    memory = request.app.state.memory.stats()
+    take_store = request.app.state.take_store.stats()
+    if runner is None:
+        # Pool mode: caches live in the worker processes and are reported per worker
+        return {"inference": worker.stats(), "prefetch": prefetch, "memory": memory, "take_store": take_store}
+    audio_cache = runner.backend.audio_cache
+    return {
+        "inference": worker.stats(),
+        "prefetch": prefetch,
+        "memory": memory,
+        "take_store": take_store,
+        "conditionals_cache": runner.backend.cache_stats(),
+        "audio_cache": audio_cache.stats() if audio_cache else None,
+        "audio_writer": runner.backend.audio_writer.stats(),
+        "phrase_bank": runner.backend.phrase_bank.stats() if runner.backend.phrase_bank else None,
+        "engines": list(runner.backends),
+    }
+
+@app.get(
+    "/metrics",
+    summary="Prometheus metrics: per-stage latency, real-time factor, queue depth, cache lookups"
+)
+def metrics(request: Request):
+    worker = request.app.state.inference_worker
+    # Pool mode: synthesis metrics live in the worker processes and are exported with a worker label
+    snapshots = worker.metrics_snapshots() if isinstance(worker, ProcessWorkerPool) else None
+    return PlainTextResponse(METRICS.render(snapshots), media_type="text/plain; version=0.0.4")
+
+@app.get(
+    "/tts/runs/{run_id}/takes",
+    summary="List recorded takes of a run from the version index, without walking the output tree"
+)
+def tts_run_takes(
+    request: Request,
+    run_id: str,
+    image: str | None = None,
+    dialogue_id: int | None = None
+):
+    index: VersionIndex = request.app.state.version_index
+    return index.list_takes(run_id, image=image, dialogue_id=dialogue_id)
+
+@app.put(
+    "/tts/runs/{run_id}/takes/{image:path}/{dialogue_id}/pin",
+    summary="Use this take version of a dialogue in chapter assembly instead of the latest"
+)
+def tts_pin_take(request: Request, run_id: str, image: str, dialogue_id: int, version: int):
+    index: VersionIndex = request.app.state.version_index
+    if not index.pin_take((run_id, image, dialogue_id), version):
+        raise HTTPException(status_code=404, detail=f"No take v{version} recorded for {run_id}/{image}/dialogue__{dialogue_id}")
+    return {"run_id": run_id, "image": image, "dialogue_id": dialogue_id, "version": version, "pinned": True}
+
+@app.delete(
+    "/tts/runs/{run_id}/takes/{image:path}/{dialogue_id}/pin",
+    summary="Go back to assembling the latest take of a dialogue"
+)
+def tts_unpin_take(request: Request, run_id: str, image: str, dialogue_id: int):
+    index: VersionIndex = request.app.state.version_index
+    return {"run_id": run_id, "image": image, "dialogue_id": dialogue_id, "pinned": False, "removed": index.unpin_take((run_id, image, dialogue_id))}
+
+@app.post(
+    "/tts/runs/{run_id}/assemble",
+    summary="Stitch the pinned or latest take of every dialogue into one chapter track with JSON and WebVTT cues"
+)
+def tts_run_assemble(request: Request, run_id: str, incremental: bool = True):
+    # Only needs the version index and the files, so it works while the model is still loading
+    assembler = create_chapter_assembler(request.app.state.version_index, request.app.state.config)
+    try:
+        return assembler.assemble(run_id, incremental=incremental)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.post(
+    "/tts/takes/{take_id}/keep",
+    response_model=TTSOutput,
+    summary="Persist an in-memory take (delivery audio/multipart) as the next version of its dialogue"
+)
+async def tts_keep_take(request: Request, response: Response, take_id: str):
+    config: TTSConfig = request.app.state.config
+    store: TakeStore = request.app.state.take_store
+    worker = get_inference_worker(request)
+    take = store.pop(take_id)
+    if take is None:
+        raise HTTPException(status_code=404, detail=f"Take {take_id} is not held (expired, discarded or already kept)")
+    trace_id = get_trace_id(request)
+    runner: "TTSRunner | None" = request.app.state.runner
+    try:
+        if runner is not None:
+            # Only the writer is involved, not the model, so the take skips the inference queue
+            future = await asyncio.to_thread(runner.keep_take, take)
+        else:
+            # Pool mode: the worker processes own the writer and the audio cache. No timeout, so a
+            # queued keep is never dropped once accepted
+            future = worker.submit_keep(take, trace_id=trace_id)
+    except Exception:
+        # Nothing was handed off, so the take is still held and the client can retry
+        store.put(take, take_id)
+        raise
+    if future.done() and future.exception() is not None:
+        # Refused before anything was queued for writing (e.g. no version could be reserved)
+        store.put(take, take_id)
+        raise future.exception()
+    # From here the write lands whether or not we are still waiting: the take is not held again, so a
+    # retry cannot persist it twice, and neither a timeout nor a disconnect cancels it
+    store.mark_kept()
+    try:
+        output: TTSOutput = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), config.inference_timeout_s)
+    except asyncio.TimeoutError:
+        raise TTSTimeoutError(f"Take {take_id} is still being written; it will be kept as its dialogue's next version")
+    response.headers[TRACE_HEADER] = trace_id
+    return output.model_copy(update={"trace_id": trace_id, "take_id": take_id})
+
+@app.delete(
+    "/tts/takes/{take_id}",
+    summary="Drop an in-memory take the client will not keep"
+)
+def tts_discard_take(request: Request, take_id: str):
+    return {"take_id": take_id, "removed": request.app.state.take_store.pop(take_id) is not None}
+
+@app.get(
+    "/healthz",
+    summary="Liveness: the server process is up and answering"
+)
+def healthz():
+    return {"status": "ok", "state": STARTUP.state}
+
+@app.get(
+    "/readyz",
+    summary="Readiness: the model is loaded and speakers are warmed up"
+)
+def readyz(request: Request):
+    snapshot = STARTUP.snapshot()
+    ready = snapshot["state"] == "ready" and request.app.state.inference_worker is not None
+    return JSONResponse(status_code=200 if ready else 503, content=snapshot)
+
 @app.get(
     "/tts/emotions",
     response_model=EmotionOptionsOutput,
@@ -103,3 +725,144 @@ def tts_emotions():
             [emotion for emotion in EMOTIONS.values()],
             key=lambda emo: emo.name)
     )
+
+@app.get(
+    "/tts/speakers",
+    summary="Speakers by gender group: built-in ones and the voices in the voice store, without loading the model"
+)
+def tts_speakers(request: Request):
+    from app.services.tts_resolver import speaker_groups
+
+    registry: VoiceRegistry | None = request.app.state.voice_registry
+    indexed = {voice["wav_file"]: voice for voice in registry.listing()} if registry else {}
+    return {
+        group: [
+            {
+                "name": speaker.name,
+                "gender": speaker.gender.value,
+                "wav_file": speaker.wav_file,
+                "tags": indexed.get(speaker.wav_file, {}).get("tags", []),
+                "stored": indexed.get(speaker.wav_file, {}).get("stored", False),
+                "fresh": indexed.get(speaker.wav_file, {}).get("fresh", False),
+            }
+            for speaker in speakers.values()
+        ]
+        for group, speakers in speaker_groups().items()
+    }
+
+
+def notify_job_dispatcher(request: Request):
+    # No dispatcher yet while the model loads; it picks up queued jobs when it starts
+    dispatcher: JobDispatcher | None = request.app.state.job_dispatcher
+    if dispatcher is not None:
+        dispatcher.notify()
+
+
+@app.post(
+    "/tts/jobs",
+    response_model=TTSJobSubmitted,
+    status_code=202,
+    summary="Queue one dialogue for background TTS and return its job id"
+)
+def tts_submit_job(request: Request, ttsInput: TTSInput):
+    store: JobStore = request.app.state.job_store
+    [job_id] = store.add([ttsInput])
+    notify_job_dispatcher(request)
+    return TTSJobSubmitted(job_id=job_id, status="queued")
+
+
+@app.post(
+    "/tts/jobs/bulk",
+    response_model=TTSJobBatchSubmitted,
+    status_code=202,
+    summary="Queue a list of dialogues as one batch of background TTS jobs"
+)
+def tts_submit_jobs_bulk(request: Request, ttsInputs: List[TTSInput]):
+    store: JobStore = request.app.state.job_store
+    batch_id = uuid.uuid4().hex
+    job_ids = store.add(ttsInputs, batch_id=batch_id)
+    notify_job_dispatcher(request)
+    return TTSJobBatchSubmitted(batch_id=batch_id, job_ids=job_ids)
+
+
+@app.get(
+    "/tts/jobs/batches/{batch_id}",
+    response_model=TTSJobBatchInfo,
+    summary="Get progress of a bulk-submitted batch"
+)
+def tts_get_job_batch(request: Request, batch_id: str):
+    store: JobStore = request.app.state.job_store
+    jobs = store.get_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail=f"Unknown batch: {batch_id}")
+    done = sum(1 for job in jobs if job.status == "done")
+    failed = sum(1 for job in jobs if job.status in ("failed", "cancelled"))
+    return TTSJobBatchInfo(
+        batch_id=batch_id,
+        total=len(jobs),
+        done=done,
+        failed=failed,
+        progress=sum(job.progress for job in jobs) / len(jobs),
+        jobs=jobs
+    )
+
+
+@app.get(
+    "/tts/jobs/{job_id}",
+    response_model=TTSJobInfo,
+    summary="Get status of a TTS job, with its TTSOutput once done"
+)
+def tts_get_job(request: Request, job_id: str):
+    store: JobStore = request.app.state.job_store
+    job = store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@app.delete(
+    "/tts/jobs/{job_id}",
+    response_model=TTSJobInfo,
+    summary="Cancel a TTS job that has not started yet"
+)
+def tts_cancel_job(request: Request, job_id: str):
+    store: JobStore = request.app.state.job_store
+    if not store.cancel(job_id) and store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return store.get(job_id)
+
+
+def get_prefetcher(request: Request) -> Prefetcher:
+    get_inference_worker(request)
+    prefetcher: Prefetcher | None = request.app.state.prefetcher
+    if prefetcher is None:
+        raise HTTPException(status_code=404, detail="Prefetch is disabled (prefetch_enabled)")
+    return prefetcher
+
+
+@app.put(
+    "/tts/prefetch/{run_id}",
+    status_code=202,
+    summary="Register a run's ordered dialogue list to be pre-rendered ahead of the user while the model is idle"
+)
+def tts_register_prefetch(request: Request, run_id: str, ttsInputs: List[TTSInput]):
+    return get_prefetcher(request).register(run_id, ttsInputs)
+
+
+@app.get(
+    "/tts/prefetch/{run_id}",
+    summary="Progress and used/wasted accounting of a run's speculative renders"
+)
+def tts_get_prefetch(request: Request, run_id: str):
+    stats = get_prefetcher(request).run_stats(run_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"Run not registered for prefetch: {run_id}")
+    return stats
+
+
+@app.delete(
+    "/tts/prefetch/{run_id}",
+    summary="Stop pre-rendering a run; queued speculative renders are cancelled"
+)
+def tts_delete_prefetch(request: Request, run_id: str):
+    return {"run_id": run_id, "removed": get_prefetcher(request).unregister(run_id)}